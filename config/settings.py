@@ -68,7 +68,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'urbanfoods.middleware.PollSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'urbanfoods.middleware.CustomAdminSessionMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -166,9 +166,11 @@ if not DEBUG:
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Static files storage with WhiteNoise
 if not DEBUG:
-    STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
+    # Content-hashed names; whitenoise serves them with far-future immutable headers.
+    # collectstatic also regenerates service-worker.js (urbanfoods/pwa.py)
+    STATICFILES_STORAGE = 'urbanfoods.storage.CompressedServiceWorkerManifestStorage'
 else:
-    STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
+    STATICFILES_STORAGE = 'urbanfoods.storage.ServiceWorkerManifestStorage'
 
 # Session Configuration
 SESSION_COOKIE_AGE = 604800  # 1 week
@@ -204,17 +206,24 @@ REST_FRAMEWORK = {
 }
 
 # Caching (Redis recommended for production)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# Set REDIS_URL so all gunicorn workers share one cache (pages, catalog, counters)
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
     }
-    # For production with Redis:
-    # 'default': {
-    #     'BACKEND': 'django.core.cache.backends.redis.RedisCache',
-    #     'LOCATION': 'redis://127.0.0.1:6379/1',
-    # }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+        }
+    }
+
+# Storefront full-page cache lifetime in seconds (0 disables it)
+PAGE_CACHE_SECONDS = int(os.environ.get('PAGE_CACHE_SECONDS', 300))
 
 # Security Settings (Production)
 if not DEBUG:
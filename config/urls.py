@@ -1,5 +1,5 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, register_converter
 from urbanfoods import views, admin_views
 from django.conf import settings
 from django.views.generic import RedirectView
@@ -9,6 +9,9 @@ from django.contrib.auth import views as auth_views
 from django.views.static import serve
 from urbanfoods.sitemap import StaticViewSitemap, FoodItemSitemap
 from django.contrib.sitemaps.views import sitemap
+from urbanfoods.converters import StoreTypeConverter
+
+register_converter(StoreTypeConverter, 'store')
 
 sitemaps = {
     "static": StaticViewSitemap,
@@ -31,6 +34,7 @@ urlpatterns = [
     
     # ==================== PUBLIC PAGES ====================
     path('', views.homepage, name='homepage'),
+    path('<store:store_type>/', views.storefront, name='storefront'),
     path("sitemap.xml", sitemap, {"sitemaps": sitemaps}, name="sitemap"),
     
     # Authentication
@@ -51,7 +55,11 @@ urlpatterns = [
     
     # ==================== STORE SWITCHING ================
     path('api/store/switch/', views.switch_store, name='switch_store'),
+    path('api/catalog/<str:store_type>/', views.catalog_api, name='catalog_api'),
     
+    # Per-user state for the cached storefront
+    path('api/me/bootstrap/', views.me_bootstrap, name='me_bootstrap'),
+
     # ==================== CART & ORDERS ================
     # Cart operations
     path('api/cart/', views.get_cart, name='get_cart'),
@@ -66,6 +74,8 @@ urlpatterns = [
     path('orders/', views.my_orders, name='my_orders'),
     path('orders/<str:order_number>/', views.order_detail, name='order_detail'),
     path('api/orders/<str:order_number>/status/', views.order_status_api, name='order_status_api'),
+    path('api/orders/pending-review/', views.pending_review_order, name='pending_review_order'),
+    path('api/orders/<str:order_number>/dismiss-review/', views.dismiss_review_prompt, name='dismiss_review_prompt'),
     
     # User profile
     path('profile/', views.profile, name='profile'),
@@ -74,6 +84,7 @@ urlpatterns = [
     # Order management
     path('admin-panel/orders/', admin_views.admin_orders, name='admin_orders'),
     path('admin-panel/orders/<str:order_number>/', admin_views.admin_order_detail, name='admin_order_detail'),
+    path('admin-panel/api/orders/', admin_views.admin_orders_api, name='admin_orders_api'),
     path('admin-panel/api/orders/new/', admin_views.get_new_orders, name='get_new_orders'),
     path('admin-panel/api/orders/update-status/', admin_views.update_order_status, name='update_order_status'),
     path('admin-panel/api/orders/cancel/', admin_views.cancel_order, name='cancel_order'),
@@ -129,6 +140,7 @@ urlpatterns = [
     
     # Delivery Guys
     path('admin-panel/delivery-guys/', admin_views.delivery_guys_list, name='delivery_guys_list'),
+    path('admin-panel/delivery-guys/payroll/export/', admin_views.export_delivery_payroll, name='export_delivery_payroll'),
     path('admin-panel/delivery-guys/<int:delivery_guy_id>/', admin_views.delivery_guy_dashboard, name='delivery_guy_dashboard'),
     path('admin-panel/api/delivery-guys/add/', admin_views.add_delivery_guy, name='add_delivery_guy'),
     path('admin-panel/api/delivery-guys/<int:delivery_guy_id>/', admin_views.edit_delivery_guy, name='edit_delivery_guy'),
@@ -136,6 +148,7 @@ urlpatterns = [
     path('admin-panel/api/delivery-guys/<int:delivery_guy_id>/delete/', admin_views.delete_delivery_guy, name='delete_delivery_guy'),
     path('admin-panel/api/delivery-guys/<int:delivery_guy_id>/mark-paid-weekly/', admin_views.mark_delivery_guy_paid_weekly, name='mark_delivery_guy_paid_weekly'),
     path('admin-panel/api/delivery-guys/<int:delivery_guy_id>/week-deliveries/', admin_views.get_delivery_guy_week_deliveries, name='get_delivery_guy_week_deliveries'),
+    path('admin-panel/api/delivery-guys/<int:delivery_guy_id>/deliveries/', admin_views.delivery_guy_deliveries_api, name='delivery_guy_deliveries_api'),
     
     # Site Settings
 
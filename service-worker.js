@@ -1,20 +1,40 @@
 // service-worker.js
 // TipsyTheoryy PWA Service Worker
-// Version: 1.0.1 - Update this version number when you make changes!
+//
+// GENERATED from service-worker.template.js by `manage.py build_service_worker`
+// (also run by collectstatic). Edit the template, not service-worker.js.
 
-const CACHE_VERSION = 'v3.0.6'; // Increment this to force cache update
+// Derived from the content of every precached asset and of this template
+const CACHE_VERSION = '5cc6b520b841';
 const CACHE_NAME = `tipsytheoryy-cache-${CACHE_VERSION}`;
 const OFFLINE_URL = '/offline/'; // Django URL pattern
+const CATALOG_CACHE = 'tipsytheoryy-catalog'; // stale-while-revalidate, kept across versions
 
-// Assets to cache immediately on install
-const PRECACHE_ASSETS = [
-  "/",
+// Static files. When their names are content-hashed a URL never changes
+// content, so copies from a previous version's cache are reused instead of
+// re-downloaded
+const PRECACHE_STATIC = [
   "/static/styles.css",
-  "/static/js/order_detail.js",
   "/static/js/homepage.js",
+  "/static/js/order_detail.js",
   "/static/images/favicon.png",
   "/static/images/bg.jpeg",
-  "/static/images/bg-pattern.jpg",
+  "/static/images/bg-pattern.jpg"
+];
+const STATIC_IS_HASHED = false;
+
+// Storefronts, the default store first. "/" only redirects to the store the
+// session last used, so it is never cached; offline it falls back to the
+// default store
+const STORE_PAGES = [
+  "/liquor/",
+  "/food/",
+  "/grocery/"
+];
+
+// Pages fetched fresh on every install
+const PRECACHE_PAGES = [
+  ...STORE_PAGES,
   "/manifest.json",
   OFFLINE_URL,
 ];
@@ -25,6 +45,16 @@ const RUNTIME_CACHE_URLS = [
   /^\/media\//,
 ];
 
+async function precacheStatic(cache) {
+  await Promise.all(PRECACHE_STATIC.map(async (url) => {
+    const previous = STATIC_IS_HASHED && await caches.match(url);
+    if (previous) {
+      return cache.put(url, previous);
+    }
+    return cache.add(url);
+  }));
+}
+
 // Install event - cache critical assets
 self.addEventListener('install', (event) => {
   console.log('[Service Worker] Installing version:', CACHE_VERSION);
@@ -33,7 +63,7 @@ self.addEventListener('install', (event) => {
     caches.open(CACHE_NAME)
       .then((cache) => {
         console.log('[Service Worker] Precaching assets');
-        return cache.addAll(PRECACHE_ASSETS)
+        return Promise.all([precacheStatic(cache), cache.addAll(PRECACHE_PAGES)])
           .catch((error) => {
             console.error('[Service Worker] Precache failed:', error);
             // Continue even if some assets fail
@@ -57,7 +87,8 @@ self.addEventListener('activate', (event) => {
         // Delete old caches
         return Promise.all(
           cacheNames.map((cacheName) => {
-            if (cacheName !== CACHE_NAME) {
+            // The catalog cache outlives deploys: it revalidates itself
+            if (cacheName !== CACHE_NAME && cacheName !== CATALOG_CACHE) {
               console.log('[Service Worker] Deleting old cache:', cacheName);
               return caches.delete(cacheName);
             }
@@ -71,11 +102,35 @@ self.addEventListener('activate', (event) => {
   );
 });
 
+// Catalog API (/api/catalog/<store>/): answered from cache at once while a
+// revalidation (ETag, mostly 304) refreshes the copy for the next visit
+function staleWhileRevalidate(event) {
+  const { request } = event;
+  const cached = caches.open(CATALOG_CACHE).then((cache) => cache.match(request));
+  const refreshed = fetch(request)
+    .then(async (response) => {
+      if (response && response.status === 200) {
+        const cache = await caches.open(CATALOG_CACHE);
+        await cache.put(request, response.clone());
+      }
+      return response;
+    });
+  // Keep the worker alive until the cache has been refreshed
+  event.waitUntil(refreshed.catch(() => undefined));
+
+  return cached.then((response) => response || refreshed);
+}
+
 // Fetch event - serve from cache or network
 self.addEventListener('fetch', (event) => {
   const { request } = event;
   const url = new URL(request.url);
 
+  if (request.method === 'GET' && url.pathname.startsWith('/api/catalog/')) {
+    event.respondWith(staleWhileRevalidate(event));
+    return;
+  }
+
   // Skip caching for:
   // 1. Non-GET requests
   // 2. Chrome extensions
@@ -115,8 +170,9 @@ self.addEventListener('fetch', (event) => {
     event.respondWith(
       fetch(request)
         .then((response) => {
-          // Clone and cache successful response
-          if (response && response.status === 200) {
+          // Clone and cache successful response (a redirect, e.g. from "/",
+          // cannot be replayed for a navigation)
+          if (response && response.status === 200 && !response.redirected) {
             const responseClone = response.clone();
             caches.open(CACHE_NAME).then((cache) => {
               cache.put(request, responseClone);
@@ -131,6 +187,10 @@ self.addEventListener('fetch', (event) => {
               if (cachedResponse) {
                 return cachedResponse;
               }
+              if (new URL(request.url).pathname === '/') {
+                return caches.match(STORE_PAGES[0])
+                  .then((storeResponse) => storeResponse || caches.match(OFFLINE_URL));
+              }
               // No cached version, return offline page
               return caches.match(OFFLINE_URL);
             });
@@ -0,0 +1,257 @@
+// service-worker.js
+// TipsyTheoryy PWA Service Worker
+//
+// GENERATED from service-worker.template.js by `manage.py build_service_worker`
+// (also run by collectstatic). Edit the template, not service-worker.js.
+
+// Derived from the content of every precached asset and of this template
+const CACHE_VERSION = '__CACHE_VERSION__';
+const CACHE_NAME = `tipsytheoryy-cache-${CACHE_VERSION}`;
+const OFFLINE_URL = '/offline/'; // Django URL pattern
+const CATALOG_CACHE = 'tipsytheoryy-catalog'; // stale-while-revalidate, kept across versions
+
+// Static files. When their names are content-hashed a URL never changes
+// content, so copies from a previous version's cache are reused instead of
+// re-downloaded
+const PRECACHE_STATIC = __PRECACHE_STATIC__;
+const STATIC_IS_HASHED = __STATIC_IS_HASHED__;
+
+// Storefronts, the default store first. "/" only redirects to the store the
+// session last used, so it is never cached; offline it falls back to the
+// default store
+const STORE_PAGES = __STORE_PAGES__;
+
+// Pages fetched fresh on every install
+const PRECACHE_PAGES = [
+  ...STORE_PAGES,
+  "/manifest.json",
+  OFFLINE_URL,
+];
+
+// Assets to cache on first request (runtime caching)
+const RUNTIME_CACHE_URLS = [
+  /^\/static\//,
+  /^\/media\//,
+];
+
+async function precacheStatic(cache) {
+  await Promise.all(PRECACHE_STATIC.map(async (url) => {
+    const previous = STATIC_IS_HASHED && await caches.match(url);
+    if (previous) {
+      return cache.put(url, previous);
+    }
+    return cache.add(url);
+  }));
+}
+
+// Install event - cache critical assets
+self.addEventListener('install', (event) => {
+  console.log('[Service Worker] Installing version:', CACHE_VERSION);
+  
+  event.waitUntil(
+    caches.open(CACHE_NAME)
+      .then((cache) => {
+        console.log('[Service Worker] Precaching assets');
+        return Promise.all([precacheStatic(cache), cache.addAll(PRECACHE_PAGES)])
+          .catch((error) => {
+            console.error('[Service Worker] Precache failed:', error);
+            // Continue even if some assets fail
+            return Promise.resolve();
+          });
+      })
+      .then(() => {
+        console.log('[Service Worker] Skip waiting');
+        return self.skipWaiting(); // Activate immediately
+      })
+  );
+});
+
+// Activate event - clean up old caches
+self.addEventListener('activate', (event) => {
+  console.log('[Service Worker] Activating version:', CACHE_VERSION);
+  
+  event.waitUntil(
+    caches.keys()
+      .then((cacheNames) => {
+        // Delete old caches
+        return Promise.all(
+          cacheNames.map((cacheName) => {
+            // The catalog cache outlives deploys: it revalidates itself
+            if (cacheName !== CACHE_NAME && cacheName !== CATALOG_CACHE) {
+              console.log('[Service Worker] Deleting old cache:', cacheName);
+              return caches.delete(cacheName);
+            }
+          })
+        );
+      })
+      .then(() => {
+        console.log('[Service Worker] Claiming clients');
+        return self.clients.claim(); // Take control of all pages immediately
+      })
+  );
+});
+
+// Catalog API (/api/catalog/<store>/): answered from cache at once while a
+// revalidation (ETag, mostly 304) refreshes the copy for the next visit
+function staleWhileRevalidate(event) {
+  const { request } = event;
+  const cached = caches.open(CATALOG_CACHE).then((cache) => cache.match(request));
+  const refreshed = fetch(request)
+    .then(async (response) => {
+      if (response && response.status === 200) {
+        const cache = await caches.open(CATALOG_CACHE);
+        await cache.put(request, response.clone());
+      }
+      return response;
+    });
+  // Keep the worker alive until the cache has been refreshed
+  event.waitUntil(refreshed.catch(() => undefined));
+
+  return cached.then((response) => response || refreshed);
+}
+
+// Fetch event - serve from cache or network
+self.addEventListener('fetch', (event) => {
+  const { request } = event;
+  const url = new URL(request.url);
+
+  if (request.method === 'GET' && url.pathname.startsWith('/api/catalog/')) {
+    event.respondWith(staleWhileRevalidate(event));
+    return;
+  }
+
+  // Skip caching for:
+  // 1. Non-GET requests
+  // 2. Chrome extensions
+  // 3. Admin panel
+  // 4. API endpoints (you might want to cache some API responses)
+  if (
+    request.method !== 'GET' ||
+    url.protocol === 'chrome-extension:' ||
+    url.pathname.startsWith('/backend/') ||
+    url.pathname.startsWith('/api/')
+  ) {
+    return;
+  }
+
+  // Handle manifest.json specially - always fetch fresh
+  if (url.pathname.endsWith('manifest.json')) {
+    event.respondWith(
+      fetch(request)
+        .then((response) => {
+          // Clone and cache the fresh manifest
+          const responseClone = response.clone();
+          caches.open(CACHE_NAME).then((cache) => {
+            cache.put(request, responseClone);
+          });
+          return response;
+        })
+        .catch(() => {
+          // Return cached manifest as fallback
+          return caches.match(request);
+        })
+    );
+    return;
+  }
+
+  // Network-first strategy for HTML pages (to get latest content)
+  if (request.headers.get('accept').includes('text/html')) {
+    event.respondWith(
+      fetch(request)
+        .then((response) => {
+          // Clone and cache successful response (a redirect, e.g. from "/",
+          // cannot be replayed for a navigation)
+          if (response && response.status === 200 && !response.redirected) {
+            const responseClone = response.clone();
+            caches.open(CACHE_NAME).then((cache) => {
+              cache.put(request, responseClone);
+            });
+          }
+          return response;
+        })
+        .catch(() => {
+          // Network failed, try cache
+          return caches.match(request)
+            .then((cachedResponse) => {
+              if (cachedResponse) {
+                return cachedResponse;
+              }
+              if (new URL(request.url).pathname === '/') {
+                return caches.match(STORE_PAGES[0])
+                  .then((storeResponse) => storeResponse || caches.match(OFFLINE_URL));
+              }
+              // No cached version, return offline page
+              return caches.match(OFFLINE_URL);
+            });
+        })
+    );
+    return;
+  }
+
+  // Cache-first strategy for static assets (CSS, JS, images)
+  event.respondWith(
+    caches.match(request)
+      .then((cachedResponse) => {
+        if (cachedResponse) {
+          return cachedResponse;
+        }
+
+        // Not in cache, fetch from network
+        return fetch(request)
+          .then((response) => {
+            // Check if this is a static asset worth caching
+            const shouldCache = RUNTIME_CACHE_URLS.some(pattern => 
+              pattern.test(url.pathname)
+            );
+
+            if (shouldCache && response && response.status === 200) {
+              const responseClone = response.clone();
+              caches.open(CACHE_NAME).then((cache) => {
+                cache.put(request, responseClone);
+              });
+            }
+
+            return response;
+          })
+          .catch((error) => {
+            console.log('[Service Worker] Fetch failed:', error);
+            // For images, return a placeholder if available
+            if (request.destination === 'image') {
+              return caches.match('/static/images/placeholder.png');
+            }
+          });
+      })
+  );
+});
+
+// Listen for messages from the client
+self.addEventListener('message', (event) => {
+  if (event.data && event.data.type === 'SKIP_WAITING') {
+    self.skipWaiting();
+  }
+  
+  if (event.data && event.data.type === 'CACHE_URLS') {
+    // Allow client to request caching of specific URLs
+    const urls = event.data.urls;
+    event.waitUntil(
+      caches.open(CACHE_NAME)
+        .then((cache) => cache.addAll(urls))
+    );
+  }
+});
+
+// Background sync for offline form submissions (optional)
+self.addEventListener('sync', (event) => {
+  if (event.tag === 'sync-orders') {
+    event.waitUntil(
+      // Handle offline order sync here
+      syncOfflineOrders()
+    );
+  }
+});
+
+async function syncOfflineOrders() {
+  // Implementation for syncing offline orders
+  console.log('[Service Worker] Syncing offline orders');
+  // This would retrieve orders from IndexedDB and send them to server
+}
\ No newline at end of file
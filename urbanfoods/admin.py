@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import *
+from .order_events import order_status_changed
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -49,6 +50,13 @@ class OrderAdmin(admin.ModelAdmin):
     readonly_fields = ('order_number', 'created_at', 'updated_at', 'payment_completed_at', 'mpesa_checkout_request_id', 'mpesa_transaction_date')
     ordering = ('-created_at',)
 
+    def save_model(self, request, obj, form, change):
+        old_status = form.initial.get('status') if change else None
+        super().save_model(request, obj, form, change)
+        # New orders are picked up once their items exist; see backfill_sales_rollups
+        if change:
+            order_status_changed(obj, old_status)
+
     fieldsets = (
         ('Order Information', {
             'fields': ('order_number', 'user', 'store_type', 'status', 'created_at', 'updated_at')
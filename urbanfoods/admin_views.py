@@ -1,17 +1,25 @@
 from django.contrib.auth.decorators import user_passes_test
 from django.views.decorators.http import require_POST, require_GET
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.core.paginator import Paginator
+from urllib.parse import urlencode
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.hashers import check_password
 from django.http import JsonResponse, HttpResponse
 from django.db.models.functions import ExtractHour, TruncDate
-from django.db.models import Count, Sum, Avg, Max, F, Q
+from django.db.models import Count, Sum, Avg, Max, F, Q, Prefetch
 from django.db import models
 from django.utils.dateparse import parse_datetime
 from django.utils import timezone
 from datetime import timedelta, datetime
 from .utils import send_push_to_all, notify_low_stock
 from .models import *
+from .order_events import order_status_changed
+from .catalog import invalidate_catalog
+from .page_cache import purge_pages
+from .serializers import ORDER_LIST_FIELDS, orders_with_items, serialize_order
+from . import analytics, customers, pagination, payroll
 import json
 
 def staff_member_required(view_func=None, login_url='admin_login'):
@@ -119,86 +127,36 @@ from django.db.models import Sum, F, ExpressionWrapper, DecimalField
 
 def get_liquor_stats(date, week_start):
     """Return today's and weekly stats for liquor store"""
-    today_orders = Order.objects.filter(
-        created_at__date=date,
-        items__food_item__store_type='liquor'
-    ).distinct()
-
-    today_revenue = OrderItem.objects.filter(
-        order__created_at__date=date,
-        food_item__store_type='liquor',
-        order__status__in=['delivered', 'completed']
-    ).aggregate(
-        total=Sum(
-            ExpressionWrapper(
-                F('price_at_order') * F('quantity'),
-                output_field=DecimalField()
-            )
-        )
-    )['total'] or 0
-
-    pending_orders = Order.objects.filter(
-        status='pending',
-        items__food_item__store_type='liquor'
-    ).distinct().count()
-
-    out_for_delivery = Order.objects.filter(
-        status='out_for_delivery',
-        items__food_item__store_type='liquor'
-    ).distinct().count()
-
-    weekly_orders = Order.objects.filter(
-        created_at__date__gte=week_start,
-        items__food_item__store_type='liquor'
-    ).distinct()
-
-    weekly_revenue = OrderItem.objects.filter(
-        order__created_at__date__gte=week_start,
-        food_item__store_type='liquor',
-        order__status__in=['delivered', 'completed']
-    ).aggregate(
-        total=Sum(
-            ExpressionWrapper(
-                F('price_at_order') * F('quantity'),
-                output_field=DecimalField()
-            )
-        )
-    )['total'] or 0
-
-    weekly_order_count = weekly_orders.count()
+    stats = analytics.dashboard_stats('liquor')
+    weekly_order_count = stats['weekly_orders']
+    weekly_revenue = stats['weekly_items_revenue']
     average_order_value = weekly_revenue / weekly_order_count if weekly_order_count else 0
 
     return {
-        'today_orders_count': today_orders.count(),
-        'today_revenue': today_revenue,
-        'pending_orders': pending_orders,
-        'out_for_delivery': out_for_delivery,
+        'today_orders_count': stats['today_orders'],
+        'today_revenue': stats['today_items_revenue'],
+        'pending_orders': stats['pending_orders'],
+        'out_for_delivery': stats['out_for_delivery'],
         'weekly_order_count': weekly_order_count,
         'weekly_revenue': weekly_revenue,
         'average_order_value': average_order_value,
     }
 
+def get_weekly_revenue_trend(store_type):
+    """Daily revenue (items + delivery fees) and order counts since Monday"""
+    today = timezone.localdate()
+    week_start = today - timedelta(days=today.weekday())
+    return analytics.revenue_trend(week_start, today, store_type=store_type, statuses=VALID_STATUSES)
+
 def get_popular_liquor_items(date):
-    return OrderItem.objects.filter(
-        order__created_at__date=date,
-        order__status__in=VALID_STATUSES,
-        order__store_type='liquor'
-    ).values('food_item__name').annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum('price_at_order')
-    ).order_by('-total_quantity')[:5]
+    return analytics.top_items(date, date, store_type='liquor', statuses=VALID_STATUSES, limit=5)
 
 def get_peak_hours(days=7):
-    from django.db.models.functions import ExtractHour
-    from django.utils import timezone
-    start = timezone.now() - timezone.timedelta(days=days)
-    return Order.objects.filter(
-        created_at__gte=start,
-        status__in=VALID_STATUSES,
-        store_type='liquor'
-    ).annotate(hour=ExtractHour('created_at')).values('hour').annotate(
-        order_count=Count('id')
-    ).order_by('-order_count')[:5]
+    today = timezone.localdate()
+    return analytics.peak_hours(
+        today - timedelta(days=days), today,
+        store_type='liquor', statuses=VALID_STATUSES, limit=5
+    )
 
 
 @staff_member_required(login_url='admin_login')
@@ -208,18 +166,11 @@ def admin_dashboard(request):
     week_start = today - timedelta(days=today.weekday())
 
     stats = get_liquor_stats(date=today, week_start=week_start)
-    popular_today = get_popular_liquor_items(date=today)
+    popular_today = get_popular_liquor_items(date=timezone.localdate())
     peak_hours = get_peak_hours(days=7)
 
     # Weekly revenue trend (daily)
-    weekly_items = OrderItem.objects.filter(
-        order__created_at__date__gte=week_start,
-        order__status__in=['delivered', 'completed'],
-        order__store_type='liquor'
-    ).annotate(day=TruncDate('order__created_at')).values('day').annotate(
-        daily_revenue=Sum('price_at_order'),
-        order_count=Count('order', distinct=True)
-    ).order_by('day')
+    revenue_trend = get_weekly_revenue_trend('liquor')
 
     context = {
         'today_orders_count': stats['today_orders_count'],
@@ -229,7 +180,7 @@ def admin_dashboard(request):
         'average_order_value': stats['average_order_value'],
         'popular_today': popular_today,
         'peak_hours': peak_hours,
-        'revenue_trend': list(weekly_items),
+        'revenue_trend': revenue_trend,
     }
 
     # If AJAX request, return JSON
@@ -241,117 +192,170 @@ def admin_dashboard(request):
 @staff_member_required(login_url='admin_login')
 def admin_dashboard_stats(request):
     """AJAX endpoint for liquor dashboard stats"""
-    today = timezone.now().date()
-    week_start = today - timedelta(days=today.weekday())
-
-    # Today's orders
-    today_orders = Order.objects.filter(created_at__date=today, store_type='liquor')
-
-    # Revenue including delivery fee (only delivered/completed)
-    today_items_revenue = OrderItem.objects.filter(
-        order__in=today_orders,
-        food_item__store_type='liquor',
-        order__status__in=VALID_STATUSES
-    ).aggregate(revenue=Sum('price_at_order'))['revenue'] or 0
-
-    today_delivery_fee = today_orders.filter(
-        status__in=VALID_STATUSES
-    ).aggregate(fee=Sum('delivery_fee'))['fee'] or 0
+    # Counters (one query, memoized for a few seconds)
+    stats = analytics.dashboard_stats('liquor')
 
-    today_revenue = float(today_items_revenue + today_delivery_fee)
-
-    # Pending and out-for-delivery orders
-    pending_orders = Order.objects.filter(status='pending', store_type='liquor').count()
-    out_for_delivery = Order.objects.filter(status='out_for_delivery', store_type='liquor').count()
-
-    # Weekly revenue trend
-    weekly_orders = Order.objects.filter(
-        created_at__date__gte=week_start,
-        store_type='liquor'
-    )
-
-    weekly_items = OrderItem.objects.filter(
-        order__in=weekly_orders,
-        food_item__store_type='liquor',
-        order__status__in=VALID_STATUSES
-    ).annotate(day=TruncDate('order__created_at')).values('day').annotate(
-        revenue=Sum('price_at_order'),
-        orders=Count('order', distinct=True)
-    ).order_by('day')
-
-    # Add delivery fee per day (only delivered/completed)
-    daily_delivery_fees = {}
-    for o in weekly_orders.filter(status__in=VALID_STATUSES):
-        day = o.created_at.date()
-        daily_delivery_fees[day] = daily_delivery_fees.get(day, 0) + float(o.delivery_fee)
-
-    revenue_trend = [
-        {
-            'day': item['day'].strftime('%Y-%m-%d'),
-            'revenue': float(item['revenue'] or 0) + daily_delivery_fees.get(item['day'], 0),
-            'orders': item['orders']
-        }
-        for item in weekly_items
-    ]
+    # Weekly revenue trend (items + delivery fees per day)
+    revenue_trend = get_weekly_revenue_trend('liquor')
 
     return JsonResponse({
         'success': True,
-        'today_orders_count': today_orders.count(),
-        'today_revenue': today_revenue,
-        'pending_orders': pending_orders,
-        'out_for_delivery': out_for_delivery,
+        'today_orders_count': stats['today_orders'],
+        'today_revenue': float(stats['today_revenue']),
+        'pending_orders': stats['pending_orders'],
+        'out_for_delivery': stats['out_for_delivery'],
         'revenue_trend': revenue_trend
     })
 
 
 # ==================== ORDER MANAGEMENT ====================
 
+ORDER_LIST_FILTERS = ('status', 'payment_method', 'payment_status', 'store_type', 'delivery_guy', 'hostel', 'date_from', 'date_to')
+
+def _filter_orders(params, orders=None):
+    """
+    Apply the order-list filters found in ``params`` (a GET QueryDict).
+    Unknown or invalid values are ignored. Returns ``(orders, filters)``.
+    """
+    orders = Order.objects.all() if orders is None else orders
+    filters = {}
+
+    choices = {
+        'status': {value for value, _ in Order.STATUS_CHOICES},
+        'payment_method': {'mpesa', 'till', 'cash'},
+        'payment_status': {value for value, _ in Order._meta.get_field('payment_status').choices},
+        'store_type': {value for value, _ in Order._meta.get_field('store_type').choices},
+    }
+    for name, allowed in choices.items():
+        value = params.get(name, 'all')
+        if value in allowed:
+            orders = orders.filter(**{name: value})
+            filters[name] = value
+
+    delivery_guy = params.get('delivery_guy', '')
+    if delivery_guy == 'none':
+        orders = orders.filter(delivery_guy__isnull=True)
+        filters['delivery_guy'] = delivery_guy
+    elif delivery_guy.isdigit():
+        orders = orders.filter(delivery_guy_id=int(delivery_guy))
+        filters['delivery_guy'] = delivery_guy
+
+    hostel = params.get('hostel', '').strip()
+    if hostel:
+        orders = orders.filter(hostel=hostel)
+        filters['hostel'] = hostel
+
+    # Inclusive local-date range on created_at
+    for name, lookup, offset in (('date_from', 'created_at__gte', 0), ('date_to', 'created_at__lt', 1)):
+        try:
+            day = datetime.strptime(params.get(name, ''), '%Y-%m-%d').date()
+        except ValueError:
+            continue
+        bound = timezone.make_aware(datetime.combine(day + timedelta(days=offset), datetime.min.time()))
+        orders = orders.filter(**{lookup: bound})
+        filters[name] = day.isoformat()
+
+    return orders, filters
+
+def _order_list_page(request, orders):
+    """Filtered, keyset-paginated page of orders plus count estimate for list views and the API"""
+    orders, filters = _filter_orders(request.GET, orders)
+    order_count, count_is_exact = pagination.estimated_count(orders)
+    page, next_cursor = pagination.keyset_page(
+        orders.select_related('user', 'delivery_guy').prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('food_item'))
+        ),
+        'created_at',
+        cursor=request.GET.get('cursor'),
+        limit=pagination.page_size(request.GET.get('limit'), default=50),
+    )
+    return {
+        'orders': page,
+        'next_cursor': next_cursor,
+        'order_count': order_count,
+        'count_is_exact': count_is_exact,
+        'filters': filters,
+        'filter_query': urlencode(filters),
+        'is_first_page': not request.GET.get('cursor'),
+    }
+
 @staff_member_required(login_url='admin_login')
 def admin_orders(request):
     """Order management page"""
-    status_filter = request.GET.get('status', 'all')
-    payment_method_filter = request.GET.get('payment_method', 'all')
-    payment_status_filter = request.GET.get('payment_status', 'all')
-
-    orders = Order.objects.all().select_related('user').prefetch_related('items')
-
-    if status_filter != 'all':
-        orders = orders.filter(status=status_filter)
-
-    if payment_method_filter != 'all':
-        orders = orders.filter(payment_method=payment_method_filter)
+    try:
+        context = _order_list_page(request, Order.objects.all())
+    except pagination.InvalidCursor:
+        return redirect('admin_orders')
+
+    context.update({
+        'status_filter': context['filters'].get('status', 'all'),
+        'payment_method_filter': context['filters'].get('payment_method', 'all'),
+        'payment_status_filter': context['filters'].get('payment_status', 'all'),
+        'status_choices': Order.STATUS_CHOICES,
+        'list_url': reverse('admin_orders'),
+    })
 
-    if payment_status_filter != 'all':
-        orders = orders.filter(payment_status=payment_status_filter)
+    return render(request, 'custom_admin/liquor_orders.html', context)
 
-    # Recent orders first
-    orders = orders.order_by('-created_at')
+@staff_member_required(login_url='admin_login')
+@require_GET
+def admin_orders_api(request):
+    """Cursor-paginated, filterable order list (JSON)"""
+    try:
+        page = _order_list_page(request, Order.objects.all())
+    except pagination.InvalidCursor as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
 
-    context = {
-        'orders': orders[:50],  # Limit to recent 50
-        'status_filter': status_filter,
-        'payment_method_filter': payment_method_filter,
-        'payment_status_filter': payment_status_filter,
-    }
+    return JsonResponse({
+        'success': True,
+        'orders': [
+            {
+                'order_number': order.order_number,
+                'detail_url': reverse('admin_order_detail', args=[order.order_number]),
+                'user': order.user.username,
+                'phone_number': order.user.phone_number,
+                'hostel': order.hostel,
+                'room_number': order.room_number,
+                'items': [
+                    {'name': item.food_item.name, 'quantity': item.quantity}
+                    for item in order.items.all()
+                ],
+                'total': float(order.total),
+                'status': order.status,
+                'status_display': order.get_status_display(),
+                'payment_method': order.payment_method,
+                'payment_status': order.payment_status,
+                'store_type': order.store_type,
+                'delivery_guy': order.delivery_guy.name if order.delivery_guy else None,
+                'created_at': order.created_at.isoformat(),
+            }
+            for order in page['orders']
+        ],
+        'next_cursor': page['next_cursor'],
+        'count': page['order_count'],
+        'count_is_exact': page['count_is_exact'],
+        'filters': page['filters'],
+    })
 
-    return render(request, 'custom_admin/liquor_orders.html', context)
+def _new_orders(since=None):
+    """Pending orders, optionally only those placed after ``since``"""
+    orders = Order.objects.filter(status='pending')
+    if since:
+        orders = orders.filter(created_at__gt=since)
+    return orders
 
 @staff_member_required(login_url='admin_login')
 def get_new_orders(request):
     """API endpoint to check for new orders (for auto-refresh)"""
     last_check = request.GET.get('last_check')
 
+    last_check_time = None
     if last_check:
         last_check_time = parse_datetime(last_check)
         if last_check_time is not None and timezone.is_naive(last_check_time):
             last_check_time = timezone.make_aware(last_check_time, timezone.get_current_timezone())
 
-        new_orders = Order.objects.filter(
-            created_at__gt=last_check_time,
-            status='pending'
-        ) if last_check_time else Order.objects.filter(status='pending')
-    else:
-        new_orders = Order.objects.filter(status='pending')
+    new_orders = _new_orders(last_check_time)
 
     orders_data = []
     for order in new_orders:
@@ -464,6 +468,7 @@ def update_order_status(request):
                     notify_low_stock(product)
 
     order.save()
+    order_status_changed(order, old_status)
 
     # 📝 Status history
     OrderStatusHistory.objects.create(
@@ -500,6 +505,7 @@ def restock_product(request):
     product.stock += amount
     product.is_available = True
     product.save()
+    invalidate_catalog(product.store_type)
 
     return JsonResponse({
         "success": True,
@@ -517,9 +523,11 @@ def cancel_order(request):
         reason = data.get('reason', 'Cancelled by admin')
 
         order = get_object_or_404(Order, order_number=order_number)
+        old_status = order.status
         order.status = 'cancelled'
         order.cancellation_reason = reason
         order.save()
+        order_status_changed(order, old_status)
 
         # Create status history entry
         OrderStatusHistory.objects.create(
@@ -561,95 +569,35 @@ def get_payment_details(request, order_number):
 @staff_member_required(login_url='admin_login')
 def liquor_dashboard(request):
     """Liquor store admin dashboard"""
-    today = timezone.now().date()
-
-    # Delivered/completed liquor orders for revenue calculation
-    delivered_orders = Order.objects.filter(
-        created_at__date=today,
-        status__in=['delivered', 'completed'],
-        items__food_item__store_type='liquor'
-    ).distinct()
-
-    # Today's revenue (items + delivery fees)
-    today_items_revenue = OrderItem.objects.filter(
-        order__in=delivered_orders,
-        food_item__store_type='liquor'
-    ).aggregate(revenue=Sum('price_at_order'))['revenue'] or 0
-    today_delivery_fee = delivered_orders.aggregate(fee=Sum('delivery_fee'))['fee'] or 0
-    today_revenue = float(today_items_revenue + today_delivery_fee)
-
-    # Pending and out-for-delivery orders (all liquor orders, not yet delivered)
-    pending_orders = Order.objects.filter(
-        status='pending',
-        items__food_item__store_type='liquor'
-    ).distinct().count()
-    preparing_orders = Order.objects.filter(
-        status='preparing',
-        items__food_item__store_type='liquor'
-    ).distinct().count()
-    out_for_delivery = Order.objects.filter(
-        status='out_for_delivery',
-        items__food_item__store_type='liquor'
-    ).distinct().count()
+    # Counters (one query, memoized for a few seconds)
+    stats = analytics.dashboard_stats('liquor')
 
     # Popular liquor items today (delivered only)
-    popular_today = OrderItem.objects.filter(
-        order__created_at__date=today,
-        order__status__in=['delivered', 'completed'],
-        food_item__store_type='liquor'
-    ).values(
-        'food_item__name'
-    ).annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum('price_at_order')
-    ).order_by('-total_quantity')[:5]
+    popular_today = get_popular_liquor_items(date=timezone.localdate())
 
     # Weekly delivered/completed orders
-    week_start = today - timedelta(days=today.weekday())
-    weekly_orders = Order.objects.filter(
-        created_at__date__gte=week_start,
-        status__in=['delivered', 'completed'],
-        items__food_item__store_type='liquor'
-    ).distinct()
-
-    weekly_items_revenue = OrderItem.objects.filter(
-        order__in=weekly_orders,
-        food_item__store_type='liquor'
-    ).aggregate(total=Sum('price_at_order'))['total'] or 0
-    weekly_delivery_fee = weekly_orders.aggregate(total=Sum('delivery_fee'))['total'] or 0
-    weekly_revenue = float(weekly_items_revenue + weekly_delivery_fee)
-    weekly_order_count = weekly_orders.count()
+    weekly_revenue = float(stats['weekly_revenue'])
+    weekly_order_count = stats['weekly_delivered_orders']
     average_order_value = weekly_revenue / weekly_order_count if weekly_order_count > 0 else 0
 
     # Revenue trend (daily) including delivery fee
-    revenue_trend = weekly_orders.annotate(day=TruncDate('created_at')).values('day').annotate(
-        items_revenue=Sum('items__price_at_order'),
-        delivery_fee=Sum('delivery_fee'),
-        daily_revenue=F('items_revenue') + F('delivery_fee'),
-        order_count=Count('id')
-    ).order_by('day')
+    revenue_trend = get_weekly_revenue_trend('liquor')
 
     # Peak hours (last 7 days, delivered/completed only)
-    peak_hours = Order.objects.filter(
-        created_at__gte=timezone.now() - timedelta(days=7),
-        status__in=['delivered', 'completed'],
-        items__food_item__store_type='liquor'
-    ).distinct().annotate(hour=ExtractHour('created_at')).values('hour').annotate(
-        order_count=Count('id')
-    ).order_by('-order_count')[:5]
+    peak_hours = get_peak_hours(days=7)
 
     context = {
-        'today_orders_count': delivered_orders.count(),
-        'today_revenue': today_revenue,
-        'pending_orders': pending_orders,
-        'preparing_orders': preparing_orders,
-        'out_for_delivery': out_for_delivery,
+        'today_orders_count': stats['today_delivered_orders'],
+        'today_revenue': float(stats['today_revenue']),
+        'pending_orders': stats['pending_orders'],
+        'preparing_orders': stats['preparing_orders'],
+        'out_for_delivery': stats['out_for_delivery'],
         'popular_today': popular_today,
         'weekly_orders': weekly_order_count,
         'weekly_revenue': weekly_revenue,
         'average_order_value': average_order_value,
         'peak_hours': peak_hours,
-        'revenue_trend': list(revenue_trend),
+        'revenue_trend': revenue_trend,
         'store_type': 'liquor',
     }
 
@@ -659,26 +607,17 @@ def liquor_dashboard(request):
 @staff_member_required(login_url='admin_login')
 def liquor_orders(request):
     """Liquor order management page"""
-    status_filter = request.GET.get('status', 'all')
-    status_choices = Order.STATUS_CHOICES
-    valid_statuses = {value for value, _ in status_choices}
-    if status_filter != 'all' and status_filter not in valid_statuses:
-        status_filter = 'all'
-
-    orders = Order.objects.filter(store_type='liquor').select_related('user').prefetch_related('items')
-
-    if status_filter != 'all':
-        orders = orders.filter(status=status_filter)
-
-    # Recent orders first
-    orders = orders.order_by('-created_at')
+    try:
+        context = _order_list_page(request, Order.objects.filter(store_type='liquor'))
+    except pagination.InvalidCursor:
+        return redirect('liquor_orders')
 
-    context = {
-        'orders': orders[:50],  # Limit to recent 50
-        'status_filter': status_filter,
-        'status_choices': status_choices,
+    context.update({
+        'status_filter': context['filters'].get('status', 'all'),
+        'status_choices': Order.STATUS_CHOICES,
         'store_type': 'liquor',
-    }
+        'list_url': reverse('liquor_orders'),
+    })
 
     return render(request, 'custom_admin/liquor_orders.html', context)
 
@@ -690,38 +629,22 @@ def liquor_order_detail(request, order_number):
 def liquor_analytics(request):
     """Liquor analytics and reports"""
     days = int(request.GET.get('days', 7))
+    end_day = timezone.localdate()
+    start_day = end_day - timedelta(days=days)
     start_date = timezone.now() - timedelta(days=days)
 
-    # Delivered/completed liquor orders in the period
-    delivered_orders = Order.objects.filter(
-        created_at__gte=start_date,
-        status__in=['delivered', 'completed'],
-        items__food_item__store_type='liquor'
-    ).distinct()
-
-    # Daily revenue (items + delivery fees)
-    daily_revenue = delivered_orders.annotate(day=TruncDate('created_at')).values('day').annotate(
-        items_revenue=Sum('items__price_at_order'),
-        delivery_fee=Sum('delivery_fee'),
-        revenue=F('items_revenue') + F('delivery_fee'),
-        orders=Count('id')
-    ).order_by('day')
+    # Daily revenue of delivered/completed orders (items + delivery fees)
+    daily_revenue = analytics.revenue_trend(start_day, end_day, store_type='liquor', statuses=VALID_STATUSES)
 
     # Top selling liquor items
-    top_items = OrderItem.objects.filter(
-        order__created_at__gte=start_date,
-        food_item__store_type='liquor'
-    ).values(
-        'food_item__name',
-        'food_item__category__name',
-        'food_item__bottle_size'
-    ).annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum('price_at_order')
-    ).order_by('-total_quantity')[:10]
+    top_items = analytics.top_items(start_day, end_day, store_type='liquor')
 
     # Top liquor customers
-    top_customers = delivered_orders.values(
+    top_customers = Order.objects.filter(
+        store_type='liquor',
+        status__in=VALID_STATUSES,
+        created_at__gte=start_date,
+    ).values(
         'user__username',
         'user__phone_number'
     ).annotate(
@@ -730,49 +653,39 @@ def liquor_analytics(request):
     ).order_by('-total_orders')[:10]
 
     # Liquor order status distribution (all statuses)
-    status_distribution = Order.objects.filter(
-        created_at__gte=start_date,
-        items__food_item__store_type='liquor'
-    ).values('status').annotate(
-        count=Count('id')
-    ).order_by('status')
+    status_distribution = analytics.status_distribution(start_day, end_day, store_type='liquor')
 
     # Totals
-    total_revenue = sum(float(item['revenue'] or 0) for item in daily_revenue)
-    total_orders = sum(item['orders'] for item in daily_revenue)
+    totals = analytics.sales_totals(start_day, end_day, store_type='liquor', statuses=VALID_STATUSES)
+    total_revenue = float(totals['revenue'])
+    total_orders = totals['orders']
     avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
 
     # Peak hours (last X days, delivered/completed)
-    peak_hours = delivered_orders.annotate(hour=ExtractHour('created_at')).values('hour').annotate(
-        order_count=Count('id')
-    ).order_by('-order_count')[:10]
+    peak_hours = analytics.peak_hours(start_day, end_day, store_type='liquor', statuses=VALID_STATUSES)
 
     # Liquor metrics
-    liquor_orders = delivered_orders
     liquor_revenue = total_revenue
-    liquor_items_sold = OrderItem.objects.filter(
-        order__in=delivered_orders,
-        food_item__store_type='liquor'
-    ).aggregate(total=Sum('quantity'))['total'] or 0
+    liquor_items_sold = analytics.items_sold(start_day, end_day, store_type='liquor', statuses=VALID_STATUSES)
     top_liquor_items = top_items
     liquor_daily_revenue = daily_revenue
 
     context = {
-        'daily_revenue': json.dumps(list(daily_revenue), default=str),
-        'top_items': json.dumps(list(top_items), default=str),
+        'daily_revenue': json.dumps(daily_revenue, default=str),
+        'top_items': json.dumps(top_items, default=str),
         'top_customers': json.dumps(list(top_customers), default=str),
-        'status_distribution': json.dumps(list(status_distribution), default=str),
+        'status_distribution': json.dumps(status_distribution, default=str),
         'days': days,
         'total_revenue': total_revenue,
         'total_orders': total_orders,
         'avg_order_value': avg_order_value,
-        'peak_hours': json.dumps(list(peak_hours), default=str),
+        'peak_hours': json.dumps(peak_hours, default=str),
         # Liquor metrics
         'liquor_revenue': liquor_revenue,
-        'liquor_orders_count': liquor_orders.count(),
+        'liquor_orders_count': total_orders,
         'liquor_items_sold': liquor_items_sold,
-        'top_liquor_items': json.dumps(list(top_liquor_items), default=str),
-        'liquor_daily_revenue': json.dumps(list(liquor_daily_revenue), default=str),
+        'top_liquor_items': json.dumps(top_liquor_items, default=str),
+        'liquor_daily_revenue': json.dumps(liquor_daily_revenue, default=str),
         'store_type': 'liquor',
     }
 
@@ -832,6 +745,7 @@ def toggle_food_availability(request):
         food_item = get_object_or_404(FoodItem, id=food_item_id)
         food_item.is_available = not food_item.is_available
         food_item.save()
+        invalidate_catalog(food_item.store_type)
 
         return JsonResponse({
             'success': True,
@@ -852,6 +766,7 @@ def update_food_price(request):
         food_item = get_object_or_404(FoodItem, id=food_item_id)
         food_item.price = new_price
         food_item.save()
+        invalidate_catalog(food_item.store_type)
 
         return JsonResponse({
             'success': True,
@@ -881,6 +796,7 @@ def add_category(request):
             #stock_quantity=stock_quantity,
             store_type=store_type
         )
+        invalidate_catalog(store_type)
 
         return JsonResponse({
             'success': True,
@@ -909,6 +825,7 @@ def edit_category(request):
         category.order = order
         # Note: Stock is tracked on Products (FoodItem), not Categories
         category.save()
+        invalidate_catalog(category.store_type)
 
         return JsonResponse({
             'success': True,
@@ -940,6 +857,7 @@ def delete_category(request):
 
         category_name = category.name
         category.delete()
+        invalidate_catalog(category.store_type)
 
         return JsonResponse({
             'success': True,
@@ -1001,6 +919,7 @@ def add_food_item(request):
             store_type=store_type,
             stock=stock
         )
+        invalidate_catalog(store_type)
 
         return JsonResponse({
             'success': True,
@@ -1055,6 +974,7 @@ def edit_food_item(request):
             return JsonResponse({'success': False, 'message': 'Invalid stock value'})
 
     food_item.save()
+    invalidate_catalog(food_item.store_type)
 
     return JsonResponse({
         'success': True,
@@ -1079,6 +999,7 @@ def delete_food_item(request):
 
         item_name = food_item.name
         food_item.delete()
+        invalidate_catalog(food_item.store_type)
 
         return JsonResponse({
             'success': True,
@@ -1119,30 +1040,15 @@ def admin_analytics(request):
         start_date = timezone.now() - timedelta(days=days)
         end_date = timezone.now()
 
+    # Rollups are bucketed by local calendar day
+    start_day = timezone.localtime(start_date).date()
+    end_day = timezone.localtime(end_date).date()
+
     # Revenue over time
-    daily_revenue = Order.objects.filter(
-        created_at__gte=start_date,
-        created_at__lte=end_date,
-        status='delivered'
-    ).extra(
-        select={'day': 'DATE(created_at)'}
-    ).values('day').annotate(
-        revenue=Sum('total'),
-        orders=Count('id')
-    ).order_by('day')
+    daily_revenue = analytics.revenue_trend(start_day, end_day, statuses=['delivered'])
 
     # Top selling items (food and grocery only)
-    top_items = OrderItem.objects.filter(
-        order__created_at__gte=start_date,
-        order__created_at__lte=end_date,
-        food_item__store_type__in=['food', 'grocery']
-    ).values(
-        'food_item__name',
-        'food_item__category__name'
-    ).annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum('price_at_order')
-    ).order_by('-total_quantity')[:10]
+    top_items = analytics.top_items(start_day, end_day, store_type=['food', 'grocery'])
 
     # Top customers
     top_customers = Order.objects.filter(
@@ -1158,12 +1064,7 @@ def admin_analytics(request):
     ).order_by('-total_orders')[:10]
 
     # Order status distribution
-    status_distribution = Order.objects.filter(
-        created_at__gte=start_date,
-        created_at__lte=end_date
-    ).values('status').annotate(
-        count=Count('id')
-    )
+    status_distribution = analytics.status_distribution(start_day, end_day)
 
     # Calculate totals
     total_revenue = sum(item['revenue'] for item in daily_revenue)
@@ -1171,7 +1072,7 @@ def admin_analytics(request):
     avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
 
     # Peak hours
-    peak_hours = (Order.objects.filter(created_at__gte=start_date, created_at__lte=end_date).annotate(hour=ExtractHour('created_at')).values('hour').annotate(order_count=Count('id')).order_by('-order_count')[:10])
+    peak_hours = analytics.peak_hours(start_day, end_day)
 
     # M-PESA Payment Analytics
     mpesa_orders = Order.objects.filter(
@@ -1202,70 +1103,35 @@ def admin_analytics(request):
     ).order_by('-payment_count')[:10]
 
     # Liquor-specific metrics
-    liquor_orders = Order.objects.filter(
-        created_at__gte=start_date,
-        created_at__lte=end_date,
-        items__food_item__store_type='liquor'
-    ).distinct()
-
-    liquor_revenue = OrderItem.objects.filter(
-        order__created_at__gte=start_date,
-        order__created_at__lte=end_date,
-        food_item__store_type='liquor'
-    ).aggregate(total=Sum('price_at_order'))['total'] or 0
-
-    liquor_items_sold = OrderItem.objects.filter(
-        order__created_at__gte=start_date,
-        order__created_at__lte=end_date,
-        food_item__store_type='liquor'
-    ).aggregate(total=Sum('quantity'))['total'] or 0
+    liquor_totals = analytics.sales_totals(start_day, end_day, store_type='liquor')
+    liquor_revenue = liquor_totals['items_revenue']
+    liquor_items_sold = analytics.items_sold(start_day, end_day, store_type='liquor')
 
     # Top selling liquor items
-    top_liquor_items = OrderItem.objects.filter(
-        order__created_at__gte=start_date,
-        order__created_at__lte=end_date,
-        food_item__store_type='liquor'
-    ).values(
-        'food_item__name',
-        'food_item__category__name',
-        'food_item__bottle_size'
-    ).annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum('price_at_order')
-    ).order_by('-total_quantity')[:10]
-
-    # Liquor revenue trend
-    liquor_daily_revenue = (
-    OrderItem.objects.filter(
-        order__created_at__gte=start_date,
-        order__created_at__lte=end_date,
-        food_item__store_type='liquor'
-    )
-    .annotate(day=TruncDate('order__created_at'))
-    .values('day')
-    .annotate(
-        revenue=Sum('price_at_order'),
-        orders=Count('order', distinct=True)
-    )
-    .order_by('day')
-    )
+    top_liquor_items = analytics.top_items(start_day, end_day, store_type='liquor')
+
+    # Liquor revenue trend (items only)
+    liquor_daily_revenue = [
+        dict(row, revenue=row['items_revenue'])
+        for row in analytics.revenue_trend(start_day, end_day, store_type='liquor', statuses=None)
+    ]
 
     # Format dates for display
     from_date_display = start_date.strftime('%Y-%m-%d') if isinstance(start_date, datetime) else start_date
     to_date_display = end_date.strftime('%Y-%m-%d') if isinstance(end_date, datetime) else end_date
 
     context = {
-        'daily_revenue': json.dumps(list(daily_revenue), default=str),
-        'top_items': json.dumps(list(top_items), default=str),
+        'daily_revenue': json.dumps(daily_revenue, default=str),
+        'top_items': json.dumps(top_items, default=str),
         'top_customers': json.dumps(list(top_customers), default=str),
-        'status_distribution': json.dumps(list(status_distribution), default=str),
+        'status_distribution': json.dumps(status_distribution, default=str),
         'days': days,
         'from_date': from_date_display,
         'to_date': to_date_display,
         'total_revenue': total_revenue,
         'total_orders': total_orders,
         'avg_order_value': avg_order_value,
-        'peak_hours': json.dumps(list(peak_hours), default=str),
+        'peak_hours': json.dumps(peak_hours, default=str),
         # M-PESA Payment metrics
         'mpesa_revenue': mpesa_revenue,
         'mpesa_success_rate': mpesa_success_rate,
@@ -1275,46 +1141,61 @@ def admin_analytics(request):
         'peak_payment_hours': json.dumps(list(peak_payment_hours), default=str),
         # Liquor metrics
         'liquor_revenue': liquor_revenue,
-        'liquor_orders_count': liquor_orders.count(),
+        'liquor_orders_count': liquor_totals['orders'],
         'liquor_items_sold': liquor_items_sold,
-        'top_liquor_items': json.dumps(list(top_liquor_items), default=str),
-        'liquor_daily_revenue': json.dumps(list(liquor_daily_revenue), default=str),
+        'top_liquor_items': json.dumps(top_liquor_items, default=str),
+        'liquor_daily_revenue': json.dumps(liquor_daily_revenue, default=str),
     }
 
     return render(request, 'custom_admin/analytics.html', context)
 
 # ==================== CUSTOMER MANAGEMENT ====================
 
+CUSTOMERS_PER_PAGE = 50
+
 @staff_member_required(login_url='admin_login')
 def admin_customers(request):
     """Customer management"""
-    customers = User.objects.filter(is_staff=False).annotate(
-        total_orders=Count('orders'),
-        total_spent=Sum('orders__total')
-    ).order_by('-total_orders')
-
-    total_customers = customers.count()
-    avg_orders_per_customer = customers.aggregate(avg_orders=Avg('total_orders'))['avg_orders'] or 0
+    search = request.GET.get('q', '').strip()
+    paginator = Paginator(customers.customer_list(search), CUSTOMERS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    all_customers = User.objects.filter(is_staff=False)
+    total_customers = all_customers.count()
+    summary = CustomerSummary.objects.filter(user__is_staff=False).aggregate(
+        active=Count('pk', filter=Q(order_count__gt=0)),
+        orders=Sum('order_count'),
+    )
 
     context = {
-        'customers': customers,
+        'customers': page_obj,
+        'page_obj': page_obj,
+        'search': search,
         'total_customers': total_customers,
-        'active_customers': customers.filter(total_orders__gt=0).count(),
-        'new_customers': customers.filter(date_joined__gte=timezone.now()-timedelta(days=30)).count(),
-        'avg_orders_per_customer': avg_orders_per_customer,
+        'active_customers': summary['active'],
+        'new_customers': all_customers.filter(date_joined__gte=timezone.now()-timedelta(days=30)).count(),
+        'avg_orders_per_customer': (summary['orders'] or 0) / total_customers if total_customers else 0,
     }
 
     return render(request, 'custom_admin/customers.html', context)
 
+CUSTOMER_DETAIL_ORDERS = 20
+
 @staff_member_required(login_url='admin_login')
 def admin_customer_detail(request, customer_id):
-    customer = get_object_or_404(User, id=customer_id)
-    # Fetch orders for the customer
-    orders = Order.objects.filter(user=customer).order_by('-created_at')
+    customer = get_object_or_404(User.objects.select_related('order_summary'), id=customer_id)
+    summary = getattr(customer, 'order_summary', None) or CustomerSummary(user=customer)
+    # Most recent orders only; the lifetime figures come from the summary
+    orders = orders_with_items(
+        Order.objects.filter(user=customer), fields=ORDER_LIST_FIELDS
+    ).order_by('-created_at')[:CUSTOMER_DETAIL_ORDERS]
 
     context = {
         'customer': customer,
+        'summary': summary,
+        'avg_order_value': summary.total_spent / summary.order_count if summary.order_count else 0,
         'orders': orders,
+        'orders_shown': CUSTOMER_DETAIL_ORDERS,
     }
     return render(request, 'custom_admin/customer_detail.html', context)
 
@@ -1322,29 +1203,13 @@ def admin_customer_detail(request, customer_id):
 def get_customer_orders(request, customer_id):
     """API endpoint to get customer orders"""
     customer = get_object_or_404(User, id=customer_id)
-    orders = Order.objects.filter(user=customer).order_by('-created_at')[:10]  # Limit to recent 10
-
-    orders_data = []
-    for order in orders:
-        orders_data.append({
-            'order_number': order.order_number,
-            'created_at': order.created_at.isoformat(),
-            'total': float(order.total),
-            'status': order.status,
-            'status_display': order.get_status_display(),
-            'items': [
-                {
-                    'quantity': item.quantity,
-                    'food_item': {
-                        'name': item.food_item.name
-                    }
-                } for item in order.items.all()
-            ]
-        })
+    orders = orders_with_items(
+        Order.objects.filter(user=customer), fields=ORDER_LIST_FIELDS
+    ).order_by('-created_at')[:10]  # Limit to recent 10
 
     return JsonResponse({
         'success': True,
-        'orders': orders_data
+        'orders': [serialize_order(order) for order in orders]
     })
 
 @staff_member_required(login_url='admin_login')
@@ -1484,75 +1349,104 @@ def update_admin_password(request):
 
 @staff_member_required(login_url='admin_login')
 def delivery_guys_list(request):
-    """List all delivery guys"""
-    # Don't use annotate since total_deliveries and delivered_orders are @property methods
-    delivery_guys = DeliveryGuy.objects.all().order_by('name')
-    
-    # Prepare delivery guy data with this week's deliveries
-    delivery_guys_data = []
-    for guy in delivery_guys:
-        this_week_deliveries = guy.get_this_week_deliveries()
-        this_week_revenue = guy.get_this_week_revenue()
-        week_start = guy.get_current_week_start()
-        week_end = guy.get_current_week_end()
-        
-        # Check if already paid this week
-        is_paid = DeliveryGuyWeeklyPayment.objects.filter(
-            delivery_guy=guy,
-            week_start=week_start,
-            week_end=week_end,
-            is_paid=True
-        ).exists()
-        
-        delivery_guys_data.append({
-            'guy': guy,
-            'this_week_deliveries': this_week_deliveries,
-            'this_week_revenue': this_week_revenue,
-            'week_start': week_start,
-            'week_end': week_end,
-            'is_paid_this_week': is_paid,
-        })
-    
+    """List all delivery guys with their payroll for the selected week (default: this week)"""
+    week_start, week_end = payroll.parse_week(request.GET.get('week'))
+
     context = {
-        'delivery_guys': delivery_guys_data,
+        'delivery_guys': payroll.weekly_payroll(week_start),
+        'week_start': week_start,
+        'week_end': week_end,
+        'previous_week': week_start - timedelta(days=7),
+        'next_week': week_start + timedelta(days=7),
+        'is_current_week': week_start == payroll.week_bounds()[0],
     }
     
     return render(request, 'custom_admin/delivery_guys_list.html', context)
 
+@staff_member_required(login_url='admin_login')
+def export_delivery_payroll(request):
+    """Download the selected week's rider payroll as CSV"""
+    week_start, week_end = payroll.parse_week(request.GET.get('week'))
+
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="rider-payroll-{week_start}.csv"'
+    payroll.write_payroll_csv(payroll.weekly_payroll(week_start), response)
+    return response
+
+def _rider_deliveries(delivery_guy):
+    """Delivered orders of a rider, trimmed to the columns the history table shows"""
+    return Order.objects.filter(
+        delivery_guy=delivery_guy,
+        status='delivered'
+    ).select_related('user').only(
+        'id', 'order_number', 'total', 'delivered_at', 'user__username', 'user__email'
+    )
+
+def _delivery_row(order):
+    return {
+        'id': order.id,
+        'order_number': order.order_number,
+        'admin_url': reverse('admin:urbanfoods_order_change', args=[order.id]),
+        'username': order.user.username,
+        'email': order.user.email,
+        'total': float(order.total),
+        'delivered_at': timezone.localtime(order.delivered_at).strftime('%b %d, %Y %H:%M'),
+    }
+
 @staff_member_required(login_url='admin_login')
 def delivery_guy_dashboard(request, delivery_guy_id):
     """Dashboard for a specific delivery guy"""
     delivery_guy = get_object_or_404(DeliveryGuy, id=delivery_guy_id)
     
-    # Get all delivered orders for this delivery guy
-    delivered_orders = Order.objects.filter(
-        delivery_guy=delivery_guy,
-        status='delivered'
-    ).order_by('-delivered_at').select_related('user')
+    # First page of delivered orders; the rest is loaded on scroll
+    delivered_orders, next_cursor = pagination.keyset_page(_rider_deliveries(delivery_guy), 'delivered_at')
     
-    # Statistics
-    total_deliveries = delivered_orders.count()
-    total_revenue = delivered_orders.aggregate(total=Sum('total'))['total'] or 0
+    # Statistics (from the weekly payment snapshots)
+    totals = delivery_guy.weekly_payments.aggregate(
+        deliveries=Sum('deliveries_count'),
+        revenue=Sum('total_revenue'),
+    )
+    total_deliveries = totals['deliveries'] or 0
+    total_revenue = totals['revenue'] or 0
     
     # Orders per day (last 7 days)
-    seven_days_ago = timezone.now() - timedelta(days=7)
-    recent_deliveries = delivered_orders.filter(
-        delivered_at__gte=seven_days_ago
-    ).annotate(day=TruncDate('delivered_at')).values('day').annotate(
-        count=Count('id'),
-        revenue=Sum('total')
-    ).order_by('day')
+    seven_days_ago = timezone.localdate() - timedelta(days=7)
+    recent_deliveries = delivery_guy.daily_stats.filter(
+        date__gte=seven_days_ago
+    ).values(day=F('date'), count=F('deliveries_count'), revenue=F('total_revenue')).order_by('day')
     
     context = {
         'delivery_guy': delivery_guy,
         'total_deliveries': total_deliveries,
         'total_revenue': total_revenue,
         'delivered_orders': delivered_orders,
+        'next_cursor': next_cursor,
         'recent_deliveries': list(recent_deliveries),
     }
     
     return render(request, 'custom_admin/delivery_guy_dashboard.html', context)
 
+@staff_member_required(login_url='admin_login')
+@require_GET
+def delivery_guy_deliveries_api(request, delivery_guy_id):
+    """Next page of a delivery guy's delivered orders (infinite scroll)"""
+    delivery_guy = get_object_or_404(DeliveryGuy, id=delivery_guy_id)
+    try:
+        orders, next_cursor = pagination.keyset_page(
+            _rider_deliveries(delivery_guy),
+            'delivered_at',
+            cursor=request.GET.get('cursor'),
+            limit=pagination.page_size(request.GET.get('limit')),
+        )
+    except pagination.InvalidCursor as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'orders': [_delivery_row(order) for order in orders],
+        'next_cursor': next_cursor,
+    })
+
 @staff_member_required(login_url='admin_login')
 @require_http_methods(["POST"])
 @staff_member_required(login_url='admin_login')
@@ -1694,33 +1588,22 @@ def mark_delivery_guy_paid_weekly(request, delivery_guy_id):
 @staff_member_required(login_url='admin_login')
 @require_http_methods(["GET"])
 def get_delivery_guy_week_deliveries(request, delivery_guy_id):
-    """Get current week's delivery count for a delivery guy"""
+    """Get a week's delivery count for a delivery guy (default: current week)"""
     try:
-        delivery_guy = get_object_or_404(DeliveryGuy, id=delivery_guy_id)
-        
-        week_deliveries = delivery_guy.get_this_week_deliveries()
-        week_revenue = delivery_guy.get_this_week_revenue()
-        week_start = delivery_guy.get_current_week_start()
-        week_end = delivery_guy.get_current_week_end()
-        
-        # Check if already paid this week
-        weekly_payment = DeliveryGuyWeeklyPayment.objects.filter(
-            delivery_guy=delivery_guy,
-            week_start=week_start,
-            week_end=week_end,
-            is_paid=True
-        ).first()
-        
-        is_paid = weekly_payment is not None
+        week_start, _ = payroll.parse_week(request.GET.get('week'))
+        rows = payroll.weekly_payroll(week_start, delivery_guy_ids=[delivery_guy_id])
+        if not rows:
+            return JsonResponse({'success': False, 'message': 'Delivery guy not found'}, status=404)
+        row = rows[0]
         
         return JsonResponse({
             'success': True,
             'delivery_guy_id': delivery_guy_id,
-            'week_deliveries': week_deliveries,
-            'week_revenue': float(week_revenue),
-            'week_start': str(week_start),
-            'week_end': str(week_end),
-            'is_paid': is_paid,
+            'week_deliveries': row['week_deliveries'],
+            'week_revenue': float(row['week_revenue']),
+            'week_start': str(row['week_start']),
+            'week_end': str(row['week_end']),
+            'is_paid': row['is_paid'],
         })
     except Exception as e:
         return JsonResponse({
@@ -1745,6 +1628,8 @@ def site_settings_view(request):
             if delivery_fee is not None:
                 settings.delivery_fee = delivery_fee
                 settings.save()
+                # The fee is rendered into the cached storefront pages
+                purge_pages()
                 
                 return JsonResponse({
                     'success': True,
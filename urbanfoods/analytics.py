@@ -0,0 +1,398 @@
+# urbanfoods/analytics.py
+"""
+Sales rollups for the admin dashboards.
+
+Orders are folded into two fact tables as they move between statuses:
+
+* ``DailySalesRollup``  - one row per day x store x item x status
+* ``HourlySalesRollup`` - one row per day x hour x store x status
+
+Dashboards read these instead of re-aggregating ``Order``/``OrderItem``
+on every page load. Status changes are only appended to ``SalesEvent`` inside
+the request; the ``flush_sales_rollups`` worker folds them into the rollups in
+batches, so concurrent checkouts never contend for the same rollup rows.
+``rebuild_sales_rollups`` recomputes them from the raw tables (see the
+``backfill_sales_rollups`` management command).
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from .models import DailySalesRollup, HourlySalesRollup, Order, OrderItem, SalesEvent
+
+logger = logging.getLogger(__name__)
+
+REVENUE_STATUSES = ['delivered', 'completed']
+OPEN_STATUSES = ['pending', 'preparing', 'out_for_delivery']
+
+
+def line_total():
+    """``price_at_order * quantity`` for an ``OrderItem`` row."""
+    return ExpressionWrapper(F('price_at_order') * F('quantity'), output_field=DecimalField())
+
+
+# ─────────────────────────────────────────────────────────────
+#  WRITE PATH
+# ─────────────────────────────────────────────────────────────
+HOURLY_KEY = ('date', 'hour', 'store_type', 'status')
+DAILY_KEY = ('date', 'store_type', 'food_item_id', 'status')
+FOLD_BATCH = 500
+
+
+def _bump(model, key, deltas):
+    """Add ``deltas`` to the rollup row identified by ``key``, creating it if needed."""
+    increments = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**key).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Another request created the row between our update and insert
+        model.objects.filter(**key).update(**increments)
+
+
+def _apply(model, key_fields, deltas):
+    """
+    Add ``deltas`` (``{key tuple: {field: delta}}``) to the rollup rows: one
+    locking read, one bulk update and one bulk insert, whatever the batch size.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if any(delta.values())}
+    if not deltas:
+        return
+    candidates = model.objects.select_for_update().filter(**{
+        f'{field}__in': {key[n] for key in deltas} for n, field in enumerate(key_fields)
+    })
+    existing = {tuple(getattr(row, field) for field in key_fields): row for row in candidates}
+
+    changed, created = [], []
+    for key, delta in deltas.items():
+        row = existing.get(key)
+        if row is None:
+            created.append((key, delta))
+            continue
+        for field, value in delta.items():
+            setattr(row, field, getattr(row, field) + value)
+        changed.append(row)
+
+    fields = list(next(iter(deltas.values())))
+    model.objects.bulk_update(changed, fields, batch_size=500)
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(
+                [model(**dict(zip(key_fields, key)), **delta) for key, delta in created],
+                batch_size=500,
+            )
+    except IntegrityError:
+        # A concurrent flush created some of these rows first
+        for key, delta in created:
+            _bump(model, dict(zip(key_fields, key)), delta)
+
+
+def record_sales_transition(order, old_status, new_status):
+    """
+    Queue an order's move from ``old_status`` to ``new_status`` for the rollups.
+
+    Pass ``old_status=None`` when the order (and its items) has just been
+    created. This only appends a ``SalesEvent`` row, so checkouts never wait
+    on the shared rollup rows; ``fold_sales_events`` applies it. Failures are
+    logged rather than raised so a rollup hiccup never blocks checkout; the
+    backfill command repairs any drift.
+    """
+    if old_status == new_status:
+        return
+    try:
+        with transaction.atomic():
+            SalesEvent.objects.create(order=order, old_status=old_status or '', new_status=new_status or '')
+    except Exception:
+        logger.exception("Failed to queue sales rollup update for order %s", order.order_number)
+
+
+def fold_sales_events():
+    """Apply queued ``SalesEvent`` rows to the rollups. Returns the number of events folded."""
+    folded = 0
+    while True:
+        with transaction.atomic():
+            # Concurrent flushers take disjoint batches
+            events = list(
+                SalesEvent.objects.select_for_update(skip_locked=True)
+                .order_by('id')
+                .values_list('id', 'order_id', 'old_status', 'new_status')[:FOLD_BATCH]
+            )
+            if not events:
+                return folded
+
+            # Net count each order moves into (+) or out of (-) each status
+            moves = defaultdict(lambda: defaultdict(int))
+            for _, order_id, old_status, new_status in events:
+                if old_status:
+                    moves[order_id][old_status] -= 1
+                if new_status:
+                    moves[order_id][new_status] += 1
+
+            orders = Order.objects.only(
+                'created_at', 'store_type', 'subtotal', 'delivery_fee', 'total'
+            ).in_bulk(list(moves))
+            days = {}
+            hourly = defaultdict(lambda: defaultdict(int))
+            for order_id, order in orders.items():
+                created = timezone.localtime(order.created_at)
+                days[order_id] = created.date()
+                for status, sign in moves[order_id].items():
+                    delta = hourly[(created.date(), created.hour, order.store_type, status)]
+                    delta['order_count'] += sign
+                    delta['items_revenue'] += sign * order.subtotal
+                    delta['delivery_fees'] += sign * order.delivery_fee
+                    delta['total_revenue'] += sign * order.total
+
+            daily = defaultdict(lambda: defaultdict(int))
+            lines = (
+                OrderItem.objects.filter(order_id__in=list(orders))
+                .values('order_id', 'food_item_id', 'store_type')
+                .annotate(units=Sum('quantity'), line_revenue=Sum(line_total()))
+                .order_by()
+            )
+            for line in lines:
+                order_id = line['order_id']
+                for status, sign in moves[order_id].items():
+                    delta = daily[(days[order_id], line['store_type'], line['food_item_id'], status)]
+                    delta['quantity'] += sign * line['units']
+                    delta['revenue'] += sign * line['line_revenue']
+                    delta['order_count'] += sign
+
+            _apply(HourlySalesRollup, HOURLY_KEY, hourly)
+            _apply(DailySalesRollup, DAILY_KEY, daily)
+            SalesEvent.objects.filter(id__in=[event[0] for event in events]).delete()
+        folded += len(events)
+
+
+def rebuild_sales_rollups(start_date=None, end_date=None):
+    """
+    Recompute the rollups from raw orders, optionally limited to a date range
+    (inclusive, local dates). Returns ``(hourly_rows, daily_rows)``.
+    """
+    orders = Order.objects.all()
+    hourly = HourlySalesRollup.objects.all()
+    daily = DailySalesRollup.objects.all()
+    items = OrderItem.objects.all()
+
+    if start_date:
+        orders = orders.filter(created_at__date__gte=start_date)
+        items = items.filter(order__created_at__date__gte=start_date)
+        hourly = hourly.filter(date__gte=start_date)
+        daily = daily.filter(date__gte=start_date)
+    if end_date:
+        orders = orders.filter(created_at__date__lte=end_date)
+        items = items.filter(order__created_at__date__lte=end_date)
+        hourly = hourly.filter(date__lte=end_date)
+        daily = daily.filter(date__lte=end_date)
+
+    with transaction.atomic():
+        # Queued events are already reflected in the raw orders
+        SalesEvent.objects.filter(order__in=orders).delete()
+
+        hourly_rows = [
+            HourlySalesRollup(
+                date=row['day'],
+                hour=row['hour'],
+                store_type=row['store_type'],
+                status=row['status'],
+                order_count=row['order_count'],
+                items_revenue=row['items_revenue'] or 0,
+                delivery_fees=row['delivery_fees'] or 0,
+                total_revenue=row['total_revenue'] or 0,
+            )
+            for row in orders.annotate(
+                day=TruncDate('created_at'), hour=ExtractHour('created_at')
+            ).values('day', 'hour', 'store_type', 'status').annotate(
+                order_count=Count('id'),
+                items_revenue=Sum('subtotal'),
+                delivery_fees=Sum('delivery_fee'),
+                total_revenue=Sum('total'),
+            ).order_by()
+        ]
+
+        daily_rows = [
+            DailySalesRollup(
+                date=row['day'],
+                store_type=row['store_type'],
+                food_item_id=row['food_item_id'],
+                status=row['order__status'],
+                quantity=row['units'] or 0,
+                revenue=row['line_revenue'] or 0,
+                order_count=row['order_count'],
+            )
+            for row in items.annotate(
+                day=TruncDate('order__created_at')
+            ).values('day', 'store_type', 'food_item_id', 'order__status').annotate(
+                units=Sum('quantity'),
+                line_revenue=Sum(line_total()),
+                order_count=Count('order', distinct=True),
+            ).order_by()
+        ]
+
+        hourly.delete()
+        daily.delete()
+        HourlySalesRollup.objects.bulk_create(hourly_rows, batch_size=1000)
+        DailySalesRollup.objects.bulk_create(daily_rows, batch_size=1000)
+
+    return len(hourly_rows), len(daily_rows)
+
+
+# ─────────────────────────────────────────────────────────────
+#  READ PATH
+# ─────────────────────────────────────────────────────────────
+def _scope(model, start_date, end_date, store_type=None, statuses=None):
+    """Rollup rows for an inclusive date range, a store (or list of stores) and statuses."""
+    qs = model.objects.filter(date__gte=start_date, date__lte=end_date)
+    if isinstance(store_type, str):
+        qs = qs.filter(store_type=store_type)
+    elif store_type:
+        qs = qs.filter(store_type__in=store_type)
+    if statuses:
+        qs = qs.filter(status__in=statuses)
+    return qs
+
+
+def daily_sales(start_date, end_date, store_type=None, statuses=None):
+    """Orders and takings per day: ``day, orders, items_revenue, delivery_fee, revenue``."""
+    return list(
+        _scope(HourlySalesRollup, start_date, end_date, store_type, statuses)
+        .values(day=F('date'))
+        .annotate(
+            orders=Sum('order_count'),
+            items_revenue=Sum('items_revenue'),
+            delivery_fee=Sum('delivery_fees'),
+            revenue=Sum('total_revenue'),
+        )
+        .order_by('day')
+    )
+
+
+def revenue_trend(start_date, end_date, store_type=None, statuses=REVENUE_STATUSES):
+    """
+    Chart-ready daily series from one grouped rollup query:
+    ``[{'day': 'YYYY-MM-DD', 'items_revenue', 'delivery_fee', 'revenue', 'orders'}, ...]``.
+    Shared by every dashboard that plots revenue over time.
+    """
+    return [
+        {
+            'day': row['day'].isoformat(),
+            'items_revenue': float(row['items_revenue'] or 0),
+            'delivery_fee': float(row['delivery_fee'] or 0),
+            'revenue': float(row['revenue'] or 0),
+            'orders': row['orders'] or 0,
+        }
+        for row in daily_sales(start_date, end_date, store_type, statuses)
+    ]
+
+
+def sales_totals(start_date, end_date, store_type=None, statuses=None):
+    """Order count and takings over the whole range."""
+    totals = _scope(HourlySalesRollup, start_date, end_date, store_type, statuses).aggregate(
+        orders=Sum('order_count'),
+        items_revenue=Sum('items_revenue'),
+        delivery_fee=Sum('delivery_fees'),
+        revenue=Sum('total_revenue'),
+    )
+    return {key: value or 0 for key, value in totals.items()}
+
+
+def top_items(start_date, end_date, store_type=None, statuses=None, limit=10):
+    """Best sellers by quantity, shaped like the old ``OrderItem.values(...)`` rows."""
+    return list(
+        _scope(DailySalesRollup, start_date, end_date, store_type, statuses)
+        .values('food_item__name', 'food_item__category__name', 'food_item__bottle_size')
+        .annotate(total_quantity=Sum('quantity'), total_revenue=Sum('revenue'))
+        .order_by('-total_quantity')[:limit]
+    )
+
+
+def items_sold(start_date, end_date, store_type=None, statuses=None):
+    """Total units sold over the range."""
+    return _scope(DailySalesRollup, start_date, end_date, store_type, statuses).aggregate(
+        total=Sum('quantity')
+    )['total'] or 0
+
+
+def status_distribution(start_date, end_date, store_type=None):
+    """Order count per status over the range."""
+    return list(
+        _scope(HourlySalesRollup, start_date, end_date, store_type)
+        .values('status')
+        .annotate(count=Sum('order_count'))
+        .filter(count__gt=0)
+        .order_by('status')
+    )
+
+
+def peak_hours(start_date, end_date, store_type=None, statuses=None, limit=10):
+    """Busiest hours of the day by order count."""
+    return list(
+        _scope(HourlySalesRollup, start_date, end_date, store_type, statuses)
+        .values('hour')
+        .annotate(order_count=Sum('order_count'))
+        .filter(order_count__gt=0)
+        .order_by('-order_count')[:limit]
+    )
+
+
+# ─────────────────────────────────────────────────────────────
+#  LIVE COUNTERS
+# ─────────────────────────────────────────────────────────────
+DASHBOARD_STATS_TTL = 5  # seconds
+
+
+def _local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _dashboard_orders(store_type, week_start):
+    """A store's orders from this week plus any still open."""
+    return Order.objects.filter(store_type=store_type).filter(
+        Q(created_at__gte=week_start) | Q(status__in=OPEN_STATUSES)
+    )
+
+
+def _compute_dashboard_stats(store_type):
+    today = timezone.localdate()
+    today_start = _local_midnight(today)
+    week_start = _local_midnight(today - timedelta(days=today.weekday()))
+
+    today_q = Q(created_at__gte=today_start)
+    week_q = Q(created_at__gte=week_start)
+    paid_q = Q(status__in=REVENUE_STATUSES)
+
+    stats = _dashboard_orders(store_type, week_start).aggregate(
+        today_orders=Count('id', filter=today_q),
+        today_delivered_orders=Count('id', filter=today_q & paid_q),
+        today_items_revenue=Sum('subtotal', filter=today_q & paid_q),
+        today_revenue=Sum('total', filter=today_q & paid_q),
+        pending_orders=Count('id', filter=Q(status='pending')),
+        preparing_orders=Count('id', filter=Q(status='preparing')),
+        out_for_delivery=Count('id', filter=Q(status='out_for_delivery')),
+        weekly_orders=Count('id', filter=week_q),
+        weekly_delivered_orders=Count('id', filter=week_q & paid_q),
+        weekly_items_revenue=Sum('subtotal', filter=week_q & paid_q),
+        weekly_revenue=Sum('total', filter=week_q & paid_q),
+    )
+    return {key: value or 0 for key, value in stats.items()}
+
+
+def dashboard_stats(store_type='liquor'):
+    """
+    Today's and this week's counters for one store, computed in a single
+    conditional-aggregation query and memoized for a few seconds so several
+    dashboard widgets refreshing together share one result.
+    """
+    return cache.get_or_set(
+        f'dashboard_stats:{store_type}',
+        lambda: _compute_dashboard_stats(store_type),
+        DASHBOARD_STATS_TTL,
+    )
@@ -0,0 +1,76 @@
+# urbanfoods/catalog.py
+"""
+Compact per-store catalog for the PWA.
+
+``catalog_for(store_type)`` returns the serialized menu (categories, items,
+prices, availability, rating aggregates) plus a ``version`` that is a hash of
+that content, so it doubles as the ETag. The built payload is cached briefly
+per store: stock and rating changes are written with ``update()`` and do not
+bump ``updated_at``, so content hashing (not timestamps) decides freshness and
+no Last-Modified is sent.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import FoodCategory, FoodItem
+
+STORE_TYPES = [choice for choice, _ in FoodItem.STORE_CHOICES]
+DEFAULT_STORE_TYPE = 'liquor'
+CATALOG_CACHE_SECONDS = 30
+CATALOG_CACHE_KEY = 'catalog:{store_type}'
+
+
+def _item(item):
+    return {
+        'id': item.id,
+        'name': item.name,
+        'description': item.description,
+        'category_id': item.category_id,
+        'price': float(item.price),
+        'bottle_size': item.bottle_size,
+        # Exact stock changes with every order; only "can I order it" is shipped.
+        # Only liquor stock is tracked (see checkout.validate).
+        'available': item.is_available and (item.store_type != 'liquor' or item.stock > 0),
+        'featured': item.is_featured,
+        'meal_of_day': item.is_meal_of_day,
+        'rating': round(float(item.rating_average), 1) if item.rating_count else 0,
+        'reviews': item.rating_count,
+        'image': item.image_variant_url('card') if item.image else '',
+    }
+
+
+def build_catalog(store_type):
+    """Serialize a store's catalog. Returns ``{'version', 'body'}``."""
+    categories = FoodCategory.objects.filter(store_type=store_type).values('id', 'name', 'icon')
+    items = FoodItem.objects.filter(store_type=store_type, is_available=True).only(
+        'id', 'name', 'description', 'category_id', 'price', 'bottle_size', 'is_available', 'stock', 'store_type',
+        'is_featured', 'is_meal_of_day', 'rating_average', 'rating_count', 'image', 'image_variants',
+    )
+    content = {
+        'store_type': store_type,
+        'categories': list(categories),
+        'items': [_item(item) for item in items],
+    }
+    version = hashlib.sha256(
+        json.dumps(content, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    ).hexdigest()[:16]
+
+    body = json.dumps({'success': True, 'version': version, **content}, cls=DjangoJSONEncoder)
+    return {'version': version, 'body': body}
+
+
+def catalog_for(store_type):
+    """The cached catalog for a store, rebuilt at most every ``CATALOG_CACHE_SECONDS``."""
+    key = CATALOG_CACHE_KEY.format(store_type=store_type)
+    catalog = cache.get(key)
+    if catalog is None:
+        catalog = build_catalog(store_type)
+        cache.set(key, catalog, CATALOG_CACHE_SECONDS)
+    return catalog
+
+
+def invalidate_catalog(*store_types):
+    cache.delete_many([CATALOG_CACHE_KEY.format(store_type=s) for s in store_types or STORE_TYPES])
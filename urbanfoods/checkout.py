@@ -0,0 +1,124 @@
+# urbanfoods/checkout.py
+"""
+Checkout from a single locked snapshot of the cart.
+
+``lock_cart`` reads the user's cart lines, with each food item's current
+price, store, stock and availability, in one ``SELECT ... FOR UPDATE`` on the
+cart lines. A double submit or a concurrent cart edit waits for the checkout
+instead of interleaving with it. Validation, totals, the order and its items,
+popularity events, loyalty points and clearing the cart are all driven from
+that snapshot. Prices therefore cannot move between reads, and the number of
+queries does not grow with the number of lines (``CheckoutQueryCountTests``
+asserts it). Everything here must run inside ``transaction.atomic()``.
+"""
+from decimal import Decimal
+
+from django.db.models import F, Sum
+
+from .models import CartItem, Order, OrderItem, SiteSettings
+from .popularity import record_sales
+
+SNAPSHOT_FIELDS = (
+    'id', 'cart_id', 'food_item_id', 'quantity',
+    'food_item__id', 'food_item__name', 'food_item__price', 'food_item__store_type',
+    'food_item__is_available', 'food_item__stock',
+)
+
+
+def get_delivery_fee_for_store(store_type):
+    """Delivery fee applies only to liquor orders."""
+    if store_type == 'liquor':
+        return SiteSettings.get_delivery_fee()
+    return Decimal('0.00')
+
+
+class CheckoutError(Exception):
+    """The cart cannot be checked out; the message is shown to the customer."""
+
+
+def lock_cart(user):
+    """The user's cart lines with their food items, locked until the transaction ends."""
+    return list(
+        CartItem.objects.select_for_update(of=('self',))
+        .filter(cart__user=user)
+        .select_related('food_item')
+        .only(*SNAPSHOT_FIELDS)
+        .order_by('added_at', 'id')
+    )
+
+
+def validate(lines):
+    """Raise ``CheckoutError`` unless every line can be ordered as it stands."""
+    if not lines:
+        raise CheckoutError('Cart is empty')
+    for line in lines:
+        food_item = line.food_item
+        if not food_item.is_available:
+            raise CheckoutError(f'{food_item.name} is no longer available')
+        # Only liquor stock is tracked (see update_order_status)
+        if food_item.store_type == 'liquor' and line.quantity > food_item.stock:
+            raise CheckoutError(f'Only {food_item.stock} of {food_item.name} left in stock')
+
+
+def totals(lines):
+    """``(store_type, subtotal, delivery_fee, total)``; the first line decides the store."""
+    store_type = lines[0].food_item.store_type
+    subtotal = sum((line.food_item.price * line.quantity for line in lines), Decimal('0.00'))
+    delivery_fee = get_delivery_fee_for_store(store_type)
+    return store_type, subtotal, delivery_fee, subtotal + delivery_fee
+
+
+def create_order(user, lines, **fields):
+    """Create the order and its items at the snapshot's prices (two queries)."""
+    order = Order.objects.create(user=user, **fields)
+    OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order,
+            food_item_id=line.food_item_id,
+            quantity=line.quantity,
+            price_at_order=line.food_item.price,
+            store_type=line.food_item.store_type,
+        )
+        for line in lines
+    ])
+    return order
+
+
+def _award_points(order):
+    order.user.loyalty_points = F('loyalty_points') + int(order.total)
+    order.user.save(update_fields=['loyalty_points'])
+
+
+def complete_checkout(order, lines):
+    """Count the sales, clear the checked-out lines and award loyalty points."""
+    # Appended, not applied: no lock on the product rows (see popularity.py)
+    record_sales((line.food_item_id, line.quantity) for line in lines)
+
+    # Only the snapshotted lines (keep the Cart row for future orders)
+    CartItem.objects.filter(id__in=[line.id for line in lines]).delete()
+
+    _award_points(order)
+
+
+def complete_payment(order):
+    """
+    ``complete_checkout`` for an order paid after checkout (M-Pesa), where the
+    order's items are the snapshot. Only what was ordered leaves the cart:
+    lines added or topped up while the payment was pending are kept.
+    """
+    ordered = dict(
+        order.items.values('food_item_id').annotate(units=Sum('quantity')).values_list('food_item_id', 'units')
+    )
+    record_sales(ordered.items())
+
+    lines = CartItem.objects.select_for_update(of=('self',)).filter(
+        cart__user_id=order.user_id, food_item_id__in=list(ordered)
+    ).only('id', 'food_item_id', 'quantity')
+    spent, kept = [], []
+    for line in lines:
+        line.quantity -= ordered[line.food_item_id]
+        (kept if line.quantity > 0 else spent).append(line)
+    CartItem.objects.filter(id__in=[line.id for line in spent]).delete()
+    CartItem.objects.bulk_update(kept, ['quantity'])
+
+    _award_points(order)
@@ -1,6 +1,13 @@
+from .catalog import DEFAULT_STORE_TYPE, STORE_TYPES
+
+
 def store_type(request):
     """Context processor to make store_type available to all templates"""
+    # Storefront URLs carry the store; elsewhere the session remembers the last one
+    match = getattr(request, 'resolver_match', None)
+    current = match.kwargs.get('store_type') if match else None
+    if current not in STORE_TYPES:
+        current = request.session.get('store_type', DEFAULT_STORE_TYPE)
     return {
-        'store_type': request.session.get('store_type', 'food')
+        'store_type': current
     }
-
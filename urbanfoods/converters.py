@@ -0,0 +1,13 @@
+# urbanfoods/converters.py
+from .models import FoodItem
+
+
+class StoreTypeConverter:
+    """``liquor``, ``food`` or ``grocery`` as the first URL segment of a storefront."""
+    regex = '|'.join(choice for choice, _ in FoodItem.STORE_CHOICES)
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
@@ -0,0 +1,95 @@
+# urbanfoods/customers.py
+"""
+Per-customer lifetime stats for the admin customers page.
+
+``CustomerSummary`` holds each customer's order count, total spent and
+first/last order time. An order counts once it is placed (paid or cash on
+delivery) and stops counting if it is cancelled, so the summary is refreshed
+from ``order_events`` on every status change.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .models import CustomerSummary, Order, User
+
+logger = logging.getLogger(__name__)
+
+UNCOUNTED_STATUSES = ['payment_pending', 'cancelled']
+
+
+def _counted_orders():
+    return Order.objects.exclude(status__in=UNCOUNTED_STATUSES)
+
+
+def refresh_customer_summary(user_id):
+    """Recompute one customer's summary (a single indexed aggregate over their orders)."""
+    try:
+        with transaction.atomic():
+            stats = _counted_orders().filter(user_id=user_id).aggregate(
+                order_count=Count('id'),
+                total_spent=Sum('total'),
+                first_order_at=Min('created_at'),
+                last_order_at=Max('created_at'),
+            )
+            stats['total_spent'] = stats['total_spent'] or 0
+            # A plain UPDATE for returning customers; only a first order inserts
+            if not CustomerSummary.objects.filter(user_id=user_id).update(**stats):
+                CustomerSummary.objects.create(user_id=user_id, **stats)
+    except Exception:
+        logger.exception("Failed to refresh customer summary for user %s", user_id)
+
+
+def record_customer_transition(order, old_status, new_status):
+    """Refresh the customer's summary when an order starts or stops counting."""
+    def counted(status):
+        return status is not None and status not in UNCOUNTED_STATUSES
+
+    if counted(old_status) != counted(new_status):
+        refresh_customer_summary(order.user_id)
+
+
+def rebuild_customer_summaries():
+    """Recompute every customer's summary from raw orders. Returns the row count."""
+    rows = [
+        CustomerSummary(
+            user_id=row['user'],
+            order_count=row['order_count'],
+            total_spent=row['total_spent'] or 0,
+            first_order_at=row['first_order_at'],
+            last_order_at=row['last_order_at'],
+        )
+        for row in _counted_orders().values('user').annotate(
+            order_count=Count('id'),
+            total_spent=Sum('total'),
+            first_order_at=Min('created_at'),
+            last_order_at=Max('created_at'),
+        ).order_by()
+    ]
+    with transaction.atomic():
+        CustomerSummary.objects.all().delete()
+        CustomerSummary.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def customer_list(search=''):
+    """
+    Non-staff users with their summary columns joined in (no aggregation),
+    busiest customers first, optionally filtered by username/phone/email.
+    """
+    customers = User.objects.filter(is_staff=False)
+    search = search.strip()
+    if search:
+        customers = customers.filter(
+            Q(username__icontains=search) |
+            Q(phone_number__icontains=search) |
+            Q(email__icontains=search)
+        )
+    return customers.annotate(
+        total_orders=Coalesce(F('order_summary__order_count'), 0),
+        total_spent=F('order_summary__total_spent'),
+        first_order_date=F('order_summary__first_order_at'),
+        last_order_date=F('order_summary__last_order_at'),
+    ).order_by(F('order_summary__order_count').desc(nulls_last=True), '-id')
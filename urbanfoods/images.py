@@ -0,0 +1,228 @@
+# urbanfoods/images.py
+"""
+Off-request processing of product photos.
+
+``FoodItem.save`` stores an upload as-is and marks the item
+``image_status='pending'``. A worker (the ``process_images`` command) then
+claims pending items, writes the optimized JPEG that replaces the raw upload
+plus one resized copy per ``FoodItem.IMAGE_VARIANTS`` width in each format,
+and marks the item ``ready``. Storage names and placeholder data are kept in
+``FoodItem.image_variants``:
+
+    {"jpeg": {"200": "food_images/variants/x-200.jpg", ...},
+     "webp": {"200": "food_images/variants/x-200.webp", ...},
+     "avif": {...},
+     "width": 800, "height": 533,
+     "lqip": "data:image/jpeg;base64,..."}
+"""
+import base64
+import hashlib
+import json
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageFilter, ImageOps, features
+
+from .models import FoodItem
+
+logger = logging.getLogger(__name__)
+
+MAX_SIZE = 800
+JPEG_QUALITY = 75
+VARIANT_WIDTHS = tuple(sorted(set(FoodItem.IMAGE_VARIANTS.values())))
+VARIANT_FORMATS = {
+    # format key -> (Pillow format, extension, save options); jpeg is the fallback
+    'jpeg': ('JPEG', 'jpg', {'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', 'webp', {'quality': 75, 'method': 6}),
+    'avif': ('AVIF', 'avif', {'quality': 55}),
+}
+VARIANT_DIR = 'food_images/variants'
+LQIP_WIDTH = 16
+
+
+def available_formats():
+    """Variant formats this Pillow build can encode."""
+    return [key for key in VARIANT_FORMATS if key == 'jpeg' or features.check(key)]
+
+
+# ─────────────────────────────────────────────────────────────
+#  ENCODING
+# ─────────────────────────────────────────────────────────────
+def _to_rgb(img):
+    """Honour EXIF rotation and flatten transparency onto white."""
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        return background
+    return img.convert('RGB') if img.mode != 'RGB' else img
+
+
+def _resized(img, width):
+    if img.width <= width:
+        return img
+    height = round(img.height * width / img.width)
+    return img.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def _encode(img, pil_format, **options):
+    buffer = BytesIO()
+    img.save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
+
+
+def encode_jpeg(img):
+    """The main product image: at most ``MAX_SIZE`` on each side, progressive JPEG."""
+    img = img.copy()
+    img.thumbnail((MAX_SIZE, MAX_SIZE), Image.Resampling.LANCZOS)
+    return _encode(img, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+
+
+def lqip_data_uri(img):
+    """A tiny blurred JPEG as a data URI, shown while the real image loads."""
+    small = _resized(img, LQIP_WIDTH).filter(ImageFilter.GaussianBlur(1))
+    data = _encode(small, 'JPEG', quality=40)
+    return 'data:image/jpeg;base64,' + base64.b64encode(data).decode()
+
+
+def build_variants(img, formats=None):
+    """``{format: {width: bytes}}`` for every variant width up to the source width."""
+    formats = available_formats() if formats is None else formats
+    widths = [w for w in VARIANT_WIDTHS if w < img.width] + [min(img.width, VARIANT_WIDTHS[-1])]
+    variants = {}
+    for key in formats:
+        pil_format, _, options = VARIANT_FORMATS[key]
+        variants[key] = {
+            width: _encode(_resized(img, width), pil_format, **options)
+            for width in sorted(set(widths))
+        }
+    return variants
+
+
+def settings_fingerprint():
+    """Short hash of the encoder settings; changes whenever outputs would change."""
+    spec = [MAX_SIZE, JPEG_QUALITY, VARIANT_WIDTHS, LQIP_WIDTH,
+            [(key, VARIANT_FORMATS[key][2]) for key in available_formats()]]
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def render_image(data):
+    """
+    Decode upload bytes and encode everything that gets stored for them:
+    ``{'jpeg': bytes or None, 'variants': {format: {width: bytes}}, 'width',
+    'height', 'lqip'}``. ``jpeg`` is ``None`` when the source is already an
+    optimized JPEG. CPU only, so it can run in a worker process.
+    """
+    source = Image.open(BytesIO(data))
+    already_optimized = source.format == 'JPEG' and max(source.size) <= MAX_SIZE
+    img = _to_rgb(source)
+    img.load()
+    largest = _resized(img, VARIANT_WIDTHS[-1])
+    return {
+        # Re-encoding an optimized JPEG would only lose quality
+        'jpeg': None if already_optimized else encode_jpeg(img),
+        'variants': build_variants(img),
+        'width': largest.width,
+        'height': largest.height,
+        'lqip': lqip_data_uri(img),
+    }
+
+
+def store_rendered(item, source_name, rendered):
+    """
+    Save ``render_image`` output next to ``source_name`` and point the item at
+    it. The row is only updated if its image was not replaced meanwhile (a
+    replaced image is already pending again). Returns ``(status, image_name)``.
+    """
+    storage = item.image.storage
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+
+    variants = {}
+    for key, widths in rendered['variants'].items():
+        extension = VARIANT_FORMATS[key][1]
+        variants[key] = {
+            str(width): storage.save(f'{VARIANT_DIR}/{stem}-{width}.{extension}', ContentFile(data))
+            for width, data in widths.items()
+        }
+    variants.update(width=rendered['width'], height=rendered['height'], lqip=rendered['lqip'])
+    image_name = source_name
+    if rendered['jpeg'] is not None:
+        image_name = storage.save(f'food_images/{stem}.jpg', ContentFile(rendered['jpeg']))
+
+    updated = FoodItem.objects.filter(pk=item.pk, image=source_name).update(
+        image=image_name,
+        image_variants=variants,
+        image_status='ready',
+        image_processed_at=timezone.now(),
+    )
+    if not updated:
+        return 'superseded', source_name
+    _delete_files(storage, variant_names(item.image_variants))
+    # The raw upload is kept: a concurrent full save of a stale instance can
+    # point the item back at it, and it is then simply processed again.
+    return 'ready', image_name
+
+
+def read_source(item):
+    with item.image.storage.open(item.image.name, 'rb') as fh:
+        return fh.read()
+
+
+def variant_names(variants):
+    """Every storage name in an ``image_variants`` dict."""
+    return [
+        name
+        for key in VARIANT_FORMATS
+        for name in (variants or {}).get(key, {}).values()
+    ]
+
+
+def _delete_files(storage, names):
+    for name in names:
+        try:
+            storage.delete(name)
+        except Exception:
+            logger.warning("Could not delete old image variant %s", name)
+
+
+# ─────────────────────────────────────────────────────────────
+#  WORKER
+# ─────────────────────────────────────────────────────────────
+def claim_pending(limit=10):
+    """Atomically move up to ``limit`` pending items to ``processing`` and return their ids."""
+    with transaction.atomic():
+        ids = list(
+            FoodItem.objects.select_for_update(skip_locked=True)
+            .filter(image_status='pending')
+            .order_by('updated_at', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        FoodItem.objects.filter(id__in=ids).update(image_status='processing')
+    return ids
+
+
+def process_food_item_image(item_id):
+    """Optimize one claimed item's upload and write its variants. Returns the new status."""
+    item = FoodItem.objects.only('id', 'image', 'image_variants').get(pk=item_id)
+    source_name = item.image.name
+    if not source_name:
+        FoodItem.objects.filter(pk=item_id, image_status='processing').update(image_status='ready')
+        return 'ready'
+
+    try:
+        status, _ = store_rendered(item, source_name, render_image(read_source(item)))
+    except Exception:
+        logger.exception("Image processing failed for food item %s (%s)", item_id, source_name)
+        FoodItem.objects.filter(pk=item_id, image=source_name).update(image_status='failed')
+        return 'failed'
+    return status
+
+
+def requeue_stuck():
+    """Put items left in ``processing`` by a crashed worker back in the queue."""
+    return FoodItem.objects.filter(image_status='processing').update(image_status='pending')
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from urbanfoods.analytics import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily/hourly sales rollups from raw orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Only rebuild the last N days (default: full history)'
+        )
+
+    def handle(self, *args, **options):
+        start_date = None
+        if options.get('days'):
+            start_date = timezone.localdate() - timedelta(days=options['days'])
+            self.stdout.write(f'Rebuilding rollups since {start_date}...')
+        else:
+            self.stdout.write('Rebuilding rollups for the full order history...')
+
+        hourly_rows, daily_rows = rebuild_sales_rollups(start_date=start_date)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {hourly_rows} hourly and {daily_rows} daily rollup rows'
+        ))
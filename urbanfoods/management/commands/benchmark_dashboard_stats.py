@@ -0,0 +1,102 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from urbanfoods.analytics import _compute_dashboard_stats
+from urbanfoods.models import Order, User
+
+BENCH_PREFIX = 'BM'
+BENCH_USERNAME = 'dashboard-benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Measure query count and latency of the dashboard stats query (optionally on seeded test orders)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Create N synthetic test orders first (e.g. 100000)')
+        parser.add_argument('--runs', type=int, default=20, help='Number of timed runs')
+        parser.add_argument('--store-type', default='liquor')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the synthetic orders afterwards')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'])
+
+        store_type = options['store_type']
+
+        # Query-count regression guard: the whole stats block must stay one query
+        with CaptureQueriesContext(connection) as ctx:
+            stats = _compute_dashboard_stats(store_type)
+        if len(ctx.captured_queries) != 1:
+            raise CommandError(f'Expected 1 query for dashboard stats, got {len(ctx.captured_queries)}')
+
+        timings = []
+        for _ in range(options['runs']):
+            started = time.perf_counter()
+            _compute_dashboard_stats(store_type)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+
+        orders = Order.objects.filter(store_type=store_type).count()
+        self.stdout.write(f'{orders} {store_type} orders, {options["runs"]} runs')
+        self.stdout.write(f'Queries per call: {len(ctx.captured_queries)}')
+        self.stdout.write(
+            f'Latency ms: min {timings[0]:.1f}  '
+            f'p50 {timings[len(timings) // 2]:.1f}  '
+            f'max {timings[-1]:.1f}'
+        )
+        for key, value in stats.items():
+            self.stdout.write(f'  {key}: {value}')
+
+        if options['cleanup']:
+            deleted, _ = Order.objects.filter(is_test_order=True, order_number__startswith=BENCH_PREFIX).delete()
+            self.stdout.write(self.style.SUCCESS(f'Removed {deleted} synthetic rows'))
+
+    def seed(self, count):
+        """Bulk insert ``count`` test orders spread over the last 90 days."""
+        user, _ = User.objects.get_or_create(
+            username=BENCH_USERNAME,
+            defaults={'email': f'{BENCH_USERNAME}@example.com', 'is_active': False},
+        )
+        now = timezone.now()
+        statuses = [value for value, _ in Order.STATUS_CHOICES]
+        stores = ['liquor', 'liquor', 'liquor', 'food', 'grocery']
+
+        self.stdout.write(f'Seeding {count} test orders...')
+        batch = []
+        for _ in range(count):
+            subtotal = Decimal(random.randint(2, 60) * 50)
+            batch.append(Order(
+                order_number=f'{BENCH_PREFIX}{uuid.uuid4().hex[:16].upper()}',
+                is_test_order=True,
+                user=user,
+                status=random.choice(statuses),
+                store_type=random.choice(stores),
+                hostel='Benchmark',
+                room_number='0',
+                phone_number='254700000000',
+                subtotal=subtotal,
+                delivery_fee=Decimal('20'),
+                total=subtotal + Decimal('20'),
+                estimated_delivery=now,
+            ))
+            if len(batch) == 5000:
+                self._flush(batch, now)
+                batch = []
+        if batch:
+            self._flush(batch, now)
+        self.stdout.write(self.style.SUCCESS(f'Seeded {count} orders'))
+
+    def _flush(self, batch, now):
+        created = Order.objects.bulk_create(batch)
+        # auto_now_add overrides created_at on insert, so spread the dates afterwards
+        for order in created:
+            order.created_at = now - timedelta(minutes=random.randint(0, 90 * 24 * 60))
+        Order.objects.bulk_update(created, ['created_at'], batch_size=1000)
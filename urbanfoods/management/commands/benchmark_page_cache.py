@@ -0,0 +1,114 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from urbanfoods.catalog import STORE_TYPES
+from urbanfoods.models import User
+from urbanfoods.page_cache import page_cache_stats, purge_pages, reset_page_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Load-test the storefront with the page cache off and on and report req/s and hit rate'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Paths to request in turn (default: every storefront)'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Requests per run (default: 200)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help='Concurrent clients (default: 4)'
+        )
+        parser.add_argument(
+            '--user',
+            help='Username to send the requests as (default: anonymous)'
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Only print the live hit-rate counters and exit'
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.print_stats()
+            return
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be at least 1')
+
+        self.paths = options['paths'] or [reverse('storefront', args=[s]) for s in STORE_TYPES]
+        self.user = None
+        if options['user']:
+            self.user = User.objects.filter(username=options['user']).first()
+            if self.user is None:
+                raise CommandError(f'No user {options["user"]}')
+
+        with override_settings(PAGE_CACHE_SECONDS=0):
+            before = self.run(options['requests'], options['concurrency'])
+        purge_pages()
+        reset_page_cache_stats()
+        after = self.run(options['requests'], options['concurrency'])
+
+        self.report('Cache off', before)
+        self.report('Cache on', after)
+        self.stdout.write(self.style.SUCCESS(
+            f'Speed-up x{after["rps"] / before["rps"]:.1f}'
+        ))
+        self.print_stats()
+
+    def run(self, total, concurrency):
+        local = threading.local()
+
+        def request(n):
+            if not hasattr(local, 'client'):
+                # Through the full middleware stack, as a real host would be
+                local.client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0].lstrip('.'))
+                if self.user:
+                    local.client.force_login(self.user)
+            path = self.paths[n % len(self.paths)]
+            start = time.perf_counter()
+            response = local.client.get(path)
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                raise CommandError(f'{path} returned {response.status_code}')
+            return elapsed
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            started = time.perf_counter()
+            latencies = list(pool.map(request, range(total)))
+            wall = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'rps': total / wall,
+            'mean': statistics.mean(latencies),
+            'p95': latencies[int(len(latencies) * 0.95) - 1],
+        }
+
+    def report(self, label, result):
+        self.stdout.write(
+            f'{label:<10} {result["rps"]:>8.1f} req/s   '
+            f'mean {result["mean"] * 1000:>7.1f} ms   p95 {result["p95"] * 1000:>7.1f} ms'
+        )
+
+    def print_stats(self):
+        stats = page_cache_stats()
+        self.stdout.write(
+            f'Page cache: {stats["hits"]} hits, {stats["misses"]} misses, '
+            f'hit rate {stats["hit_rate"]:.1%}'
+        )
@@ -0,0 +1,105 @@
+import gzip
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from urbanfoods.catalog import DEFAULT_STORE_TYPE
+from urbanfoods.models import User
+
+SCRIPT_RE = re.compile(r'<script\b([^>]*)>(.*?)</script>', re.S | re.I)
+SRC_RE = re.compile(r'\bsrc="([^"]+)"')
+
+
+def _gz(data):
+    return len(gzip.compress(data, 9))
+
+
+class Command(BaseCommand):
+    help = 'Report HTML and same-origin JavaScript bytes per page view, first visit vs repeat visit'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Paths to measure (default: the default storefront and the admin orders page)'
+        )
+        parser.add_argument(
+            '--staff-user',
+            help='Username to log in as for /admin-panel/ pages (default: first staff user)'
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or [reverse('storefront', args=[DEFAULT_STORE_TYPE]), reverse('admin_orders')]
+        # Render through the full middleware stack as a real host would
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0].lstrip('.'))
+        if any(path.startswith('/admin-panel/') for path in paths):
+            self.login(client, options['staff_user'])
+
+        rows = []
+        for path in paths:
+            # As production renders it: hashed static URLs from the manifest
+            with override_settings(DEBUG=False):
+                response = client.get(path)
+            if response.status_code != 200:
+                raise CommandError(f'{path} returned {response.status_code}')
+            html = response.content
+            inline, bundles = self.scripts(html.decode())
+            bundle_bytes = b''.join(self.read_static(src) for src in bundles)
+            rows.append((path, html, inline, bundles, bundle_bytes))
+
+        for path, html, inline, bundles, bundle_bytes in rows:
+            # Inlining the bundles would re-send them with every page view
+            inlined = html + bundle_bytes
+            first = len(html) + len(bundle_bytes)
+            self.stdout.write(self.style.MIGRATE_HEADING(path))
+            self.stdout.write(f'  HTML               {len(html):>9,} B  ({_gz(html):,} B gzip)')
+            self.stdout.write(f'  inline <script>    {inline:>9,} B')
+            for src in bundles:
+                self.stdout.write(f'  bundle {src}')
+            self.stdout.write(f'  bundles            {len(bundle_bytes):>9,} B  ({_gz(bundle_bytes):,} B gzip)')
+            self.stdout.write(f'  inlined, per view  {len(inlined):>9,} B  ({_gz(inlined):,} B gzip)')
+            self.stdout.write(f'  bundled, 1st view  {first:>9,} B  ({_gz(html) + _gz(bundle_bytes):,} B gzip)')
+            self.stdout.write(self.style.SUCCESS(
+                f'  bundled, repeat    {len(html):>9,} B  ({_gz(html):,} B gzip, '
+                f'{len(inlined) - len(html):,} B saved per view)'
+            ))
+
+    def login(self, client, username):
+        staff = User.objects.filter(is_staff=True)
+        user = staff.filter(username=username).first() if username else staff.first()
+        if user is None:
+            raise CommandError('No staff user to measure /admin-panel/ pages with')
+        client.force_login(user)
+        # Admin pages read their session from a separate cookie
+        client.cookies[settings.ADMIN_SESSION_COOKIE_NAME] = client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    @staticmethod
+    def scripts(html):
+        """``(inline script bytes, same-origin static script URLs)`` of a page."""
+        inline, bundles = 0, []
+        for attrs, body in SCRIPT_RE.findall(html):
+            src = SRC_RE.search(attrs)
+            if src:
+                if src.group(1).startswith(settings.STATIC_URL):
+                    bundles.append(src.group(1))
+            elif 'application/ld+json' not in attrs:
+                inline += len(body.encode())
+        return inline, bundles
+
+    @staticmethod
+    def read_static(url):
+        # Unhashed names (DEBUG) come from the app sources, hashed ones from STATIC_ROOT
+        name = url[len(settings.STATIC_URL):].split('?')[0]
+        path = finders.find(name)
+        if path:
+            with open(path, 'rb') as fh:
+                return fh.read()
+        if not staticfiles_storage.exists(name):
+            raise CommandError(f'Cannot find static file {name}')
+        with staticfiles_storage.open(name) as fh:
+            return fh.read()
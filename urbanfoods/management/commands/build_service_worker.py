@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from urbanfoods.pwa import OUTPUT_PATH, write_service_worker
+
+
+class Command(BaseCommand):
+    help = 'Generate service-worker.js from its template with hashed precache URLs (collectstatic runs this too)'
+
+    def handle(self, *args, **options):
+        version, changed = write_service_worker()
+        if changed:
+            self.stdout.write(self.style.SUCCESS(f'Wrote {OUTPUT_PATH.name} (cache version {version})'))
+        else:
+            self.stdout.write(f'{OUTPUT_PATH.name} is up to date (cache version {version})')
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from urbanfoods.payroll import snapshot_week, week_bounds
+
+
+class Command(BaseCommand):
+    help = "Freeze riders' weekly delivery totals (run every Monday for the week just ended)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--week',
+            help='Any date in the week to close, YYYY-MM-DD (default: last week)'
+        )
+        parser.add_argument(
+            '--refresh-open',
+            action='store_true',
+            help='Also recompute the current (open) week without closing it'
+        )
+
+    def handle(self, *args, **options):
+        if options.get('week'):
+            day = parse_date(options['week'])
+            if day is None:
+                raise CommandError(f"Invalid --week value: {options['week']}")
+        else:
+            day = timezone.localdate() - timedelta(days=7)
+
+        week_start, week_end = week_bounds(day)
+        if week_end >= timezone.localdate():
+            raise CommandError(f'Week {week_start} - {week_end} has not ended yet')
+
+        rows = snapshot_week(week_start, close=True)
+        self.stdout.write(self.style.SUCCESS(f'Closed week {week_start} - {week_end} ({rows} riders)'))
+
+        if options['refresh_open']:
+            open_start, open_end = week_bounds()
+            rows = snapshot_week(open_start)
+            self.stdout.write(self.style.SUCCESS(f'Refreshed open week {open_start} - {open_end} ({rows} riders)'))
@@ -0,0 +1,77 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import QueryDict
+from django.utils import timezone
+
+from urbanfoods import admin_views, analytics, pagination, payroll, review_prompts, views
+from urbanfoods.models import DeliveryGuy
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the hot Order lookups, built by the same helpers the views use, '
+        'and fail if any of them is not served by its index'
+    )
+
+    def hot_queries(self):
+        """(label, queryset, acceptable indexes) for every indexed hot path."""
+        now = timezone.now()
+        user_id = 1
+        rider = DeliveryGuy(id=1)
+        week_start, _ = payroll._week_window(payroll.week_bounds()[0])
+
+        def order_list(query=''):
+            orders, _ = admin_views._filter_orders(QueryDict(query))
+            return pagination.keyset_queryset(orders, 'created_at')[:51]
+
+        return [
+            ('my_orders (user, status)', views._customer_orders(user_id)[1], ['order_user_status_idx']),
+            ('pending_review_order (user, status)', review_prompts._next_reviewable(user_id), ['order_user_status_idx']),
+            ('get_new_orders (status, created_at)', admin_views._new_orders(now - timedelta(minutes=5)),
+             ['order_status_created_idx']),
+            ('mpesa_callback (mpesa_checkout_request_id)', views._orders_for_checkout_request('ws_CO_000000000000'),
+             ['mpesa_checkout_request_id']),
+            ('rider history (delivery_guy, status, delivered_at)',
+             pagination.keyset_queryset(admin_views._rider_deliveries(rider), 'delivered_at')[:26],
+             ['order_rider_status_deliv_idx']),
+            ('payroll snapshot (status, delivered_at)', payroll._delivered_between(week_start, now),
+             ['order_rider_status_deliv_idx', 'order_status_created_idx']),
+            ('order list, unfiltered (created_at, id)', order_list(), ['order_created_id_idx']),
+            ('liquor order list (store_type, created_at)', order_list('store_type=liquor'),
+             ['order_store_created_idx', 'order_store_status_created_idx']),
+            ('order list by rider (delivery_guy, created_at)', order_list('delivery_guy=1'),
+             ['order_rider_created_idx']),
+            ('store dashboards (store_type, status, created_at)', analytics._dashboard_orders('liquor', week_start),
+             ['order_store_status_created_idx', 'order_store_created_idx']),
+        ]
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f'EXPLAIN checks are not implemented for {vendor}')
+
+        failures = []
+        for label, queryset, indexes in self.hot_queries():
+            plan = queryset.explain()
+            ok = self.uses_index(vendor, plan, indexes)
+            status = self.style.SUCCESS('index') if ok else self.style.ERROR('NO INDEX')
+            self.stdout.write(f'{status}  {label}')
+            if options['verbosity'] > 1 or not ok:
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+            if not ok:
+                failures.append(label)
+
+        if failures:
+            # On PostgreSQL a tiny table can make a seq scan the honest best plan
+            raise CommandError(f'{len(failures)} hot queries are not using an index: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('All hot Order queries use an index'))
+
+    @staticmethod
+    def uses_index(vendor, plan, indexes):
+        # db_index=True names are generated but contain the column name.
+        # SQLite reports a walk of an index in order as "SCAN ... USING INDEX".
+        full_scan = r'Seq Scan on' if vendor == 'postgresql' else r'SCAN urbanfoods_order(?! USING)'
+        return not re.search(full_scan, plan) and any(index in plan for index in indexes)
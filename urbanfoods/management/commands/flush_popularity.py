@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from urbanfoods.popularity import count_events, refresh_trending
+
+
+class Command(BaseCommand):
+    help = 'Fold checkout popularity events into times_ordered and refresh trending scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep flushing every --interval seconds (the worker process)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60,
+            help='Seconds between flushes with --loop (default: 60)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            counted = count_events()
+            trending = refresh_trending()
+            if counted or not options['loop']:
+                self.stdout.write(f'Counted {counted} sales events; {trending} items trending')
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
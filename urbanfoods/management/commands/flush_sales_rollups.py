@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from urbanfoods.analytics import fold_sales_events
+
+
+class Command(BaseCommand):
+    help = 'Fold queued order status changes into the daily/hourly sales rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep flushing every --interval seconds (the worker process)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=30,
+            help='Seconds between flushes with --loop (default: 30)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            folded = fold_sales_events()
+            if folded or not options['loop']:
+                self.stdout.write(f'Folded {folded} sales events into the rollups')
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+
+from urbanfoods.images import VARIANT_WIDTHS, claim_pending, process_food_item_image
+from urbanfoods.models import FoodItem
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive variants and placeholders for existing food_images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate variants for every item, not only those missing them'
+        )
+        parser.add_argument(
+            '--queue-only',
+            action='store_true',
+            help='Only mark items pending and leave the work to the process_images worker'
+        )
+
+    def handle(self, *args, **options):
+        items = FoodItem.objects.filter(image__startswith='food_images/').exclude(
+            image_status__in=['pending', 'processing']
+        )
+        if not options['force']:
+            # Items processed before the current variant widths were registered
+            # are picked up too
+            stale = [
+                item.id for item in items.only('id', 'image_variants')
+                if not self.has_current_variants(item.image_variants)
+            ]
+            items = items.filter(id__in=stale)
+
+        queued = items.update(image_status='pending')
+        self.stdout.write(f'Queued {queued} items')
+        if options['queue_only']:
+            return
+
+        counts = {}
+        while ids := claim_pending(25):
+            for item_id in ids:
+                status = process_food_item_image(item_id)
+                counts[status] = counts.get(status, 0) + 1
+                if status != 'ready':
+                    self.stdout.write(self.style.WARNING(f'{status:<10} food item {item_id}'))
+
+        summary = ', '.join(f'{n} {status}' for status, n in sorted(counts.items())) or 'nothing to do'
+        self.stdout.write(self.style.SUCCESS(f'Done: {summary}'))
+
+    @staticmethod
+    def has_current_variants(variants):
+        if not variants or not variants.get('lqip'):
+            return False
+        widths = {int(width) for width in variants.get('jpeg', {})}
+        # Small sources stop at their own width, so only the registered widths
+        # below the largest generated one must be present
+        return bool(widths) and all(w in widths for w in VARIANT_WIDTHS if w <= max(widths))
@@ -1,120 +1,158 @@
-# from django.core.management.base import BaseCommand
-# from django.contrib.auth import get_user_model
-# from django.utils import timezone
-# from decimal import Decimal
-# from django.conf import settings
-
-# from urbanfoods.models import Order, OrderItem, FoodItem
-# from urbanfoods.utils import notify_new_order, notify_low_stock, send_telegram_message
-
-# User = get_user_model()
-
-
-# class Command(BaseCommand):
-#     help = "Create a test liquor order and trigger notify_new_order()"
-
-#     def handle(self, *args, **options):
-#         self.stdout.write(self.style.WARNING("Creating test order..."))
-
-#         # 1. Create or get test user
-#         user, created = User.objects.get_or_create(
-#             username="testcustomer",
-#             defaults={
-#                 "email": "testcustomer@example.com",
-#                 "first_name": "Test",
-#                 "last_name": "Customer",
-#             }
-#         )
-
-#         if created:
-#             self.stdout.write(self.style.SUCCESS("Test user created"))
-#         else:
-#             self.stdout.write("Using existing test user")
-
-#         # 2. Get a liquor item
-#         item = FoodItem.objects.filter(store_type="liquor").first()
-
-#         if not item:
-#             self.stdout.write(self.style.ERROR(
-#                 "No liquor FoodItem found. Create one first."
-#             ))
-#             return
-
-#         # 3. Create order
-#         order = Order.objects.create(
-#             user=user,
-#             phone_number="0718258821",
-#             hostel="Honolulu",
-#             room_number="112",
-#             delivery_notes="TEST ORDER – PLEASE IGNORE",
-#             subtotal=Decimal("1000.00"),
-#             delivery_fee=Decimal("20.00"),
-#             total=Decimal("1020.00"),
-#             store_type="liquor",
-#             status="pending",
-#             estimated_delivery=timezone.now() + timezone.timedelta(minutes=15)
-#         )
-
-#         # 4. Create order item
-#         OrderItem.objects.create(
-#             order=order,
-#             food_item=item,
-#             quantity=2,
-#             price_at_order=item.price
-#         )
-
-#         self.stdout.write(self.style.SUCCESS(
-#             f"Order {order.order_number} created"
-#         ))
-
-#         # 5. Trigger notification
-#         success = notify_new_order(order)
-
-#         if success:
-#             self.stdout.write(self.style.SUCCESS(
-#                 "notify_new_order() executed successfully"
-#             ))
-#         else:
-#             self.stdout.write(self.style.ERROR(
-#                 "notify_new_order() failed"
-#             ))
-
-#     help = "Send Telegram low stock alert for liquor products"
-
-#     def add_arguments(self, parser):
-#         parser.add_argument(
-#             '--id',
-#             type=int,
-#             help='Test low stock alert for a specific FoodItem ID'
-#         )
-
-#     def handle(self, *args, **options):
-#         item_id = options.get('id', 3)
-
-#         if item_id:
-#             try:
-#                 item = FoodItem.objects.get(id=item_id)
-#             except FoodItem.DoesNotExist:
-#                 self.stdout.write(self.style.ERROR(f"❌ FoodItem with ID {item_id} not found"))
-#                 return
-
-#             self.stdout.write(self.style.WARNING(f"Testing low stock alert for: {item.name} (Stock: {item.stock})"))
-#             notify_low_stock(item)
-#             self.stdout.write(self.style.SUCCESS("✅ Telegram notification sent (if stock ≤ threshold)"))
-#             return
-
-#         # Bulk test for all liquor items below threshold
-#         low_stock_items = FoodItem.objects.filter(
-#             store_type='liquor',
-#             stock__lte=5
-#         )
-
-#         if not low_stock_items.exists():
-#             self.stdout.write(self.style.WARNING("⚠️ No liquor items are currently low on stock"))
-#             return
-
-#         for item in low_stock_items:
-#             notify_low_stock(item)
-#             self.stdout.write(self.style.SUCCESS(f"✅ Alert sent for {item.name} (Stock: {item.stock})"))
-
-#         self.stdout.write(self.style.SUCCESS("🎉 Low stock test completed"))
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from urbanfoods.images import read_source, render_image, settings_fingerprint, store_rendered
+from urbanfoods.models import FoodItem
+
+
+def _render(item_id, data):
+    """Worker-process entry point: encode one image and report the output sizes."""
+    rendered = render_image(data)
+    variant_bytes = sum(len(blob) for widths in rendered['variants'].values() for blob in widths.values())
+    after = len(rendered['jpeg']) if rendered['jpeg'] is not None else len(data)
+    return item_id, rendered, after, variant_bytes
+
+
+def _human(size):
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GB'
+
+
+class Command(BaseCommand):
+    help = 'Re-optimize every product image in parallel, skipping images already done with the current settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Encoder processes (default: CPU count)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Encode and report before/after sizes without storing anything'
+        )
+        parser.add_argument(
+            '--manifest',
+            default=str(Path(settings.MEDIA_ROOT) / '.image_manifest.json'),
+            help='Progress manifest of content hashes (default: MEDIA_ROOT/.image_manifest.json)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Ignore the manifest and re-optimize everything'
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+
+        self.manifest_path = Path(options['manifest'])
+        self.manifest = {} if options['force'] else self.load_manifest()
+        self.dry_run = options['dry_run']
+        fingerprint = settings_fingerprint()
+        totals = {'before': 0, 'after': 0, 'variants': 0, 'done': 0, 'skipped': 0, 'failed': 0}
+
+        items = {
+            item.id: item
+            for item in FoodItem.objects.exclude(image='').only('id', 'name', 'image', 'image_variants')
+        }
+        self.stdout.write(
+            f'{len(items)} images, {options["workers"]} workers, settings {fingerprint}'
+            + (' (dry run)' if self.dry_run else '')
+        )
+
+        sources = {}
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+            in_flight = set()
+            for item in items.values():
+                try:
+                    data = read_source(item)
+                except Exception as e:
+                    totals['failed'] += 1
+                    self.stdout.write(self.style.ERROR(f'missing  {item.image.name}: {e}'))
+                    continue
+
+                digest = hashlib.sha256(data).hexdigest()
+                entry = self.manifest.get(str(item.id))
+                if entry and entry['settings'] == fingerprint and digest in (entry['source'], entry['output']):
+                    totals['skipped'] += 1
+                    continue
+
+                sources[item.id] = (item.image.name, len(data), digest)
+                in_flight.add(pool.submit(_render, item.id, data))
+                # Bound memory: never hold more than two images per worker
+                if len(in_flight) >= options['workers'] * 2:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    self.collect(finished, items, sources, fingerprint, totals)
+
+            while in_flight:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                self.collect(finished, items, sources, fingerprint, totals)
+
+        saved = totals['before'] - totals['after']
+        percent = 100 * saved / totals['before'] if totals['before'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['done']} optimized, {totals['skipped']} unchanged, {totals['failed']} failed. "
+            f"Main images {_human(totals['before'])} -> {_human(totals['after'])} "
+            f"(saved {_human(saved)}, {percent:.0f}%), variants {_human(totals['variants'])}"
+        ))
+
+    def collect(self, finished, items, sources, fingerprint, totals):
+        for future in finished:
+            try:
+                item_id, rendered, after, variant_bytes = future.result()
+            except Exception as e:
+                totals['failed'] += 1
+                self.stdout.write(self.style.ERROR(f'failed   {e}'))
+                continue
+
+            source_name, before, digest = sources.pop(item_id)
+            item = items[item_id]
+            self.stdout.write(f'{_human(before):>9} -> {_human(after):>9}  {source_name}')
+            if not self.dry_run:
+                try:
+                    status, image_name = store_rendered(item, source_name, rendered)
+                except Exception as e:
+                    totals['failed'] += 1
+                    self.stdout.write(self.style.ERROR(f'failed   {source_name}: {e}'))
+                    continue
+                if status != 'ready':
+                    self.stdout.write(self.style.WARNING(f'{status:<8} {source_name} (replaced meanwhile)'))
+                    continue
+                output = digest if rendered['jpeg'] is None else hashlib.sha256(rendered['jpeg']).hexdigest()
+                self.manifest[str(item_id)] = {
+                    'source': digest, 'output': output, 'image': image_name, 'settings': fingerprint,
+                }
+                # Written after every item so an interrupted run resumes where it stopped
+                self.save_manifest()
+
+            totals['done'] += 1
+            totals['before'] += before
+            totals['after'] += after
+            totals['variants'] += variant_bytes
+
+    def load_manifest(self):
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            raise CommandError(f'Unreadable manifest {self.manifest_path}: {e}; use --force to rebuild it')
+
+    def save_manifest(self):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self.manifest, indent=1, sort_keys=True))
+        os.replace(tmp, self.manifest_path)
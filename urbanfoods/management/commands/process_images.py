@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from urbanfoods.images import claim_pending, process_food_item_image, requeue_stuck
+
+
+class Command(BaseCommand):
+    help = 'Optimize queued product image uploads and build their responsive variants'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new uploads (the worker process)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds to wait between polls when the queue is empty (default: 5)'
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=10,
+            help='Items claimed per poll (default: 10)'
+        )
+        parser.add_argument(
+            '--requeue-stuck',
+            action='store_true',
+            help='First put items left "processing" by a crashed worker back in the queue'
+        )
+
+    def handle(self, *args, **options):
+        if options['requeue_stuck']:
+            self.stdout.write(f'Requeued {requeue_stuck()} stuck items')
+
+        while True:
+            ids = claim_pending(options['batch'])
+            for item_id in ids:
+                status = process_food_item_image(item_id)
+                style = self.style.SUCCESS if status == 'ready' else self.style.WARNING
+                self.stdout.write(style(f'{status:<10} food item {item_id}'))
+
+            if not ids:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Image queue empty'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from urbanfoods.customers import rebuild_customer_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-customer lifetime order stats from raw orders'
+
+    def handle(self, *args, **options):
+        rows = rebuild_customer_summaries()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {rows} customer summaries'))
@@ -1,7 +1,21 @@
 # urbanfoods/middleware.py
 from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
 from importlib import import_module
 
+
+class PollSessionMiddleware(SessionMiddleware):
+    """
+    Django's session middleware, except that responses flagged
+    ``skip_session_save`` (the cached 304s of order_status) leave the session
+    untouched despite SESSION_SAVE_EVERY_REQUEST.
+    """
+    def process_response(self, request, response):
+        if getattr(response, 'skip_session_save', False):
+            return response
+        return super().process_response(request, response)
+
+
 class CustomAdminSessionMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -0,0 +1,101 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:27
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    """Fill both rollups from existing orders (what backfill_sales_rollups does)."""
+    Order = apps.get_model('urbanfoods', 'Order')
+    OrderItem = apps.get_model('urbanfoods', 'OrderItem')
+    DailySalesRollup = apps.get_model('urbanfoods', 'DailySalesRollup')
+    HourlySalesRollup = apps.get_model('urbanfoods', 'HourlySalesRollup')
+
+    HourlySalesRollup.objects.bulk_create([
+        HourlySalesRollup(
+            date=row['day'],
+            hour=row['hour'],
+            store_type=row['store_type'],
+            status=row['status'],
+            order_count=row['order_count'],
+            items_revenue=row['items_revenue'] or 0,
+            delivery_fees=row['delivery_fees'] or 0,
+            total_revenue=row['total_revenue'] or 0,
+        )
+        for row in Order.objects.annotate(
+            day=TruncDate('created_at'), hour=ExtractHour('created_at')
+        ).values('day', 'hour', 'store_type', 'status').annotate(
+            order_count=Count('id'),
+            items_revenue=Sum('subtotal'),
+            delivery_fees=Sum('delivery_fee'),
+            total_revenue=Sum('total'),
+        ).order_by()
+    ], batch_size=1000)
+
+    # Order items have no store_type snapshot yet (0029); use the food item's
+    DailySalesRollup.objects.bulk_create([
+        DailySalesRollup(
+            date=row['day'],
+            store_type=row['food_item__store_type'],
+            food_item_id=row['food_item_id'],
+            status=row['order__status'],
+            quantity=row['units'] or 0,
+            revenue=row['line_revenue'] or 0,
+            order_count=row['order_count'],
+        )
+        for row in OrderItem.objects.annotate(
+            day=TruncDate('order__created_at')
+        ).values('day', 'food_item__store_type', 'food_item_id', 'order__status').annotate(
+            units=Sum('quantity'),
+            line_revenue=Sum(ExpressionWrapper(F('price_at_order') * F('quantity'), output_field=DecimalField())),
+            order_count=Count('order', distinct=True),
+        ).order_by()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('urbanfoods', '0027_deliveryguyweeklypayment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('store_type', models.CharField(choices=[('food', 'Food Store'), ('liquor', 'Liquor Store'), ('grocery', 'Grocery Shop')], max_length=10)),
+                ('status', models.CharField(choices=[('payment_pending', 'Payment Pending'), ('pending', 'Pending'), ('preparing', ' Preparing'), ('out_for_delivery', 'Out for Delivery'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('order_count', models.IntegerField(default=0)),
+                ('items_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('delivery_fees', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['store_type', 'date'], name='hourlysales_store_date_idx')],
+                'unique_together': {('date', 'hour', 'store_type', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('store_type', models.CharField(choices=[('food', 'Food Store'), ('liquor', 'Liquor Store'), ('grocery', 'Grocery Shop')], max_length=10)),
+                ('status', models.CharField(choices=[('payment_pending', 'Payment Pending'), ('pending', 'Pending'), ('preparing', ' Preparing'), ('out_for_delivery', 'Out for Delivery'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('order_count', models.IntegerField(default=0)),
+                ('food_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='urbanfoods.fooditem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['store_type', 'date'], name='dailysales_store_date_idx')],
+                'unique_together': {('date', 'store_type', 'food_item', 'status')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
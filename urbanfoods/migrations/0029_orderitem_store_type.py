@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:32
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def snapshot_store_type(apps, schema_editor):
+    OrderItem = apps.get_model('urbanfoods', 'OrderItem')
+    FoodItem = apps.get_model('urbanfoods', 'FoodItem')
+    OrderItem.objects.filter(store_type='').update(
+        store_type=Subquery(FoodItem.objects.filter(pk=OuterRef('food_item_id')).values('store_type')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('urbanfoods', '0028_dailysalesrollup_hourlysalesrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='store_type',
+            field=models.CharField(blank=True, choices=[('food', 'Food Store'), ('liquor', 'Liquor Store'), ('grocery', 'Grocery Shop')], max_length=10),
+        ),
+        migrations.RunPython(snapshot_store_type, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['store_type', 'status', 'created_at'], name='order_store_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['store_type', 'food_item'], name='orderitem_store_item_idx'),
+        ),
+    ]
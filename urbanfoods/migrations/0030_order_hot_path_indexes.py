@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('urbanfoods', '0029_orderitem_store_type'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='mpesa_checkout_request_id',
+            field=models.CharField(blank=True, db_index=True, max_length=50, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'status'], name='order_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['delivery_guy', 'status', 'delivered_at'], name='order_rider_status_deliv_idx'),
+        ),
+    ]
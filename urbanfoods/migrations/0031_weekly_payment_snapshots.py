@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:35
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def snapshot_weekly_payments(apps, schema_editor):
+    """Fill every rider's weekly totals from delivered orders."""
+    Order = apps.get_model('urbanfoods', 'Order')
+    DeliveryGuyWeeklyPayment = apps.get_model('urbanfoods', 'DeliveryGuyWeeklyPayment')
+
+    totals = {}
+    delivered = Order.objects.filter(
+        status='delivered', delivery_guy__isnull=False, delivered_at__isnull=False
+    ).values_list('delivery_guy_id', 'delivered_at', 'total')
+    for delivery_guy_id, delivered_at, total in delivered.iterator():
+        day = timezone.localdate(delivered_at)
+        week_start = day - timedelta(days=day.weekday())
+        count, revenue = totals.get((delivery_guy_id, week_start), (0, Decimal('0')))
+        totals[(delivery_guy_id, week_start)] = (count + 1, revenue + total)
+
+    for (delivery_guy_id, week_start), (count, revenue) in totals.items():
+        DeliveryGuyWeeklyPayment.objects.update_or_create(
+            delivery_guy_id=delivery_guy_id,
+            week_start=week_start,
+            week_end=week_start + timedelta(days=6),
+            defaults={'deliveries_count': count, 'total_revenue': revenue},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('urbanfoods', '0030_order_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deliveryguyweeklypayment',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, help_text="When the week's totals were frozen", null=True),
+        ),
+        migrations.AddField(
+            model_name='deliveryguyweeklypayment',
+            name='is_closed',
+            field=models.BooleanField(default=False, help_text='Totals frozen by the week-close job'),
+        ),
+        migrations.RunPython(snapshot_weekly_payments, migrations.RunPython.noop),
+    ]
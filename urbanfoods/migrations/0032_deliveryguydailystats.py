@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:36
+
+from decimal import Decimal
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def fill_daily_stats(apps, schema_editor):
+    """Fill every rider's per-day totals from delivered orders."""
+    Order = apps.get_model('urbanfoods', 'Order')
+    DeliveryGuyDailyStats = apps.get_model('urbanfoods', 'DeliveryGuyDailyStats')
+
+    totals = {}
+    delivered = Order.objects.filter(
+        status='delivered', delivery_guy__isnull=False, delivered_at__isnull=False
+    ).values_list('delivery_guy_id', 'delivered_at', 'total')
+    for delivery_guy_id, delivered_at, total in delivered.iterator():
+        key = (delivery_guy_id, timezone.localdate(delivered_at))
+        count, revenue = totals.get(key, (0, Decimal('0')))
+        totals[key] = (count + 1, revenue + total)
+
+    DeliveryGuyDailyStats.objects.bulk_create([
+        DeliveryGuyDailyStats(delivery_guy_id=delivery_guy_id, date=day, deliveries_count=count, total_revenue=revenue)
+        for (delivery_guy_id, day), (count, revenue) in totals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('urbanfoods', '0031_weekly_payment_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryGuyDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('deliveries_count', models.IntegerField(default=0)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('delivery_guy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='urbanfoods.deliveryguy')),
+            ],
+            options={
+                'verbose_name_plural': 'Delivery Guy Daily Stats',
+                'ordering': ['-date'],
+                'unique_together': {('delivery_guy', 'date')},
+            },
+        ),
+        migrations.RunPython(fill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('urbanfoods', '0032_deliveryguydailystats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['store_type', 'created_at'], name='order_store_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['delivery_guy', 'created_at'], name='order_rider_created_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:39
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+import django.db.models.deletion
+
+
+def fill_customer_summaries(apps, schema_editor):
+    Order = apps.get_model('urbanfoods', 'Order')
+    CustomerSummary = apps.get_model('urbanfoods', 'CustomerSummary')
+    rows = Order.objects.exclude(status__in=['payment_pending', 'cancelled']).values('user').annotate(
+        order_count=Count('id'),
+        total_spent=Sum('total'),
+        first_order_at=Min('created_at'),
+        last_order_at=Max('created_at'),
+    ).order_by()
+    CustomerSummary.objects.bulk_create([
+        CustomerSummary(
+            user_id=row['user'],
+            order_count=row['order_count'],
+            total_spent=row['total_spent'] or 0,
+            first_order_at=row['first_order_at'],
+            last_order_at=row['last_order_at'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('urbanfoods', '0033_order_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='order_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('order_count', models.IntegerField(default=0)),
+                ('total_spent', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('first_order_at', models.DateTimeField(blank=True, null=True)),
+                ('last_order_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Customer Summaries',
+                'indexes': [models.Index(fields=['-order_count'], name='customer_summary_orders_idx')],
+            },
+        ),
+        migrations.RunPython(fill_customer_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:41
+
+from django.db import migrations, models
+from django.db.models import Avg, Count
+
+
+def fill_rating_aggregates(apps, schema_editor):
+    FoodItem = apps.get_model('urbanfoods', 'FoodItem')
+    FoodReview = apps.get_model('urbanfoods', 'FoodReview')
+    for row in FoodReview.objects.values('food_item').annotate(n=Count('id'), avg=Avg('rating')).order_by():
+        FoodItem.objects.filter(pk=row['food_item']).update(
+            rating_count=row['n'], rating_average=round(row['avg'], 2),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('urbanfoods', '0034_customersummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fooditem',
+            name='rating_average',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='fooditem',
+            name='rating_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(fill_rating_aggregates, migrations.RunPython.noop),
+    ]
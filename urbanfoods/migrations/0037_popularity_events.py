@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('urbanfoods', '0036_fooditem_image_pipeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('counted', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='fooditem',
+            name='trending_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='fooditem',
+            index=models.Index(fields=['store_type', '-trending_score'], name='fooditem_store_trending_idx'),
+        ),
+        migrations.AddField(
+            model_name='popularityevent',
+            name='food_item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='popularity_events', to='urbanfoods.fooditem'),
+        ),
+        migrations.AddIndex(
+            model_name='popularityevent',
+            index=models.Index(fields=['created_at'], name='popularity_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='popularityevent',
+            index=models.Index(condition=models.Q(('counted', False)), fields=['id'], name='popularity_uncounted_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('urbanfoods', '0037_popularity_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_status', models.CharField(blank=True, max_length=20)),
+                ('new_status', models.CharField(blank=True, max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_events', to='urbanfoods.order')),
+            ],
+        ),
+    ]
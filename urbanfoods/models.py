@@ -1,13 +1,10 @@
 from django.db import models
-from django.db.models import Sum
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 import uuid
-from PIL import Image
-from io import BytesIO
-from django.core.files.base import ContentFile
-import os
 
 class User(AbstractUser):
     """Extended user model for students"""
@@ -50,6 +47,18 @@ class FoodItem(models.Model):
         ('liquor', 'Liquor Store'),
         ('grocery', 'Grocery Shop'),
     ]
+    IMAGE_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+    # Responsive image widths generated by the image worker (urbanfoods/images.py)
+    IMAGE_VARIANTS = {
+        'thumbnail': 200,
+        'card': 400,
+        'detail': 800,
+    }
     
     name = models.CharField(max_length=100)
     description = models.TextField()
@@ -62,97 +71,78 @@ class FoodItem(models.Model):
     is_available = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
     is_meal_of_day = models.BooleanField(default=False)
-    times_ordered = models.IntegerField(default=0)  # for popularity tracking
+    times_ordered = models.IntegerField(default=0)  # for popularity tracking, flushed from PopularityEvent
+    trending_score = models.FloatField(default=0)  # time-decayed recent units sold (urbanfoods/popularity.py)
+    rating_count = models.IntegerField(default=0)  # kept in step with reviews
+    rating_average = models.DecimalField(max_digits=3, decimal_places=2, default=0)
     store_type = models.CharField(max_length=10, choices=STORE_CHOICES, default='liquor')
     bottle_size = models.CharField(max_length=20, blank=True, help_text="For liquor items (e.g., 250ml, 500ml, 750ml)")
+    image_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, default='ready')
+    image_variants = models.JSONField(default=dict, blank=True)  # filled by the image worker
+    image_processed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
-        # Flag to track if we need to optimize
-        should_optimize = False
-        
-        # Check if this is a NEW file upload (not just a path reference)
-        if self.image:
-            try:
-                # If image.file exists, it's a NEW upload
-                if hasattr(self.image, 'file') and hasattr(self.image.file, 'read'):
-                    should_optimize = True
-            except:
-                # If any error, it's probably an existing path reference
-                should_optimize = False
-        
-        # Only optimize if we detected a new file upload
-        if should_optimize:
-            try:
-                # Reset file pointer
-                self.image.file.seek(0)
-                
-                img = Image.open(self.image.file)
-                
-                # Convert to RGB (handles PNG transparency)
-                if img.mode in ("RGBA", "LA", "P"):
-                    background = Image.new("RGB", img.size, (255, 255, 255))
-                    if img.mode in ("RGBA", "LA"):
-                        background.paste(img, mask=img.split()[-1])
-                    else:
-                        background.paste(img)
-                    img = background
-                
-                # Resize if too large
-                max_size = (800, 800)
-                if img.width > max_size[0] or img.height > max_size[1]:
-                    img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                
-                # Compress
-                buffer = BytesIO()
-                img.save(
-                    buffer,
-                    format="JPEG",
-                    quality=75,
-                    optimize=True,
-                    progressive=True
-                    # No subsampling parameter
-                )
-                buffer.seek(0)
-                
-                # Get clean filename with .jpg extension
-                original_filename = os.path.basename(self.image.name)
-                filename_without_ext = os.path.splitext(original_filename)[0]
-                new_filename = f"{filename_without_ext}.jpg"
-                
-                # Save optimized image
-                self.image.save(
-                    new_filename,
-                    ContentFile(buffer.read()),
-                    save=False
-                )
-                
-                print(f"✅ Optimized NEW upload: {self.name} - {new_filename}")
-                
-            except Exception as e:
-                print(f"⚠️ Optimization skipped for {self.name}: {e}")
-        
-        # Save the model (won't re-trigger optimization because file is already saved)
+        # New uploads are stored as-is and queued; the process_images worker
+        # does the resizing/re-encoding outside the request (urbanfoods/images.py)
+        if self.image and not self.image._committed:
+            self.image_status = 'pending'
+            self.image_variants = {}
+            self.image_processed_at = None
         super().save(*args, **kwargs)
-    
+
+    def image_variant_url(self, size, fmt='jpeg'):
+        """
+        URL of the generated ``fmt`` variant closest to (but not below) the
+        ``size`` width, falling back to the main image until variants exist.
+        """
+        names = (self.image_variants or {}).get(fmt) or {}
+        if names:
+            target = self.IMAGE_VARIANTS[size]
+            widths = sorted(int(width) for width in names)
+            width = next((w for w in widths if w >= target), widths[-1])
+            return self.image.storage.url(names[str(width)])
+        if fmt == 'jpeg' and self.image:
+            return self.image.url
+        return ''
+
+    def image_srcset(self, fmt='jpeg'):
+        """``srcset`` value listing every generated ``fmt`` variant."""
+        names = (self.image_variants or {}).get(fmt) or {}
+        return ', '.join(
+            f'{self.image.storage.url(name)} {width}w'
+            for width, name in sorted(names.items(), key=lambda pair: int(pair[0]))
+        )
+
     @property
     def is_liquor(self):
         return self.store_type == 'liquor'
 
     @property
     def average_rating(self):
-        reviews = self.reviews.all()
-        if reviews.exists():
-            return round(sum(review.rating for review in reviews) / reviews.count(), 1)
-        return 0
+        return round(float(self.rating_average), 1) if self.rating_count else 0
 
     @property
     def review_count(self):
-        return self.reviews.count()
+        return self.rating_count
+
+    @classmethod
+    def refresh_rating_aggregates(cls, food_item_ids):
+        """Recompute rating_count/rating_average for the given items in one UPDATE"""
+        reviews = FoodReview.objects.filter(food_item=OuterRef('pk')).order_by().values('food_item')
+        cls.objects.filter(pk__in=food_item_ids).update(
+            rating_count=Coalesce(Subquery(reviews.annotate(n=Count('id')).values('n')), 0),
+            rating_average=Coalesce(Subquery(reviews.annotate(avg=Avg('rating')).values('avg')), 0,
+                                    output_field=models.DecimalField(max_digits=3, decimal_places=2)),
+        )
     
     class Meta:
         ordering = ['-is_featured', '-times_ordered', 'name']
+        indexes = [
+            models.Index(fields=['image_status'], name='fooditem_image_status_idx'),
+            models.Index(fields=['store_type', '-trending_score'], name='fooditem_store_trending_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - KES {self.price}"
@@ -256,7 +246,7 @@ class Order(models.Model):
     ], default='liquor')
 
     # MPESA specific fields
-    mpesa_checkout_request_id = models.CharField(max_length=50, blank=True, null=True)
+    mpesa_checkout_request_id = models.CharField(max_length=50, blank=True, null=True, db_index=True)
     mpesa_receipt_number = models.CharField(max_length=20, blank=True, null=True)
     mpesa_transaction_date = models.CharField(max_length=20, blank=True, null=True)
 
@@ -271,6 +261,15 @@ class Order(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['store_type', 'status', 'created_at'], name='order_store_status_created_idx'),
+            models.Index(fields=['user', 'status'], name='order_user_status_idx'),
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+            models.Index(fields=['delivery_guy', 'status', 'delivered_at'], name='order_rider_status_deliv_idx'),
+            models.Index(fields=['store_type', 'created_at'], name='order_store_created_idx'),
+            models.Index(fields=['delivery_guy', 'created_at'], name='order_rider_created_idx'),
+            models.Index(fields=['created_at', 'id'], name='order_created_id_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.order_number:
@@ -281,12 +280,45 @@ class Order(models.Model):
     def __str__(self):
         return f"Order {self.order_number} - {self.user.username}"
 
+class CustomerSummary(models.Model):
+    """Lifetime order stats per customer, kept in step with order status changes"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='order_summary')
+    order_count = models.IntegerField(default=0)
+    total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    first_order_at = models.DateTimeField(null=True, blank=True)
+    last_order_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Customer Summaries"
+        indexes = [
+            models.Index(fields=['-order_count'], name='customer_summary_orders_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}: {self.order_count} orders, KES {self.total_spent}"
+
 class OrderItem(models.Model):
     """Items in an order"""
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
     food_item = models.ForeignKey(FoodItem, on_delete=models.PROTECT)
     quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
     price_at_order = models.DecimalField(max_digits=10, decimal_places=2)  # Price snapshot
+    store_type = models.CharField(max_length=10, choices=[
+        ('food', 'Food Store'),
+        ('liquor', 'Liquor Store'),
+        ('grocery', 'Grocery Shop')
+    ], blank=True)  # Store snapshot, so analytics never join back to FoodItem
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['store_type', 'food_item'], name='orderitem_store_item_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.store_type:
+            self.store_type = self.food_item.store_type
+        super().save(*args, **kwargs)
     
     @property
     def subtotal(self):
@@ -404,13 +436,13 @@ class DeliveryGuy(models.Model):
     
     @property
     def total_deliveries(self):
-        """Count total delivered orders"""
-        return self.orders.filter(status='delivered').count()
+        """Count total delivered orders (from the weekly payment snapshots)"""
+        return self.weekly_payments.aggregate(total=Sum('deliveries_count'))['total'] or 0
     
     @property
     def total_revenue(self):
-        """Sum total delivered orders revenue"""
-        return self.orders.filter(status='delivered').aggregate(total=Sum('total'))['total'] or 0
+        """Sum total delivered orders revenue (from the weekly payment snapshots)"""
+        return self.weekly_payments.aggregate(total=Sum('total_revenue'))['total'] or 0
     
     @property
     def delivered_orders(self):
@@ -420,7 +452,7 @@ class DeliveryGuy(models.Model):
     def get_current_week_start(self):
         """Get the start date (Monday) of the current week"""
         from datetime import datetime, timedelta
-        today = timezone.now().date()
+        today = timezone.localdate()
         # Monday is 0, Sunday is 6
         days_since_monday = today.weekday()
         week_start = today - timedelta(days=days_since_monday)
@@ -515,6 +547,8 @@ class DeliveryGuyWeeklyPayment(models.Model):
     total_revenue = models.DecimalField(max_digits=10, decimal_places=2, default=0, help_text="Total revenue for the week")
     is_paid = models.BooleanField(default=False, help_text="Whether the payment has been marked as completed")
     paid_at = models.DateTimeField(null=True, blank=True, help_text="When the payment was marked as completed")
+    is_closed = models.BooleanField(default=False, help_text="Totals frozen by the week-close job")
+    closed_at = models.DateTimeField(null=True, blank=True, help_text="When the week's totals were frozen")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -527,3 +561,84 @@ class DeliveryGuyWeeklyPayment(models.Model):
     def __str__(self):
         return f"{self.delivery_guy.name} - Week of {self.week_start} ({self.deliveries_count} deliveries)"
 
+
+class DeliveryGuyDailyStats(models.Model):
+    """Per-day delivery count and revenue for each delivery guy"""
+    delivery_guy = models.ForeignKey(DeliveryGuy, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    deliveries_count = models.IntegerField(default=0)
+    total_revenue = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name_plural = "Delivery Guy Daily Stats"
+        unique_together = ('delivery_guy', 'date')
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.delivery_guy.name} - {self.date} ({self.deliveries_count} deliveries)"
+
+
+class DailySalesRollup(models.Model):
+    """Per-day sales of each item, kept in step with order status changes"""
+    date = models.DateField()
+    store_type = models.CharField(max_length=10, choices=FoodItem.STORE_CHOICES)
+    food_item = models.ForeignKey(FoodItem, on_delete=models.CASCADE, related_name='daily_sales')
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    order_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('date', 'store_type', 'food_item', 'status')
+        indexes = [
+            models.Index(fields=['store_type', 'date'], name='dailysales_store_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.food_item_id} [{self.status}] x{self.quantity}"
+
+class HourlySalesRollup(models.Model):
+    """Per-hour order counts and takings, kept in step with order status changes"""
+    date = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    store_type = models.CharField(max_length=10, choices=FoodItem.STORE_CHOICES)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    order_count = models.IntegerField(default=0)
+    items_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    delivery_fees = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('date', 'hour', 'store_type', 'status')
+        indexes = [
+            models.Index(fields=['store_type', 'date'], name='hourlysales_store_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.hour:02d}:00 {self.store_type} [{self.status}] {self.order_count} orders"
+
+class SalesEvent(models.Model):
+    """An order status change, appended by order_events and folded into the sales rollups by flush_sales_rollups"""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='sales_events')
+    old_status = models.CharField(max_length=20, blank=True)  # blank for a new order
+    new_status = models.CharField(max_length=20, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.order_id} {self.old_status or '-'} -> {self.new_status or '-'}"
+
+class PopularityEvent(models.Model):
+    """Units sold, appended at checkout and folded into FoodItem by flush_popularity"""
+    food_item = models.ForeignKey(FoodItem, on_delete=models.CASCADE, related_name='popularity_events')
+    quantity = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    counted = models.BooleanField(default=False)  # added to times_ordered yet
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='popularity_created_idx'),
+            models.Index(fields=['id'], name='popularity_uncounted_idx', condition=models.Q(counted=False)),
+        ]
+
+    def __str__(self):
+        return f"{self.food_item_id} x{self.quantity} at {self.created_at:%Y-%m-%d %H:%M}"
@@ -3,11 +3,14 @@ from django.core.mail import send_mail
 from django.conf import settings
 from django.utils import timezone
 
+from .serializers import prefetch_order_items
+
 local_time = timezone.localtime(timezone.now())
 
 def send_admin_order_notification(order):
     """Send email notification to admin when a new order is received"""
     subject = f'🔔 New Order: {order.order_number}'
+    prefetch_order_items(order)
     
     # Get order items
     items_list = "\n".join([
@@ -48,7 +51,7 @@ Total Amount: KES {order.total}
 Payment:
 --------
 Payment Method: {order.payment_method.upper()}
-Payment Type: {order.payment_type.upper()}
+Payment Type: {(order.payment_type or 'N/A').upper()}
 Payment Status: {order.payment_status.upper()}
 
 Estimated Delivery: {order.estimated_delivery.strftime('%I:%M %p')}
@@ -307,6 +310,7 @@ TipsyTheoryy Admin System
 def send_customer_order_confirmation(order):
     """Send order confirmation email to customer"""
     subject = f'Order Confirmation - {order.order_number}'
+    prefetch_order_items(order)
     
     # Get order items
     items_list = "\n".join([
@@ -0,0 +1,30 @@
+# urbanfoods/order_events.py
+"""
+Side-effects of order status changes.
+
+Every place that creates an order or changes ``Order.status`` (or its
+payment status or receipt) calls ``order_status_changed`` once the order is
+saved, so derived data stays in step no matter which view (or the Django
+admin) made the change.
+"""
+from .analytics import record_sales_transition
+from .customers import record_customer_transition
+from .order_status import record_status_transition
+from .payroll import record_delivery_transition
+from .review_prompts import record_review_transition
+
+
+def order_status_changed(order, old_status):
+    """
+    Propagate a status change (or a payment change under the same status).
+    ``old_status`` is ``None`` for a newly created order whose items have
+    already been saved.
+    """
+    # Pollers also need payment and receipt changes that keep the status
+    record_status_transition(order, old_status, order.status)
+    if old_status == order.status:
+        return
+    record_sales_transition(order, old_status, order.status)
+    record_delivery_transition(order, old_status, order.status)
+    record_customer_transition(order, old_status, order.status)
+    record_review_transition(order, old_status, order.status)
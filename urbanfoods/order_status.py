@@ -0,0 +1,104 @@
+# urbanfoods/order_status.py
+"""
+Cheap customer polling of order status.
+
+Each order's pollable state (status, payment status, receipt) is kept in the
+shared cache with a ``version`` that changes with it: ``order_events``
+republishes it whenever an order is saved with a new status, payment status
+or receipt (and the payment views do the same when they only restart the
+payment). Entries are written once the change commits, so a poll can never
+cache state that is rolled back. The polling endpoints send the version as
+their ETag. The version is an HMAC over the order number, its owner and its
+state, so only the owner (who received it with a 200) can present it. A poll
+whose ``If-None-Match`` still matches therefore gets a 304 straight from the
+cache, with no query: the session is neither loaded nor saved (see
+``PollSessionMiddleware``). Every response also carries a
+``Retry-After`` hint: short while the customer waits on M-Pesa, long once the
+order is out for delivery or finished.
+"""
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import salted_hmac
+from django.utils.http import quote_etag
+
+STATUS_KEY = 'order_status:{order_number}'
+# Transitions republish the entry; the timeout bounds edits that bypass them
+STATUS_SECONDS = 10 * 60
+
+RETRY_AFTER = {
+    'payment_pending': 3,
+    'pending': 10,
+    'preparing': 30,
+    'out_for_delivery': 60,
+    'delivered': 300,
+    'cancelled': 300,
+}
+DEFAULT_RETRY_AFTER = 15
+
+
+def _entry(order):
+    state = (order.order_number, str(order.user_id), order.status, order.payment_status,
+             order.mpesa_receipt_number or '')
+    return {
+        'status': order.status,
+        'version': salted_hmac('order_status', '|'.join(state)).hexdigest()[:32],
+    }
+
+
+def publish_status(order):
+    """Store (and so bump) an order's status version after commit. Returns the cache entry."""
+    entry = _entry(order)
+    key = STATUS_KEY.format(order_number=order.order_number)
+    transaction.on_commit(lambda: cache.set(key, entry, STATUS_SECONDS))
+    return entry
+
+
+def record_status_transition(order, old_status, new_status):
+    publish_status(order)
+
+
+def status_entry(order):
+    """The cached entry for an order just loaded from the database."""
+    entry = cache.get(STATUS_KEY.format(order_number=order.order_number))
+    if entry is None or entry['version'] != _entry(order)['version']:
+        entry = publish_status(order)
+    return entry
+
+
+def with_status_headers(response, entry):
+    response['ETag'] = quote_etag(entry['version'])
+    response['Retry-After'] = str(RETRY_AFTER.get(entry['status'], DEFAULT_RETRY_AFTER))
+    # Let the browser revalidate with If-None-Match on every poll
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def not_modified(request, order_number):
+    """
+    A 304 answered from the cache alone, or ``None`` if the view must run.
+    Matching the secret version is the authorization.
+    """
+    if 'HTTP_IF_NONE_MATCH' not in request.META:
+        return None
+    entry = cache.get(STATUS_KEY.format(order_number=order_number))
+    if entry is None:
+        return None
+    response = get_conditional_response(request, etag=quote_etag(entry['version']))
+    if response is None or response.status_code != 304:
+        return None
+    response.skip_session_save = True
+    return with_status_headers(response, entry)
+
+
+def conditional_status(view):
+    """Answer unchanged polls with a 304 before ``view`` (and its login check) runs."""
+    @wraps(view)
+    def wrapper(request, order_number, *args, **kwargs):
+        response = not_modified(request, order_number)
+        if response is None:
+            response = view(request, order_number, *args, **kwargs)
+        return response
+    return wrapper
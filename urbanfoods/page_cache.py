@@ -0,0 +1,110 @@
+# urbanfoods/page_cache.py
+"""
+Full-page cache for the storefront.
+
+Storefront pages carry nothing user-specific (the cart badge, account links
+and checkout prefill come from ``/api/me/bootstrap/``), so one rendered copy
+serves every visitor, logged in or not. Keys include the store's catalog
+``version``: any menu change produces new keys and the old pages simply
+expire. Only the query parameters the storefront reads (``PAGE_PARAMS``) are
+part of the key; a request carrying any other parameter bypasses the cache, so
+arbitrary query strings cannot fill it. ``purge_pages()`` covers what the catalog does not hash, such as
+site settings. The cache lives in the default cache, which is Redis (shared
+by all gunicorn workers) when ``REDIS_URL`` is set.
+"""
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .catalog import catalog_for
+
+PAGE_KEY = 'page:{generation}:{store_type}:{version}:{url}'
+# The GET parameters the storefront view reads
+PAGE_PARAMS = ('category', 'q', 'sort')
+GENERATION_KEY = 'page:generation'
+STATS_KEY = 'page:stats:{outcome}'
+
+
+def _generation():
+    return cache.get_or_set(GENERATION_KEY, 1, None)
+
+
+def page_key(request, store_type):
+    """The page's cache key, or ``None`` if the query string has parameters the page does not read."""
+    if any(name not in PAGE_PARAMS for name in request.GET):
+        return None
+    params = urlencode(sorted((name, request.GET[name]) for name in request.GET))
+    url = f'{request.get_host()}{request.path}?{params}'
+    url = hashlib.sha256(url.encode()).hexdigest()[:24]
+    return PAGE_KEY.format(
+        generation=_generation(),
+        store_type=store_type,
+        version=catalog_for(store_type)['version'],
+        url=url,
+    )
+
+
+def purge_pages():
+    """Drop every cached page (they are keyed by generation)."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 2, None)
+
+
+# ─── Hit-rate metric ───
+
+def _count(outcome):
+    key = STATS_KEY.format(outcome=outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def page_cache_stats():
+    """``{'hits', 'misses', 'hit_rate'}`` since the last reset."""
+    counts = cache.get_many([STATS_KEY.format(outcome=o) for o in ('hit', 'miss')])
+    hits = counts.get(STATS_KEY.format(outcome='hit'), 0)
+    misses = counts.get(STATS_KEY.format(outcome='miss'), 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+
+
+def reset_page_cache_stats():
+    cache.delete_many([STATS_KEY.format(outcome=o) for o in ('hit', 'miss')])
+
+
+# ─── View decorator ───
+
+def cache_storefront(view):
+    """Serve ``view(request, store_type)`` from the page cache for GET requests."""
+    @wraps(view)
+    def wrapper(request, store_type, *args, **kwargs):
+        seconds = settings.PAGE_CACHE_SECONDS
+        if request.method not in ('GET', 'HEAD') or not seconds:
+            return view(request, store_type, *args, **kwargs)
+
+        key = page_key(request, store_type)
+        if key is None:
+            return view(request, store_type, *args, **kwargs)
+        content = cache.get(key)
+        if content is not None:
+            _count('hit')
+            response = HttpResponse(content)
+            response['X-Page-Cache'] = 'HIT'
+            return response
+
+        _count('miss')
+        response = view(request, store_type, *args, **kwargs)
+        # A page that read the session (and so possibly the user) must never
+        # be shared
+        if response.status_code == 200 and not request.session.accessed:
+            cache.set(key, response.content, seconds)
+        response['X-Page-Cache'] = 'MISS'
+        return response
+    return wrapper
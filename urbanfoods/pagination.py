@@ -0,0 +1,92 @@
+# urbanfoods/pagination.py
+"""
+Keyset ("seek") pagination for long, append-mostly lists.
+
+Rows are ordered newest first by ``(field, id)`` and each page starts
+strictly after the last row of the previous one, so page N costs the same
+index range scan as page 1. Cursors are opaque URL-safe strings.
+"""
+import base64
+import json
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+EXACT_COUNT_LIMIT = 1000  # count exactly up to here, estimate beyond
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(value, pk):
+    raw = json.dumps([value.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """``(datetime, pk)`` from a cursor string; raises ``InvalidCursor``."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(value)
+        return moment, int(pk)
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor(f'Invalid cursor: {cursor}') from e
+
+
+def page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Clamp a ``limit`` query value to ``1..MAX_PAGE_SIZE``."""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return default
+
+
+def keyset_queryset(queryset, field, cursor=None):
+    """``queryset`` ordered by ``-field, -id``, starting after ``cursor`` (unsliced)."""
+    queryset = queryset.filter(**{f'{field}__isnull': False}).order_by(f'-{field}', '-id')
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk}))
+    return queryset
+
+
+def keyset_page(queryset, field, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of ``queryset`` ordered by ``-field, -id``.
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is ``None`` on the last page.
+    """
+    rows = list(keyset_queryset(queryset, field, cursor)[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, field), last.pk)
+
+
+def estimated_count(queryset):
+    """
+    ``(count, exact)`` for a filtered list header. Small results are counted
+    exactly (capped at ``EXACT_COUNT_LIMIT`` rows); larger ones use the
+    planner's row estimate on PostgreSQL instead of a full ``COUNT(*)``.
+    """
+    capped = queryset.order_by()[:EXACT_COUNT_LIMIT + 1].count()
+    if capped <= EXACT_COUNT_LIMIT:
+        return capped, True
+
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return max(int(plan[0]['Plan']['Plan Rows']), capped), False
+    return capped, False
@@ -0,0 +1,246 @@
+# urbanfoods/payroll.py
+"""
+Weekly payroll for delivery riders.
+
+Weeks run Monday to Sunday in local time. Each rider's weekly deliveries and
+revenue live in ``DeliveryGuyWeeklyPayment``:
+
+* the open week (and the per-day ``DeliveryGuyDailyStats``) is bumped as
+  orders move into or out of ``delivered`` (``record_delivery_transition``,
+  called from ``order_events``);
+* ``snapshot_week`` recomputes a week from raw orders and, with
+  ``close=True``, freezes it (see the ``close_payroll_week`` command).
+
+``weekly_payroll`` reads those snapshots for every rider in one query, so the
+riders page, the week-deliveries API and the CSV export share one path.
+"""
+import csv
+import logging
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import (
+    BooleanField, Count, DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value,
+)
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import DeliveryGuy, DeliveryGuyDailyStats, DeliveryGuyWeeklyPayment, Order
+
+logger = logging.getLogger(__name__)
+
+CSV_HEADER = [
+    'Rider', 'Phone', 'Active', 'Week start', 'Week end',
+    'Deliveries', 'Revenue (KES)', 'Paid', 'Paid at',
+]
+
+
+def week_bounds(day=None):
+    """``(monday, sunday)`` of the week containing ``day`` (default: today)."""
+    day = day or timezone.localdate()
+    week_start = day - timedelta(days=day.weekday())
+    return week_start, week_start + timedelta(days=6)
+
+
+def parse_week(value):
+    """Week bounds for a ``YYYY-MM-DD`` query value, falling back to this week."""
+    try:
+        day = parse_date(value) if value else None
+    except ValueError:
+        day = None
+    return week_bounds(day)
+
+
+def _week_window(week_start):
+    """Aware ``[start, end)`` datetimes covering the local week."""
+    start = timezone.make_aware(datetime.combine(week_start, time.min))
+    return start, start + timedelta(days=7)
+
+
+# ─────────────────────────────────────────────────────────────
+#  WRITE PATH
+# ─────────────────────────────────────────────────────────────
+def _bump(queryset, key, deltas):
+    """Add ``deltas`` to the row of ``queryset`` matching ``key``, creating it on a delivery."""
+    increments = {field: F(field) + value for field, value in deltas.items()}
+    if queryset.filter(**key).update(**increments):
+        return
+    model = queryset.model
+    if deltas['deliveries_count'] < 0 or model.objects.filter(**key).exists():
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Another request created the row between our update and insert
+        queryset.filter(**key).update(**increments)
+
+
+def record_delivery_transition(order, old_status, new_status):
+    """
+    Add (into ``delivered``) or remove (out of ``delivered``) an order from
+    its rider's daily stats and the snapshot for the week it was delivered
+    in. Closed weeks are left frozen. Failures are logged; ``snapshot_week``
+    repairs any drift.
+    """
+    if 'delivered' not in (old_status, new_status) or old_status == new_status:
+        return
+    if not order.delivery_guy_id or not order.delivered_at:
+        return
+
+    sign = 1 if new_status == 'delivered' else -1
+    day = timezone.localdate(order.delivered_at)
+    week_start, week_end = week_bounds(day)
+    deltas = {'deliveries_count': sign, 'total_revenue': sign * order.total}
+
+    try:
+        with transaction.atomic():
+            _bump(
+                DeliveryGuyDailyStats.objects.all(),
+                {'delivery_guy_id': order.delivery_guy_id, 'date': day},
+                deltas,
+            )
+            _bump(
+                DeliveryGuyWeeklyPayment.objects.filter(is_closed=False),
+                {'delivery_guy_id': order.delivery_guy_id, 'week_start': week_start, 'week_end': week_end},
+                deltas,
+            )
+    except Exception:
+        logger.exception("Failed to update delivery stats for order %s", order.order_number)
+
+
+def _delivered_between(start, end):
+    """Orders delivered by a rider in ``[start, end)``."""
+    return Order.objects.filter(
+        status='delivered',
+        delivery_guy__isnull=False,
+        delivered_at__gte=start,
+        delivered_at__lt=end,
+    )
+
+
+def snapshot_week(week_start, close=False):
+    """
+    Recompute every rider's daily and weekly totals for a week from delivered
+    orders and store them, optionally freezing the week. Already-closed weekly
+    rows are not touched. Returns the number of weekly rows written.
+    """
+    week_start, week_end = week_bounds(week_start)
+    window_start, window_end = _week_window(week_start)
+
+    delivered = _delivered_between(window_start, window_end)
+    totals = {
+        row['delivery_guy']: row
+        for row in delivered.values('delivery_guy').annotate(
+            deliveries=Count('id'), revenue=Sum('total'),
+        ).order_by()
+    }
+    daily_rows = [
+        DeliveryGuyDailyStats(
+            delivery_guy_id=row['delivery_guy'],
+            date=row['day'],
+            deliveries_count=row['deliveries'],
+            total_revenue=row['revenue'] or 0,
+        )
+        for row in delivered.annotate(day=TruncDate('delivered_at')).values('delivery_guy', 'day').annotate(
+            deliveries=Count('id'), revenue=Sum('total'),
+        ).order_by()
+    ]
+    existing = set(
+        DeliveryGuyWeeklyPayment.objects.filter(week_start=week_start, week_end=week_end)
+        .values_list('delivery_guy_id', flat=True)
+    )
+    closed_at = timezone.now() if close else None
+
+    written = 0
+    with transaction.atomic():
+        DeliveryGuyDailyStats.objects.filter(date__gte=week_start, date__lte=week_end).delete()
+        DeliveryGuyDailyStats.objects.bulk_create(daily_rows)
+
+        for delivery_guy_id in set(totals) | existing:
+            row = totals.get(delivery_guy_id, {})
+            values = {
+                'deliveries_count': row.get('deliveries', 0),
+                'total_revenue': row.get('revenue') or 0,
+            }
+            if close:
+                values.update(is_closed=True, closed_at=closed_at)
+            payment, created = DeliveryGuyWeeklyPayment.objects.select_for_update().get_or_create(
+                delivery_guy_id=delivery_guy_id, week_start=week_start, week_end=week_end, defaults=values,
+            )
+            if created:
+                written += 1
+            elif not payment.is_closed:
+                for field, value in values.items():
+                    setattr(payment, field, value)
+                payment.save(update_fields=[*values, 'updated_at'])
+                written += 1
+    return written
+
+
+# ─────────────────────────────────────────────────────────────
+#  READ PATH
+# ─────────────────────────────────────────────────────────────
+def weekly_payroll(week_start=None, delivery_guy_ids=None):
+    """
+    One row per rider for the week starting ``week_start``:
+    ``guy, week_start, week_end, week_deliveries, week_revenue, is_paid,
+    paid_at, is_closed, total_deliveries, total_revenue``.
+    """
+    week_start, week_end = week_bounds(week_start)
+    money = DecimalField(max_digits=12, decimal_places=2)
+    snapshot = DeliveryGuyWeeklyPayment.objects.filter(
+        delivery_guy=OuterRef('pk'), week_start=week_start, week_end=week_end,
+    )
+
+    def field(name):
+        return Subquery(snapshot.values(name)[:1])
+
+    riders = DeliveryGuy.objects.all()
+    if delivery_guy_ids is not None:
+        riders = riders.filter(pk__in=delivery_guy_ids)
+    riders = riders.annotate(
+        week_deliveries=Coalesce(field('deliveries_count'), Value(0), output_field=IntegerField()),
+        week_revenue=Coalesce(field('total_revenue'), Value(0), output_field=money),
+        is_paid=Coalesce(field('is_paid'), Value(False), output_field=BooleanField()),
+        paid_at=field('paid_at'),
+        is_closed=Coalesce(field('is_closed'), Value(False), output_field=BooleanField()),
+        lifetime_deliveries=Coalesce(Sum('weekly_payments__deliveries_count'), Value(0)),
+        lifetime_revenue=Coalesce(Sum('weekly_payments__total_revenue'), Value(0), output_field=money),
+    ).order_by('name')
+
+    return [
+        {
+            'guy': guy,
+            'week_start': week_start,
+            'week_end': week_end,
+            'week_deliveries': guy.week_deliveries,
+            'week_revenue': guy.week_revenue,
+            'is_paid': guy.is_paid,
+            'paid_at': guy.paid_at if guy.is_paid else None,
+            'is_closed': guy.is_closed,
+            'total_deliveries': guy.lifetime_deliveries,
+            'total_revenue': guy.lifetime_revenue,
+        }
+        for guy in riders
+    ]
+
+
+def write_payroll_csv(rows, stream):
+    """Write ``weekly_payroll`` rows to a file-like ``stream`` as CSV."""
+    writer = csv.writer(stream)
+    writer.writerow(CSV_HEADER)
+    for row in rows:
+        guy = row['guy']
+        writer.writerow([
+            guy.name,
+            guy.phone_number,
+            'yes' if guy.is_active else 'no',
+            row['week_start'].isoformat(),
+            row['week_end'].isoformat(),
+            row['week_deliveries'],
+            f"{row['week_revenue']:.2f}",
+            'yes' if row['is_paid'] else 'no',
+            timezone.localtime(row['paid_at']).strftime('%Y-%m-%d %H:%M') if row['paid_at'] else '',
+        ])
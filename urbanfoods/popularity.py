@@ -0,0 +1,91 @@
+# urbanfoods/popularity.py
+"""
+Product popularity without write contention at checkout.
+
+Checkouts only append ``PopularityEvent`` rows (one INSERT, no lock on the
+hot product rows). The ``flush_popularity`` command periodically folds the
+uncounted events into ``FoodItem.times_ordered`` and recomputes
+``FoodItem.trending_score``. The score is the units sold over the last
+``TRENDING_WINDOW``, each weighted by ``0.5 ** (age / TRENDING_HALF_LIFE)``,
+so a burst of sales today outranks a steady seller from last week. Counted
+events older than the window are deleted.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import FoodItem, PopularityEvent
+
+TRENDING_HALF_LIFE = timedelta(days=2)
+TRENDING_WINDOW = timedelta(days=14)
+COUNT_BATCH = 1000
+
+
+def record_sales(lines):
+    """Append units sold; ``lines`` are ``(food_item_id, quantity)`` pairs."""
+    PopularityEvent.objects.bulk_create([
+        PopularityEvent(food_item_id=food_item_id, quantity=quantity)
+        for food_item_id, quantity in lines
+    ])
+
+
+def count_events():
+    """Fold uncounted events into ``times_ordered``. Returns the number of events counted."""
+    counted = 0
+    while True:
+        with transaction.atomic():
+            # Concurrent flushers take disjoint batches
+            ids = list(
+                PopularityEvent.objects.select_for_update(skip_locked=True)
+                .filter(counted=False)
+                .order_by('id')
+                .values_list('id', flat=True)[:COUNT_BATCH]
+            )
+            if not ids:
+                return counted
+            units = (
+                PopularityEvent.objects.filter(id__in=ids)
+                .values('food_item_id')
+                .annotate(units=Sum('quantity'))
+                .order_by()
+            )
+            FoodItem.objects.bulk_update(
+                [FoodItem(id=row['food_item_id'], times_ordered=F('times_ordered') + row['units']) for row in units],
+                ['times_ordered'],
+            )
+            PopularityEvent.objects.filter(id__in=ids).update(counted=True)
+        counted += len(ids)
+
+
+def refresh_trending(now=None):
+    """Recompute every item's ``trending_score``. Returns the number of trending items."""
+    now = now or timezone.now()
+    cutoff = now - TRENDING_WINDOW
+    half_life = TRENDING_HALF_LIFE.total_seconds()
+
+    hourly = (
+        PopularityEvent.objects.filter(created_at__gte=cutoff)
+        .annotate(hour=TruncHour('created_at'))
+        .values('food_item_id', 'hour')
+        .annotate(units=Sum('quantity'))
+        .order_by()
+    )
+    scores = defaultdict(float)
+    for row in hourly:
+        age = max((now - row['hour']).total_seconds(), 0)
+        scores[row['food_item_id']] += row['units'] * 0.5 ** (age / half_life)
+
+    with transaction.atomic():
+        FoodItem.objects.exclude(id__in=list(scores)).exclude(trending_score=0).update(trending_score=0)
+        FoodItem.objects.bulk_update(
+            [FoodItem(id=food_item_id, trending_score=round(score, 4)) for food_item_id, score in scores.items()],
+            ['trending_score'],
+            batch_size=500,
+        )
+
+    PopularityEvent.objects.filter(counted=True, created_at__lt=cutoff).delete()
+    return len(scores)
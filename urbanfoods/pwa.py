@@ -0,0 +1,97 @@
+# urbanfoods/pwa.py
+"""
+Service worker generation.
+
+``service-worker.js`` is rendered from ``service-worker.template.js`` with
+the collected (content-hashed) URLs of ``PRECACHE_STATIC``, the storefront
+pages (``/`` is only a per-session redirect, so it is never precached) and a
+``CACHE_VERSION`` derived from the template and those files' contents, so a
+deploy only invalidates clients' caches when something they precache
+actually changed. Run by the ``build_service_worker`` command and after
+every ``collectstatic`` (see ``storage.py``).
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.urls import reverse
+
+from .catalog import DEFAULT_STORE_TYPE, STORE_TYPES
+
+TEMPLATE_PATH = settings.BASE_DIR / 'service-worker.template.js'
+OUTPUT_PATH = settings.BASE_DIR / 'service-worker.js'
+
+# Static files every client gets on install (names as passed to {% static %})
+PRECACHE_STATIC = [
+    'styles.css',
+    'js/homepage.js',
+    'js/order_detail.js',
+    'images/favicon.png',
+    'images/bg.jpeg',
+    'images/bg-pattern.jpg',
+]
+
+
+def _collected(name, storage):
+    """``(url, content, hashed)`` of a static file, preferring its hashed collected copy."""
+    try:
+        stored = storage.stored_name(name)
+    except (AttributeError, ValueError):
+        # Not a manifest storage, or collectstatic has not run yet
+        stored = None
+    if stored and stored != name and storage.exists(stored):
+        with storage.open(stored) as fh:
+            return settings.STATIC_URL + stored, fh.read(), True
+
+    path = finders.find(name)
+    if not path:
+        raise FileNotFoundError(f'Static file {name} not found')
+    with open(path, 'rb') as fh:
+        return settings.STATIC_URL + name, fh.read(), False
+
+
+def store_pages():
+    """Every storefront URL, the default store first (the offline stand-in for ``/``)."""
+    stores = sorted(STORE_TYPES, key=lambda store_type: store_type != DEFAULT_STORE_TYPE)
+    return [reverse('storefront', args=[store_type]) for store_type in stores]
+
+
+def render_service_worker(storage=None):
+    """``(javascript, cache_version)`` for the current static files."""
+    storage = storage or staticfiles_storage
+    template = TEMPLATE_PATH.read_text()
+
+    pages = store_pages()
+    digest = hashlib.sha256(template.encode())
+    digest.update(json.dumps(pages).encode())
+    urls, all_hashed = [], True
+    for name in PRECACHE_STATIC:
+        url, content, hashed = _collected(name, storage)
+        urls.append(url)
+        all_hashed = all_hashed and hashed
+        digest.update(url.encode())
+        digest.update(hashlib.sha256(content).digest())
+    version = digest.hexdigest()[:12]
+
+    javascript = (
+        template
+        .replace('__CACHE_VERSION__', version)
+        .replace('__PRECACHE_STATIC__', json.dumps(urls, indent=2))
+        .replace('__STATIC_IS_HASHED__', 'true' if all_hashed else 'false')
+        .replace('__STORE_PAGES__', json.dumps(pages, indent=2))
+    )
+    return javascript, version
+
+
+def write_service_worker(storage=None, path=OUTPUT_PATH):
+    """Regenerate the service worker file. Returns ``(cache_version, changed)``."""
+    javascript, version = render_service_worker(storage)
+    try:
+        changed = path.read_text() != javascript
+    except FileNotFoundError:
+        changed = True
+    if changed:
+        path.write_text(javascript)
+    return version, changed
@@ -0,0 +1,74 @@
+# urbanfoods/review_prompts.py
+"""
+The "rate your order" prompt shown on the storefront.
+
+Every page view asks whether the user has a delivered order left to review,
+and for almost everyone the answer is no. ``pending_review_for`` therefore
+caches a per-user pointer to the next reviewable order, or a marker meaning
+"nothing to review". Most page loads answer from the cache with no query, and
+a positive answer costs one query for the order's items. The pointer is
+dropped, once the change commits, when an order is delivered (from
+``order_events``), when a prompt is dismissed and when reviews are submitted.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Order
+from .serializers import order_items_of, serialize_order_item
+
+MAX_PROMPTS = 3
+POINTER_KEY = 'review_prompt:{user_id}'
+# Invalidation keeps the pointer right; the timeout only bounds stale entries
+POINTER_SECONDS = 60 * 60 * 24
+NOTHING = 'none'
+
+
+def _reviewable(user_id):
+    return Order.objects.filter(
+        user_id=user_id,
+        status='delivered',
+        has_reviewed_items=False,
+        review_prompted_count__lt=MAX_PROMPTS,
+    )
+
+
+def _next_reviewable(user_id):
+    return _reviewable(user_id).order_by('delivered_at').values_list('id', 'order_number')
+
+
+def _pointer(user_id):
+    """``(order_id, order_number)`` of the oldest reviewable order, or ``NOTHING``."""
+    key = POINTER_KEY.format(user_id=user_id)
+    pointer = cache.get(key)
+    if pointer is None:
+        order = _next_reviewable(user_id).first()
+        pointer = tuple(order) if order else NOTHING
+        cache.set(key, pointer, POINTER_SECONDS)
+    return pointer
+
+
+def pending_review_for(user):
+    """The oldest delivered order without reviews, if under the prompt limit, or ``None``."""
+    pointer = _pointer(user.id)
+    if pointer == NOTHING:
+        return None
+    order_id, order_number = pointer
+    return {
+        'order_number': order_number,
+        'items': [serialize_order_item(item) for item in order_items_of(order_id)],
+    }
+
+
+def forget_review_prompt(user_id):
+    """
+    Drop the user's pointer once the current transaction commits, so a
+    concurrent page view cannot re-cache the state it is replacing.
+    """
+    key = POINTER_KEY.format(user_id=user_id)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def record_review_transition(order, old_status, new_status):
+    """Delivering an order (or undoing a delivery) changes what there is to review."""
+    if 'delivered' in (old_status, new_status):
+        forget_review_prompt(order.user_id)
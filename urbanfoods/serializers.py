@@ -0,0 +1,116 @@
+# urbanfoods/serializers.py
+"""
+Shared loading and JSON shaping for orders and carts.
+
+Anything that walks ``order.items`` or ``cart.items`` should load them via
+``orders_with_items`` / ``prefetch_order_items`` / ``load_cart`` so the items
+and their food items arrive in one extra query, trimmed to the columns the
+API responses, Telegram messages and emails actually use.
+"""
+from django.db.models import Prefetch, prefetch_related_objects
+
+from .models import Cart, CartItem, Order, OrderItem
+
+FOOD_ITEM_FIELDS = (
+    'food_item__id', 'food_item__name', 'food_item__image', 'food_item__image_variants',
+    'food_item__bottle_size', 'food_item__price', 'food_item__store_type',
+)
+ORDER_LIST_FIELDS = ('id', 'order_number', 'created_at', 'total', 'status')
+
+
+def _order_items():
+    return OrderItem.objects.select_related('food_item').only(
+        'id', 'order_id', 'food_item_id', 'quantity', 'price_at_order', 'store_type', *FOOD_ITEM_FIELDS
+    )
+
+
+def order_items_prefetch():
+    """``Prefetch`` for ``Order.items`` with the food item joined in."""
+    return Prefetch('items', queryset=_order_items())
+
+
+def order_items_of(order_id):
+    """An order's items with their food items, in one query, without loading the order."""
+    return _order_items().filter(order_id=order_id)
+
+
+def _cart_items():
+    return CartItem.objects.select_related('food_item').only(
+        'id', 'cart_id', 'food_item_id', 'quantity', *FOOD_ITEM_FIELDS
+    ).order_by('added_at', 'id')
+
+
+def cart_items_prefetch():
+    """``Prefetch`` for ``Cart.items`` with the food item joined in."""
+    return Prefetch('items', queryset=_cart_items())
+
+
+def user_cart_items(user):
+    """A user's cart lines with their food items, in one query (no cart is created)."""
+    return _cart_items().filter(cart__user=user)
+
+
+def orders_with_items(queryset=None, fields=None):
+    """Orders with items prefetched; ``fields`` projects the order columns."""
+    queryset = Order.objects.all() if queryset is None else queryset
+    if fields:
+        queryset = queryset.only(*fields)
+    return queryset.prefetch_related(order_items_prefetch())
+
+
+def prefetch_order_items(order):
+    """Load an already-fetched order's items (one query), unless they are cached."""
+    if 'items' not in getattr(order, '_prefetched_objects_cache', {}):
+        prefetch_related_objects([order], order_items_prefetch())
+    return order
+
+
+def load_cart(user):
+    """The user's cart with its items prefetched."""
+    cart, _ = Cart.objects.get_or_create(user=user)
+    prefetch_related_objects([cart], cart_items_prefetch())
+    return cart
+
+
+def _image_url(food_item):
+    # Carts and review prompts show small thumbnails
+    return food_item.image_variant_url('thumbnail') if food_item.image else ''
+
+
+def serialize_order_item(item):
+    food_item = item.food_item
+    return {
+        'id': item.id,
+        'food_item_id': food_item.id,
+        'name': food_item.name,
+        'image_url': _image_url(food_item),
+        'quantity': item.quantity,
+        'price': float(item.price_at_order),
+        'subtotal': float(item.subtotal),
+        # Kept for the admin customer modal, which reads item.food_item.name
+        'food_item': {'name': food_item.name},
+    }
+
+
+def serialize_order(order):
+    return {
+        'order_number': order.order_number,
+        'created_at': order.created_at.isoformat(),
+        'total': float(order.total),
+        'status': order.status,
+        'status_display': order.get_status_display(),
+        'items': [serialize_order_item(item) for item in order.items.all()],
+    }
+
+
+def serialize_cart_item(item):
+    food_item = item.food_item
+    return {
+        'id': item.id,
+        'food_item_id': food_item.id,
+        'name': food_item.name,
+        'price': float(food_item.price),
+        'quantity': item.quantity,
+        'subtotal': float(item.subtotal),
+        'image': _image_url(food_item) or None,
+    }
@@ -1,5 +1,6 @@
 from django.contrib.sitemaps import Sitemap
 from django.urls import reverse
+from .catalog import STORE_TYPES
 from .models import FoodItem
 
 class StaticViewSitemap(Sitemap):
@@ -7,10 +8,10 @@ class StaticViewSitemap(Sitemap):
     changefreq = "daily"
 
     def items(self):
-        return ["homepage"]
+        return STORE_TYPES
 
     def location(self, item):
-        return reverse(item)
+        return reverse("storefront", args=[item])
 
 
 class FoodItemSitemap(Sitemap):
@@ -21,4 +22,4 @@ class FoodItemSitemap(Sitemap):
         return FoodItem.objects.filter(is_available=True)
 
     def location(self, obj):
-        return "/"  # homepage until you add slugs
+        return reverse("storefront", args=[obj.store_type])  # storefront until you add slugs
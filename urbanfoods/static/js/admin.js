@@ -0,0 +1,283 @@
+// Admin panel shell: sidebar, notifications and shared helpers.
+
+// Sidebar toggle for mobile
+function toggleSidebar() {
+    document.getElementById('adminSidebar').classList.toggle('show');
+}
+
+// Desktop sidebar toggle
+function toggleDesktopSidebar() {
+    const sidebar = document.getElementById('adminSidebar');
+    const toggleIcon = document.querySelector('#sidebarToggle i');
+    const isCollapsed = sidebar.classList.contains('collapsed');
+
+    if (isCollapsed) {
+        sidebar.classList.remove('collapsed');
+        if (toggleIcon) {
+            toggleIcon.className = 'fas fa-bars fa-lg';
+        }
+        localStorage.setItem('sidebar-collapsed', 'false');
+    } else {
+        sidebar.classList.add('collapsed');
+        if (toggleIcon) {
+            toggleIcon.className = 'fas fa-angle-right fa-lg';
+        }
+        localStorage.setItem('sidebar-collapsed', 'true');
+    }
+}
+
+// Close sidebar when clicking outside on mobile
+document.addEventListener('click', function(event) {
+    const sidebar = document.getElementById('adminSidebar');
+    const toggle = document.querySelector('.mobile-menu-toggle');
+
+    if (!sidebar.contains(event.target) && !toggle.contains(event.target) && sidebar.classList.contains('show')) {
+        sidebar.classList.remove('show');
+    }
+});
+
+// Real-time notifications
+let lastNotificationCheck = new Date().toISOString();
+
+function checkNotifications() {
+    fetch(`/admin-panel/api/orders/new/?last_check=${lastNotificationCheck}`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.success && data.new_orders_count > 0) {
+                updateNotificationBadge(data.new_orders_count);
+                updateNotificationList(data.orders);
+                showBrowserNotification(data.new_orders_count);
+            }
+            lastNotificationCheck = data.timestamp;
+        })
+        .catch(error => console.error('Error checking notifications:', error));
+}
+
+function updateNotificationBadge(count) {
+    const badge = document.getElementById('pendingOrdersBadge');
+    const headerBadge = document.getElementById('notificationCount');
+
+    if (count > 0) {
+        badge.textContent = count;
+        badge.style.display = 'inline';
+        headerBadge.textContent = count;
+        headerBadge.style.display = 'inline';
+    } else {
+        badge.style.display = 'none';
+        headerBadge.style.display = 'none';
+    }
+}
+
+function updateNotificationList(orders) {
+    const list = document.getElementById('notificationList');
+    if (orders.length > 0) {
+        const items = orders.slice(0, 5).map(order => `
+            <li><a class="dropdown-item" href="/admin-panel/liquor/orders/${order.order_number}/">
+                <small><strong>New Order:</strong> ${order.order_number}</small><br>
+                <small class="text-muted">${order.user} - KES ${order.total}</small>
+            </a></li>
+        `).join('');
+        list.innerHTML = items + '<li><hr class="dropdown-divider"></li><li><a class="dropdown-item text-center" href="/admin-panel/liquor/orders/">View All Orders</a></li>';
+    }
+}
+
+function showBrowserNotification(count) {
+    if (Notification.permission === 'granted') {
+        new Notification('New Orders Received!', {
+            body: `${count} new order(s) pending`,
+            icon: '/static/images/favicon.png'
+        });
+
+        // Play sound alert
+        playNotificationSound();
+    }
+}
+
+function playNotificationSound() {
+    // Create audio element for notification sound
+    const audio = new Audio('/static/images/notification.mp3');
+    audio.volume = 0.5;
+
+    // Fallback to beep if audio file doesn't exist
+    audio.addEventListener('error', function() {
+        // Simple beep using Web Audio API
+        try {
+            const context = new (window.AudioContext || window.webkitAudioContext)();
+            const oscillator = context.createOscillator();
+            const gainNode = context.createGain();
+
+            oscillator.connect(gainNode);
+            gainNode.connect(context.destination);
+
+            oscillator.frequency.setValueAtTime(800, context.currentTime);
+            oscillator.frequency.setValueAtTime(600, context.currentTime + 0.1);
+
+            gainNode.gain.setValueAtTime(0.3, context.currentTime);
+            gainNode.gain.exponentialRampToValueAtTime(0.01, context.currentTime + 0.3);
+
+            oscillator.start(context.currentTime);
+            oscillator.stop(context.currentTime + 0.3);
+        } catch (e) {
+            console.log('Audio not supported');
+        }
+    });
+
+    audio.play().catch(e => console.log('Audio play failed:', e));
+}
+
+// Request notification permission
+if (Notification.permission === 'default') {
+    Notification.requestPermission();
+}
+
+// Check for notifications every 30 seconds
+setInterval(checkNotifications, 30000);
+
+// Initial check
+checkNotifications();
+
+// Global utility functions
+function showAlert(message, type = 'success') {
+    const alertDiv = document.createElement('div');
+    alertDiv.className = `alert alert-${type} alert-dismissible fade show position-fixed`;
+    alertDiv.style.cssText = 'top: 20px; right: 20px; z-index: 9999; min-width: 300px;';
+    alertDiv.innerHTML = `
+        ${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+    `;
+    document.body.appendChild(alertDiv);
+
+    setTimeout(() => {
+        alertDiv.remove();
+    }, 5000);
+}
+
+function showLoading(button) {
+    const originalText = button.innerHTML;
+    button.innerHTML = '<span class="loading-spinner me-2"></span>Processing...';
+    button.disabled = true;
+    return originalText;
+}
+
+function hideLoading(button, originalText) {
+    button.innerHTML = originalText;
+    button.disabled = false;
+}
+
+// Theme management
+function toggleThemeMenu() {
+    const menu = document.getElementById('themeMenu');
+    if (menu) {
+        const isHidden = menu.style.display === 'none' || !menu.style.display;
+        menu.style.display = isHidden ? 'block' : 'none';
+    }
+}
+
+function setTheme(theme) {
+    localStorage.setItem('admin-theme', theme);
+    applyTheme(theme);
+    const menu = document.getElementById('themeMenu');
+    if (menu) {
+        menu.style.display = 'none';
+    }
+}
+
+function applyTheme(theme) {
+    const html = document.documentElement;
+    const themeIcon = document.getElementById('themeIcon');
+
+    if (theme === 'dark') {
+        html.setAttribute('data-bs-theme', 'dark');
+        if (themeIcon) {
+            themeIcon.className = 'fas fa-moon text-primary';
+        }
+    } else if (theme === 'light') {
+        html.removeAttribute('data-bs-theme');
+        if (themeIcon) {
+            themeIcon.className = 'fas fa-sun text-warning';
+        }
+    } else if (theme === 'auto') {
+        const prefersDark = window.matchMedia('(prefers-color-scheme: dark)').matches;
+        if (prefersDark) {
+            html.setAttribute('data-bs-theme', 'dark');
+            if (themeIcon) {
+                themeIcon.className = 'fas fa-moon text-primary';
+            }
+        } else {
+            html.removeAttribute('data-bs-theme');
+            if (themeIcon) {
+                themeIcon.className = 'fas fa-sun text-warning';
+            }
+        }
+    }
+}
+
+// Initialize theme and sidebar on page load
+document.addEventListener('DOMContentLoaded', function() {
+    const savedTheme = localStorage.getItem('admin-theme') || 'light';
+    applyTheme(savedTheme);
+
+    // Listen for system theme changes when in auto mode
+    if (savedTheme === 'auto') {
+        window.matchMedia('(prefers-color-scheme: dark)').addEventListener('change', function(e) {
+            applyTheme('auto');
+        });
+    }
+
+    // Initialize sidebar state
+    const sidebarCollapsed = localStorage.getItem('sidebar-collapsed') === 'true';
+    const sidebar = document.getElementById('adminSidebar');
+    const toggleIcon = document.querySelector('#sidebarToggle i');
+
+    if (sidebarCollapsed) {
+        sidebar.classList.add('collapsed');
+        if (toggleIcon) {
+            toggleIcon.className = 'fas fa-angle-right fa-lg';
+        }
+    } else {
+        sidebar.classList.remove('collapsed');
+        if (toggleIcon) {
+            toggleIcon.className = 'fas fa-bars fa-lg';
+        }
+    }
+
+    // Initialize tooltips
+    const tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
+    const tooltipList = tooltipTriggerList.map(function (tooltipTriggerEl) {
+        return new bootstrap.Tooltip(tooltipTriggerEl);
+    });
+});
+
+// Close theme menu when clicking outside
+document.addEventListener('click', function(event) {
+    const themeMenu = document.getElementById('themeMenu');
+    const themeButton = event.target.closest('button[onclick="toggleThemeMenu()"]');
+
+    if (themeMenu && themeButton && !themeMenu.contains(event.target) && !themeButton.contains(event.target)) {
+        if (themeMenu.style.display === 'block') {
+            themeMenu.style.display = 'none';
+        }
+    }
+});
+
+// Get CSRF token helper function
+function getCSRFToken() {
+    const tokenInput = document.querySelector('[name=csrfmiddlewaretoken]');
+    if (tokenInput) {
+        return tokenInput.value;
+    }
+    // Fallback: try to get from cookie
+    const name = 'csrftoken';
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
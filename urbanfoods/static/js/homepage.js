@@ -1,6 +1,80 @@
+// Storefront: cart, checkout, M-Pesa polling, carousel and review modals.
+// Expects storeType, deliveryFee and the userReady bootstrap promise from the
+// page; isAuthenticated and userData are filled in once it resolves.
+
+// ==================== USER BOOTSTRAP ====================
+
+// The storefront HTML is cached and shared, so the signed-in parts are
+// switched on here rather than rendered by the server
+function applyUser(me) {
+    isAuthenticated = !!me.authenticated;
+    userData = me.user || null;
+
+    document.querySelectorAll('[data-auth]').forEach(el => {
+        const visible = (el.dataset.auth === 'user') === isAuthenticated;
+        el.classList.toggle('hidden', !visible);
+        el.classList.toggle('flex', visible);
+    });
+    if (!isAuthenticated) return;
+
+    document.getElementById('profileLink').title = `${me.loyalty_points || 0} loyalty points`;
+
+    if (me.active_order) {
+        const banner = document.getElementById('activeOrderBanner');
+        banner.href = me.active_order.url;
+        document.getElementById('activeOrderNumber').textContent = me.active_order.order_number;
+        document.getElementById('activeOrderStatus').textContent = me.active_order.status_display;
+        banner.classList.remove('hidden');
+    }
+
+    // The install prompt may have fired before we knew who was signed in
+    if (deferredPrompt) {
+        document.getElementById('pwaInstallPopup').classList.remove('hidden');
+    }
+    if (isIOS() && !isInStandaloneMode()) {
+        document.getElementById('ios-install-banner').style.display = 'block';
+    }
+}
+
+const userApplied = userReady.then(me => {
+    applyUser(me);
+    return me;
+});
+
+// Function to generate star rating HTML
+function generateStarRating(rating, reviewCount) {
+    rating = parseFloat(rating) || 0;
+    reviewCount = parseInt(reviewCount) || 0;
+
+    if (rating === 0) {
+        return '<span class="text-gray-400 text-sm">No ratings yet</span>';
+    }
+
+    rating = Math.round(rating * 2) / 2; // round to nearest 0.5
+
+    let stars = '';
+    const fullStars = Math.floor(rating);
+    const hasHalfStar = rating % 1 !== 0;
+
+    for (let i = 0; i < fullStars; i++) {
+        stars += '<i class="fas fa-star text-yellow-400"></i>';
+    }
+
+    if (hasHalfStar) {
+        stars += '<i class="fas fa-star-half-alt text-yellow-400"></i>';
+    }
+
+    const emptyStars = 5 - Math.ceil(rating);
+    for (let i = 0; i < emptyStars; i++) {
+        stars += '<i class="far fa-star text-yellow-400"></i>';
+    }
+
+    return `${stars} <span class="text-sm text-gray-600 ml-1">(${rating.toFixed(1)}) ${reviewCount} review${reviewCount !== 1 ? 's' : ''}</span>`;
+}
+
 // State management
 let cartOpen = false;
-let cartData = { items: [], subtotal: 0, total: 0 };
+let cartData = { items: [], subtotal: 0, delivery_fee: deliveryFee, total: 0 };
 
 // Toggle cart
 function toggleCart() {
@@ -35,8 +109,10 @@ function updateCartUI() {
     const emptyCart = document.getElementById('emptyCart');
     const cartSummary = document.getElementById('cartSummary');
     const cartBadge = document.getElementById('cartBadge');
+    const floatingCartBadge = document.getElementById('floatingCartBadge');
 
     cartBadge.textContent = cartData.cart_count || 0;
+    floatingCartBadge.textContent = cartData.cart_count || 0;
 
     if (cartData.items.length === 0) {
         cartItems.innerHTML = '';
@@ -66,8 +142,10 @@ function updateCartUI() {
             </div>
         `).join('');
 
+        const currentDeliveryFee = Number(cartData.delivery_fee || 0);
         document.getElementById('cartSubtotal').textContent = `KES ${cartData.subtotal}`;
-        document.getElementById('cartTotal').textContent = `KES ${cartData.total + 20}`; // Assuming flat delivery fee of 20
+        document.getElementById('cartDeliveryFee').innerHTML = `<b>${currentDeliveryFee > 0 ? `KES ${currentDeliveryFee}` : 'FREE'}</b>`;
+        document.getElementById('cartTotal').textContent = `KES ${cartData.total}`;
     }
 }
 
@@ -76,6 +154,7 @@ async function addToCart(foodItemId, quantity) {
     try {
         const response = await fetch('/api/cart/add/', {
             method: 'POST',
+            credentials: 'include',
             headers: {
                 'Content-Type': 'application/json',
                 'X-CSRFToken': getCookie('csrftoken')
@@ -87,13 +166,32 @@ async function addToCart(foodItemId, quantity) {
 
         if (data.success) {
             showToast(data.message);
-            document.getElementById('cartBadge').textContent = data.cart_count;
+
+            const cartBadge = document.getElementById('cartBadge');
+            if (cartBadge) {
+                cartBadge.textContent = data.cart_count;
+            }
+
+            const floatingCartBadge = document.getElementById('floatingCartBadge');
+            if (floatingCartBadge) {
+                floatingCartBadge.textContent = data.cart_count;
+            }
+            // Reload cart if open
+            if (cartOpen) {
+                loadCart();
+            }
         } else {
             showToast(data.message || 'Please login to add items', 'error');
+            // If error is about mixing store types, reload cart to show current state
+            if (data.message && (data.message.includes('mix') || data.message.includes('Cannot'))) {
+                if (cartOpen) {
+                    loadCart();
+                }
+            }
         }
     } catch (error) {
-        console.error('Error adding to cart:', error);
-        showToast('Please login to add items to cart', 'error');
+        console.error('Add to cart JS error:', error);
+        showToast('Something went wrong. Please try again.', 'error');
     }
 }
 
@@ -144,20 +242,82 @@ async function removeFromCart(cartItemId) {
     }
 }
 
+// Store loading overlay functions
+function showStoreLoading() {
+    const overlay = document.getElementById('storeLoadingOverlay');
+    if (overlay) {
+        overlay.classList.remove('hidden');
+        overlay.classList.add('active');
+    }
+}
+
+function hideStoreLoading() {
+    const overlay = document.getElementById('storeLoadingOverlay');
+    if (overlay) {
+        overlay.classList.remove('active');
+        setTimeout(() => {
+            overlay.classList.add('hidden');
+        }, 300);
+    }
+}
+
+function showAlert(message, type) {
+    // Simple alert implementation
+    const alertDiv = document.createElement('div');
+    alertDiv.className = `alert alert-${type} alert-dismissible fade show position-fixed`;
+    alertDiv.style.cssText = 'top: 20px; right: 20px; z-index: 9999; min-width: 300px;';
+    alertDiv.innerHTML = `
+        ${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+    `;
+    document.body.appendChild(alertDiv);
+
+    setTimeout(() => {
+        alertDiv.remove();
+    }, 5000);
+}
+
+
 // Proceed to checkout
 function proceedToCheckout() {
     if (cartData.items.length === 0) return;
 
     document.getElementById('checkoutModal').classList.remove('hidden');
-    document.getElementById('checkoutTotal').textContent = `KES ${cartData.total + 20}`; // Assuming flat delivery fee of 20
+    document.getElementById('checkoutTotal').textContent = `KES ${cartData.total}`;
 
     // Pre-fill form with user profile data
-    prefillCheckoutForm();
+    if (isAuthenticated) {
+        prefillCheckoutForm();
+    }
 }
 
 // Pre-fill checkout form with user profile data
 function prefillCheckoutForm() {
-    // This will be handled in the template
+    if (userData && userData.defaultHostel) {
+        const hostelSelect = document.getElementById('hostelSelect');
+        const defaultHostel = userData.defaultHostel;
+
+        // Check if default hostel is in the predefined options
+        const options = Array.from(hostelSelect.options);
+        const matchingOption = options.find(option => option.value === defaultHostel);
+
+        if (matchingOption) {
+            hostelSelect.value = defaultHostel;
+        } else {
+            // If not in predefined options, set to "other" and show custom input
+            hostelSelect.value = 'other';
+            document.getElementById('customHostelDiv').classList.remove('hidden');
+            document.getElementById('customHostel').value = defaultHostel;
+        }
+    }
+
+    if (userData && userData.defaultRoom) {
+        document.getElementById('roomNumber').value = userData.defaultRoom;
+    }
+
+    if (userData && userData.phoneNumber) {
+        document.getElementById('phoneNumber').value = userData.phoneNumber;
+    }
 }
 
 // Handle hostel select change
@@ -176,28 +336,54 @@ document.getElementById('hostelSelect').addEventListener('change', function(e) {
     }
 });
 
+// Payment method is fixed to MPESA
+document.addEventListener('DOMContentLoaded', () => {
+    const paymentNote = document.getElementById('paymentNote');
+    if (paymentNote) {
+        paymentNote.innerHTML = 'MPESA Payment';
+    }
+});
+
 // Close checkout
 function closeCheckout() {
     document.getElementById('checkoutModal').classList.add('hidden');
 }
 
+function getTillNumber() {
+    if (storeType === 'liquor') {
+        return '8330098'
+    }else {
+    return '6960814'}
+}
+
+
+
 // Handle checkout form submission
-document.getElementById('checkoutForm').addEventListener('submit', async (e) => {
+document.getElementById('checkoutForm').addEventListener('submit', async function (e) {
     e.preventDefault();
 
+    if (!this.checkValidity()) {
+        this.reportValidity();
+        return;
+    }
+
     const hostelSelect = document.getElementById('hostelSelect');
     const customHostelInput = document.getElementById('customHostel');
-
-    // Use custom hostel name if "other" is selected
-    const hostelValue = hostelSelect.value === 'other' ? customHostelInput.value : hostelSelect.value;
+    const hostelValue = hostelSelect.value === 'other' 
+        ? customHostelInput.value 
+        : hostelSelect.value;
 
     const formData = {
         hostel: hostelValue,
         room_number: document.getElementById('roomNumber').value,
         phone_number: document.getElementById('phoneNumber').value,
-        delivery_notes: document.getElementById('deliveryNotes').value
+        delivery_notes: document.getElementById('deliveryNotes').value,
+        payment_method: 'mpesa'
     };
 
+    closeCheckout();
+    showPaymentProcessingModal(formData.phone_number, cartData.total);
+
     try {
         const response = await fetch('/api/order/place/', {
             method: 'POST',
@@ -211,24 +397,267 @@ document.getElementById('checkoutForm').addEventListener('submit', async (e) =>
         const data = await response.json();
 
         if (data.success) {
-            closeCheckout();
-            toggleCart();
-            showToast(`Order placed! Order #${data.order_number}. Estimated delivery: ${data.estimated_delivery}`);
-            document.getElementById('checkoutForm').reset();
+            // Transition from processing to verifying
+            document.getElementById('paymentProcessingModal').classList.add('hidden');
+            showPaymentVerifyingModal(data.checkout_request_id, data.order_number);
 
-            // Redirect to order tracking after 2 seconds
-            setTimeout(() => {
-                window.location.href = '/orders/';
-            }, 2000);
+            // Start polling for payment confirmation
+            pollPaymentStatus(data.checkout_request_id, data.order_number);
         } else {
-            showToast(data.message || 'Error placing order', 'error');
+            // STK push failed to initiate
+            document.getElementById('paymentProcessingModal').classList.add('hidden');
+            showPaymentFailedModal(data.message || "Payment initiation failed.");
         }
     } catch (error) {
-        console.error('Error placing order:', error);
-        showToast('Error placing order. Please try again.', 'error');
+        console.error('Checkout error:', error);
+        document.getElementById('paymentProcessingModal').classList.add('hidden');
+        showPaymentFailedModal("Network error. Please try again.");
     }
 });
 
+// document.getElementById('checkoutForm').addEventListener('submit', async (e) => {
+//     e.preventDefault();
+
+//     const hostelSelect = document.getElementById('hostelSelect');
+//     const customHostelInput = document.getElementById('customHostel');
+//     const hostelValue = hostelSelect.value === 'other' ? customHostelInput.value : hostelSelect.value;
+
+//     const formData = {
+//         hostel: hostelValue,
+//         room_number: document.getElementById('roomNumber').value,
+//         phone_number: document.getElementById('phoneNumber').value,
+//         delivery_notes: document.getElementById('deliveryNotes').value,
+//         payment_method: 'mpesa'
+//     };
+
+//     closeCheckout();
+//     showPaymentProcessingModal(formData.phone_number, cartData.total);
+
+//     try {
+//         const response = await fetch('/api/order/place/', {
+//             method: 'POST',
+//             headers: {
+//                 'Content-Type': 'application/json',
+//                 'X-CSRFToken': getCookie('csrftoken')
+//             },
+//             body: JSON.stringify(formData)
+//         });
+
+//         const data = await response.json();
+//         console.log('Order response:', data);
+
+//         if (data.success) {
+//             pollPaymentStatus(data.checkout_request_id, data.order_number);
+//         } else {
+//             document.getElementById('paymentProcessingModal').classList.add('hidden');
+//             showPaymentFailedModal(data.message);
+//         }
+//     } catch (error) {
+//         console.error('Error:', error);
+//         document.getElementById('paymentProcessingModal').classList.add('hidden');
+//         showPaymentFailedModal('Network error. Please try again.');
+//     }
+// });
+
+// Show payment processing modal
+function showPaymentProcessingModal(phoneNumber, amount) {
+    document.getElementById('processingPhoneNumber').textContent = phoneNumber;
+    document.getElementById('processingAmount').textContent = `KES ${amount}`;
+    document.getElementById('paymentProcessingModal').classList.remove('hidden');
+}
+
+// Show payment success modal
+function showPaymentSuccessModal(orderNumber, deliveryTime) {
+    document.getElementById('successOrderNumber').textContent = orderNumber;
+    document.getElementById('successDeliveryTime').textContent = deliveryTime;
+    document.getElementById('paymentSuccessModal').classList.remove('hidden');
+}
+
+// Show payment verifying modal
+// function showPaymentVerifyingModal() {
+//     document.getElementById('paymentVerifyingModal').classList.remove('hidden');
+// }
+
+// function hidePaymentVerifyingModal() {
+//     document.getElementById('paymentVerifyingModal').classList.add('hidden');
+// }
+
+
+// Show payment failed modal
+function showPaymentFailedModal(reason) {
+    document.getElementById('failureReason').textContent = reason;
+    document.getElementById('paymentFailedModal').classList.remove('hidden');
+}
+
+// Poll for payment status
+async function pollPaymentStatus(checkoutRequestId, orderNumber) {
+    let attempts = 0;
+    const maxAttempts = 40;
+    // The server says how soon to ask again (Retry-After); 3s until it does
+    let delay = 3000;
+
+    const poll = async () => {
+        attempts++;
+
+        try {
+            // First check order status (most reliable)
+            const orderResponse = await fetch(`/api/order/payment-status/${orderNumber}/`, {
+                method: 'GET',
+                headers: {
+                    'X-CSRFToken': getCookie('csrftoken')
+                }
+            });
+
+            const retryAfter = parseInt(orderResponse.headers.get('Retry-After'));
+            if (retryAfter > 0) delay = retryAfter * 1000;
+
+            // Unchanged polls are revalidated with If-None-Match by the
+            // browser and served from its cache (304)
+            const orderData = await orderResponse.json();
+            console.log(`Poll ${attempts} - Order status:`, orderData);
+
+            if (orderData.success) {
+                if (orderData.payment_status === 'completed') {
+                    // Success confirmed by callback
+                    document.getElementById('paymentProcessingModal').classList.add('hidden');
+                    hidePaymentVerifyingModal();
+                    if (typeof toggleCart === 'function') toggleCart();
+                    showPaymentSuccessModal(orderNumber, '30 minutes');
+                    document.getElementById('checkoutForm').reset();
+                    setTimeout(() => location.reload(), 2000);
+                    return; // Exit
+                } else if (orderData.payment_status === 'failed' || orderData.order_status === 'cancelled') {
+                    // Failed confirmed by callback
+                    document.getElementById('paymentProcessingModal').classList.add('hidden');
+                    hidePaymentVerifyingModal();
+                    showPaymentFailedModal('Payment was cancelled or failed');
+                    return; // Exit
+                }
+            }
+
+            // If order is still pending, also check STK query for early failure detection
+            if (attempts % 3 === 0) { // Check STK query every 3rd attempt (every 9 seconds)
+                const stkResponse = await fetch('/api/mpesa/stk-query/', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                        'X-CSRFToken': getCookie('csrftoken')
+                    },
+                    body: JSON.stringify({
+                        checkout_request_id: checkoutRequestId
+                    })
+                });
+
+                const stkData = await stkResponse.json();
+                console.log(`Poll ${attempts} - STK query:`, stkData);
+
+                const DEFINITIVE_FAILURES = [1, 1032, 1037, 2001, 1025];
+                // 1032 = cancelled by user
+                // 1037 = timeout (DS timeout)
+                // 2001 = wrong PIN
+                // 1025 = error
+
+                const resultCode = parseInt(stkData.result_code);
+
+
+                // Only handle definite failures from STK query
+                if (stkData.success && resultCode && DEFINITIVE_FAILURES.includes(resultCode)) {
+                    document.getElementById('paymentProcessingModal').classList.add('hidden');
+                    hidePaymentVerifyingModal();
+                    showPaymentFailedModal(stkData.result_desc || 'Payment was cancelled');
+                    return;
+                }
+            }
+
+        } catch (error) {
+            console.error('Error checking status:', error);
+        }
+
+        if (attempts >= maxAttempts) {
+            document.getElementById('paymentProcessingModal').classList.add('hidden');
+            hidePaymentVerifyingModal();
+            showPaymentFailedModal('Payment confirmation timeout. Please check your orders page.');
+            return;
+        }
+        setTimeout(poll, delay);
+    };
+
+    setTimeout(poll, delay);
+}
+
+let manualCheckTimer = null;
+let currentCheckoutRequestId = null; // store for manual check use
+let currentOrderNumber = null;
+
+function showPaymentVerifyingModal(checkoutRequestId, orderNumber) {
+    currentCheckoutRequestId = checkoutRequestId;
+    currentOrderNumber = orderNumber;
+
+    document.getElementById('paymentVerifyingModal').classList.remove('hidden');
+    document.getElementById('manualCheckSection').classList.add('hidden');
+    document.getElementById('verifyingStatusText').textContent = 'Checking payment status...';
+
+    // Show manual check button after 30 seconds
+    manualCheckTimer = setTimeout(() => {
+    document.getElementById('manualCheckSection').classList.remove('hidden');
+    }, 30000);
+}
+
+function hidePaymentVerifyingModal() {
+    document.getElementById('paymentVerifyingModal').classList.add('hidden');
+    if (manualCheckTimer) {
+    clearTimeout(manualCheckTimer);
+    manualCheckTimer = null;
+    }
+}
+
+//Manual Payment Check
+async function manualPaymentCheck() {
+    const btn = document.getElementById('manualCheckBtn');
+    btn.disabled = true;
+    btn.textContent = 'Checking...';
+    document.getElementById('verifyingStatusText').textContent = 'Querying Safaricom directly...';
+
+    try {
+        const response = await fetch('/api/mpesa/stk-query/', {
+            method: 'POST',
+            headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': getCookie('csrftoken')
+            },
+            body: JSON.stringify({ checkout_request_id: currentCheckoutRequestId })
+        });
+
+        const data = await response.json();
+        console.log('Manual check result:', data);
+
+        if (data.payment_status === 'completed') {
+            hidePaymentVerifyingModal();
+            if (typeof toggleCart === 'function') toggleCart();
+            showPaymentSuccessModal(currentOrderNumber, '30 minutes');
+            document.getElementById('checkoutForm').reset();
+            setTimeout(() => location.reload(), 2000);
+
+        } else if (data.payment_status === 'failed') {
+            hidePaymentVerifyingModal();
+            showPaymentFailedModal(data.result_desc || 'Payment was not completed.');
+
+        } else {
+            // Still pending — re-enable button for another try
+            document.getElementById('verifyingStatusText').textContent =
+            'Payment still processing. Try again in a moment.';
+            btn.disabled = false;
+            btn.textContent = 'I Paid — Confirm My Order';
+        }
+    } catch (error) {
+        console.error('Manual check error:', error);
+        btn.disabled = false;
+        btn.textContent = 'I Paid — Confirm My Order';
+        document.getElementById('verifyingStatusText').textContent =
+        'Network error. Please try again.';
+    }
+}
+
 // Filter by category
 function filterCategory(button, categoryId) {
     const items = document.querySelectorAll('.food-item');
@@ -248,45 +677,107 @@ function filterCategory(button, categoryId) {
     });
     button.classList.remove('bg-white', 'text-gray-700', 'border', 'border-gray-200');
     button.classList.add('bg-orange-600', 'text-white');
+
+    // Update heading based on selected category
+    const heading = document.getElementById('allItemsHeading');
+    const storeType = document.body.dataset.storeType;
+    let headingText = '';
+
+    if (categoryId === 'all') {
+        if (storeType === 'liquor') {
+            headingText = 'All Drinks';
+        } else if (storeType === 'grocery') {
+            headingText = 'All Groceries';
+        } else {
+            headingText = '🍽️ All Meals';
+        }
+    } else {
+        const categoryName = button.dataset.name;
+        if (storeType === 'food') {
+            headingText = `🍽️ All ${categoryName}`;
+        } else {
+            headingText = `All ${categoryName}`;
+        }
+    }
+
+    heading.textContent = headingText;
 }
 
 // Search functionality
-document.getElementById('searchInput').addEventListener('input', (e) => {
-    const query = e.target.value.toLowerCase();
-    const items = document.querySelectorAll('.food-item');
+function performSearch(query) {
+    const items = document.querySelectorAll('.food-item, .grid > div.bg-white');
 
     items.forEach(item => {
-        const name = item.querySelector('h3').textContent.toLowerCase();
-        const description = item.querySelector('p').textContent.toLowerCase();
+        const nameEl = item.querySelector('h3');
+        const descEl = item.querySelector('p.text-gray-600');
 
-        if (name.includes(query) || description.includes(query)) {
-            item.style.display = 'block';
-        } else {
-            item.style.display = 'none';
+        if (nameEl && descEl) {
+            const name = nameEl.textContent.toLowerCase();
+            const description = descEl.textContent.toLowerCase();
+
+            if (name.includes(query) || description.includes(query)) {
+                item.style.display = 'block';
+            } else {
+                item.style.display = 'none';
+            }
         }
     });
-});
+}
 
-function toggleMobileMenu() {
-    const menu = document.getElementById('mobileMenu');
+const searchInput = document.getElementById('searchInput');
+const mobileSearchInput = document.getElementById('mobileSearchInput');
 
-    if (menu.classList.contains('hidden')) {
-        // Show menu with animation
-        menu.classList.remove('hidden');
-        setTimeout(() => {
-            menu.classList.remove('opacity-0', 'scale-95');
-            menu.classList.add('opacity-100', 'scale-100');
-        }, 10); // tiny delay so transition kicks in
+if (searchInput) {
+    searchInput.addEventListener('input', (e) => {
+        performSearch(e.target.value.toLowerCase());
+        // Sync mobile search if it exists
+        if (mobileSearchInput) {
+            mobileSearchInput.value = e.target.value;
+        }
+    });
+}
+
+if (mobileSearchInput) {
+    mobileSearchInput.addEventListener('input', (e) => {
+        performSearch(e.target.value.toLowerCase());
+        // Sync desktop search if it exists
+        if (searchInput) {
+            searchInput.value = e.target.value;
+        }
+    });
+}
+
+function toggleStoreDropdown() {
+    const dropdown = document.getElementById('storeDropdown');
+    const icon = document.getElementById('storeDropdownIcon');
+
+    dropdown.classList.toggle('hidden');
+    if (dropdown.classList.contains('hidden')) {
+        icon.classList.remove('fa-chevron-up');
+        icon.classList.add('fa-chevron-down');
     } else {
-        // Hide menu with animation
-        menu.classList.remove('opacity-100', 'scale-100');
-        menu.classList.add('opacity-0', 'scale-95');
-        setTimeout(() => {
-            menu.classList.add('hidden');
-        }, 300); // wait for transition to finish
+        icon.classList.remove('fa-chevron-down');
+        icon.classList.add('fa-chevron-up');
     }
 }
 
+// Close store dropdown when clicking outside
+document.addEventListener('click', function(event) {
+    const dropdown = document.getElementById('storeDropdown');
+    const dropdownButton = event.target.closest('[onclick="toggleStoreDropdown()"]');
+
+    if (dropdown && !dropdown.contains(event.target) && !dropdownButton) {
+        if (!dropdown.classList.contains('hidden')) {
+            dropdown.classList.add('hidden');
+            const icon = document.getElementById('storeDropdownIcon');
+            if (icon) {
+                icon.classList.remove('fa-chevron-up');
+                icon.classList.add('fa-chevron-down');
+            }
+        }
+    }
+});
+
 // Show toast notification
 function showToast(message, type = 'success') {
     const toast = document.getElementById('toast');
@@ -301,6 +792,14 @@ function showToast(message, type = 'success') {
     }, 3000);
 }
 
+// Dismiss delivery banner
+function dismissBanner() {
+    const banner = document.getElementById('delivery-banner');
+    if (banner) {
+        banner.style.display = 'none';
+    }
+}
+
 // Get CSRF token
 function getCookie(name) {
     let cookieValue = null;
@@ -324,20 +823,8 @@ document.getElementById('cartSidebar').addEventListener('click', (e) => {
     }
 });
 
-// Load cart on page load if user is authenticated
-document.addEventListener('DOMContentLoaded', () => {
-    fetch('/api/cart/')
-        .then(res => res.json())
-        .then(data => {
-            if (data.success) {
-                document.getElementById('cartBadge').textContent = data.cart_count || 0;
-            }
-        });
-});
-
 // Add event listeners for category buttons
 document.addEventListener('DOMContentLoaded', () => {
-    // Desktop category buttons
     document.querySelectorAll('.category-btn').forEach(btn => {
         btn.addEventListener('click', () => {
             const categoryId = btn.dataset.category;
@@ -345,62 +832,160 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     });
 
-    // Mobile category dropdown
     const categoryDropdownBtn = document.getElementById('categoryDropdownBtn');
     const categoryDropdownMenu = document.getElementById('categoryDropdownMenu');
     const categoryDropdownLabel = document.getElementById('categoryDropdownLabel');
 
-    // Toggle dropdown
-    if (categoryDropdownBtn) {
-        categoryDropdownBtn.addEventListener('click', (e) => {
-            e.stopPropagation();
+    if (categoryDropdownBtn && categoryDropdownMenu && categoryDropdownLabel) {
+        categoryDropdownBtn.addEventListener('click', (event) => {
+            event.stopPropagation();
             categoryDropdownMenu.classList.toggle('hidden');
         });
+
+        document.querySelectorAll('.category-dropdown-item').forEach(item => {
+            item.addEventListener('click', () => {
+                const categoryId = item.dataset.category;
+                const categoryName = item.dataset.name || 'All';
+                const matchingBtn = document.querySelector(`.category-btn[data-category="${categoryId}"]`);
+
+                if (matchingBtn) {
+                    filterCategory(matchingBtn, categoryId);
+                }
+
+                categoryDropdownLabel.textContent = categoryName;
+                categoryDropdownMenu.classList.add('hidden');
+            });
+        });
+
+        document.addEventListener('click', (event) => {
+            if (!categoryDropdownMenu.contains(event.target) && !categoryDropdownBtn.contains(event.target)) {
+                categoryDropdownMenu.classList.add('hidden');
+            }
+        });
     }
 
-    // Handle category selection in dropdown
-    document.querySelectorAll('.category-dropdown-item').forEach(item => {
-        item.addEventListener('click', (e) => {
-            e.preventDefault();
-            const categoryId = item.dataset.category;
-            const categoryName = item.dataset.name;
+    // Initialize carousel
+    initializeCarousel();
+});
 
-            // Update label
-            categoryDropdownLabel.textContent = categoryName;
+// Carousel functionality
+function initializeCarousel() {
+    const carouselTrack = document.getElementById('carouselTrack');
+    const carouselPrev = document.getElementById('carouselPrev');
+    const carouselNext = document.getElementById('carouselNext');
+    const carouselDots = document.getElementById('carouselDots');
+
+    if (!carouselTrack) return;
+
+    const items = carouselTrack.querySelectorAll('.carousel-item');
+    if (items.length === 0) return;
+
+    let currentIndex = 0;
+    const totalItems = items.length;
+    const itemsPerView = window.innerWidth >= 1024 ? 4 : window.innerWidth >= 768 ? 3 : 2;
+    const maxIndex = Math.max(0, totalItems - itemsPerView);
+
+    // Create dots
+    for (let i = 0; i <= maxIndex; i++) {
+        const dot = document.createElement('button');
+        dot.className = `w-2 h-2 rounded-full transition-all duration-200 ${i === 0 ? 'bg-orange-500' : 'bg-gray-300 dark:bg-gray-600'}`;
+        dot.addEventListener('click', () => goToSlide(i));
+        carouselDots.appendChild(dot);
+    }
 
-            // Close dropdown
-            categoryDropdownMenu.classList.add('hidden');
+    const dots = carouselDots.querySelectorAll('button');
 
-            // Filter items
-            const items = document.querySelectorAll('.food-item');
-            items.forEach(foodItem => {
-                if (categoryId === 'all' || foodItem.dataset.category === categoryId) {
-                    foodItem.style.display = 'block';
-                } else {
-                    foodItem.style.display = 'none';
-                }
-            });
+    function updateCarousel() {
+        const translateX = -currentIndex * (100 / itemsPerView);
+        carouselTrack.style.transform = `translateX(${translateX}%)`;
 
-            // Also update desktop buttons state
-            document.querySelectorAll('.category-btn').forEach(btn => {
-                if (btn.dataset.category === categoryId || (categoryId === 'all' && btn.dataset.category === 'all')) {
-                    btn.classList.remove('bg-white', 'text-gray-700', 'border', 'border-gray-200');
-                    btn.classList.add('bg-orange-600', 'text-white');
-                } else {
-                    btn.classList.remove('bg-orange-600', 'text-white');
-                    btn.classList.add('bg-white', 'text-gray-700', 'border', 'border-gray-200');
-                }
-            });
+        // Update dots
+        dots.forEach((dot, index) => {
+            dot.className = `w-2 h-2 rounded-full transition-all duration-200 ${index === currentIndex ? 'bg-orange-500' : 'bg-gray-300 dark:bg-gray-600'}`;
         });
+
+        // Update button states
+        carouselPrev.style.opacity = currentIndex === 0 ? '0.5' : '1';
+        carouselNext.style.opacity = currentIndex === maxIndex ? '0.5' : '1';
+    }
+
+    function goToSlide(index) {
+        currentIndex = Math.max(0, Math.min(index, maxIndex));
+        updateCarousel();
+    }
+
+    function nextSlide() {
+        if (currentIndex < maxIndex) {
+            currentIndex++;
+            updateCarousel();
+        }
+    }
+
+    function prevSlide() {
+        if (currentIndex > 0) {
+            currentIndex--;
+            updateCarousel();
+        }
+    }
+
+    // Event listeners
+    carouselPrev.addEventListener('click', prevSlide);
+    carouselNext.addEventListener('click', nextSlide);
+
+    // Touch/swipe support
+    let startX = 0;
+    let isDragging = false;
+
+    carouselTrack.addEventListener('touchstart', (e) => {
+        startX = e.touches[0].clientX;
+        isDragging = true;
     });
 
-    // Close dropdown when clicking outside
-    document.addEventListener('click', (e) => {
-        if (categoryDropdownBtn && !categoryDropdownBtn.contains(e.target) && !categoryDropdownMenu.contains(e.target)) {
-            categoryDropdownMenu.classList.add('hidden');
+    carouselTrack.addEventListener('touchmove', (e) => {
+        if (!isDragging) return;
+        const currentX = e.touches[0].clientX;
+        const diff = startX - currentX;
+
+        if (Math.abs(diff) > 50) {
+            if (diff > 0 && currentIndex < maxIndex) {
+                nextSlide();
+            } else if (diff < 0 && currentIndex > 0) {
+                prevSlide();
+            }
+            isDragging = false;
         }
     });
-});
+
+    carouselTrack.addEventListener('touchend', () => {
+        isDragging = false;
+    });
+
+    // Auto-play (optional)
+    let autoplayInterval = setInterval(() => {
+        if (currentIndex < maxIndex) {
+            nextSlide();
+        } else {
+            currentIndex = 0;
+            updateCarousel();
+        }
+    }, 5000);
+
+    // Pause autoplay on hover
+    carouselTrack.addEventListener('mouseenter', () => clearInterval(autoplayInterval));
+    carouselTrack.addEventListener('mouseleave', () => {
+        autoplayInterval = setInterval(() => {
+            if (currentIndex < maxIndex) {
+                nextSlide();
+            } else {
+                currentIndex = 0;
+                updateCarousel();
+            }
+        }, 5000);
+    });
+
+    // Initial update
+    updateCarousel();
+}
 
 // ==================== THEME MANAGEMENT ====================
 
@@ -443,3 +1028,764 @@ window.matchMedia('(prefers-color-scheme: dark)').addEventListener('change', fun
         setTheme('auto', false);
     }
 });
+
+// ==================== STORE SWITCHING ====================
+
+// Check if user is age verified (stored in localStorage)
+
+
+// Store switching function
+async function switchStore(storeType) {
+    // If switching to liquor store, check age verification
+    if (storeType === 'liquor') {
+        const ageVerified = sessionStorage.getItem('age_verified');
+        const isBlocked = sessionStorage.getItem('access_blocked');
+
+        // If user is blocked, show blocked screen
+        if (isBlocked === 'true') {
+            showBlockedScreen();
+            return;
+        }
+
+        // If not verified, show age verification modal
+        if (ageVerified !== 'true') {
+            showAgeVerificationModal();
+            return;
+        }
+    }
+
+    // Check if cart has items of different store type
+    if (isAuthenticated) {
+        try {
+            const cartResponse = await fetch('/api/cart/');
+            const cartData = await cartResponse.json();
+
+            if (cartData.success && cartData.items.length > 0) {
+                // Check if any cart item is from different store type
+                const hasDifferentStoreType = cartData.items.some(item => {
+                    // We'll check this on the backend, but show warning here
+                    return true; // Assume we need to clear cart
+                });
+
+                if (hasDifferentStoreType) {
+                    const confirmClear = confirm('Switching stores will clear your current cart. Continue?');
+                    if (!confirmClear) {
+                        return;
+                    }
+                }
+            }
+        } catch (error) {
+            console.error('Error checking cart:', error);
+        }
+    }
+
+    // Show loading overlay
+    showStoreLoading();
+
+    try {
+        const response = await fetch('/api/store/switch/', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCookie('csrftoken')
+            },
+            body: JSON.stringify({ store_type: storeType })
+        });
+
+        const data = await response.json();
+
+        if (data.success) {
+            // Close store dropdown
+            const dropdown = document.getElementById('storeDropdown');
+            if (dropdown) {
+                dropdown.classList.add('hidden');
+                const icon = document.getElementById('storeDropdownIcon');
+                if (icon) {
+                    icon.classList.remove('fa-chevron-up');
+                    icon.classList.add('fa-chevron-down');
+                }
+            }
+
+            // Go to the new store's page (overlay will persist during navigation)
+            setTimeout(() => {
+                window.location.href = data.url;
+            }, 3000);
+
+        } else {
+            // Hide overlay on error
+            hideStoreLoading();
+            showToast(data.message || 'Welcome to Tipsy Theoryy Liqour Store', 'success');
+        }
+    } catch (error) {
+        console.error('Error switching store:', error);
+        hideStoreLoading();
+        showToast('Welcome to Tipsy Theoryy Liqour Store', 'success');
+    }
+}
+
+// Age verification function
+// Age verification function
+function verifyAge(isOfAge) {
+    const modal = document.getElementById('ageVerificationModal');
+
+    if (isOfAge) {
+        // Store age verification in sessionStorage (clears when tab closes)
+        sessionStorage.setItem('age_verified', 'true');
+        modal.classList.add('hidden');
+        // Switch to liquor store
+        switchStore('liquor');
+    } else {
+        // User is underage - BLOCK COMPLETELY
+        sessionStorage.setItem('access_blocked', 'true');
+        sessionStorage.removeItem('age_verified');
+        modal.classList.add('hidden');
+        showBlockedScreen();
+    }
+}
+
+function showBlockedScreen() {
+    // Create blocking overlay
+    const existingOverlay = document.getElementById('age-restriction-overlay');
+    if (existingOverlay) return; // Already showing
+
+    const overlay = document.createElement('div');
+    overlay.id = 'age-restriction-overlay';
+    overlay.style.cssText = `
+        position: fixed;
+        inset: 0;
+        background: linear-gradient(135deg, rgba(0, 0, 0, 0.7), rgba(40, 40, 40, 0.8));
+        backdrop-filter: blur(10px);
+        -webkit-backdrop-filter: blur(10px);
+        z-index: 999999;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        padding: 1rem;
+    `;
+
+    overlay.innerHTML = `
+        <div style="
+            background: rgba(255, 255, 255, 0.1);
+            backdrop-filter: blur(20px);
+            -webkit-backdrop-filter: blur(20px);
+            border-radius: 1.5rem;
+            border: 1px solid rgba(255, 255, 255, 0.2);
+            box-shadow: 0 8px 32px 0 rgba(0, 0, 0, 0.37);
+            max-width: 28rem;
+            width: 100%;
+            padding: 3rem 2rem;
+            text-align: center;
+            animation: fadeIn 0.3s ease-in;
+        ">
+            <div style="margin-bottom: 1.5rem;">
+                <i class="fas fa-ban" style="
+                    color: #ef4444;
+                    font-size: 4rem;
+                    filter: drop-shadow(0 4px 6px rgba(239, 68, 68, 0.3));
+                "></i>
+            </div>
+
+            <h2 style="
+                font-size: 2rem;
+                font-weight: 700;
+                margin-bottom: 1rem;
+                color: #ffffff;
+                text-shadow: 0 2px 4px rgba(0, 0, 0, 0.3);
+            ">Access Restricted</h2>
+
+            <p style="
+                color: #f3f4f6;
+                margin-bottom: 1rem;
+                font-size: 1.125rem;
+                line-height: 1.75;
+                text-shadow: 0 1px 2px rgba(0, 0, 0, 0.2);
+            ">
+                You must be 18 years or older to access this website.
+            </p>
+
+            <p style="
+                color: #e5e7eb;
+                margin-bottom: 1.5rem;
+                line-height: 1.75;
+                text-shadow: 0 1px 2px rgba(0, 0, 0, 0.2);
+            ">
+                This site sells alcoholic beverages, which are restricted to adults ONLY.
+            </p>
+
+            <div style="
+                background: rgba(255, 255, 255, 0.05);
+                backdrop-filter: blur(10px);
+                -webkit-backdrop-filter: blur(10px);
+                border-radius: 1rem;
+                padding: 1rem;
+                margin-bottom: 1.5rem;
+                border: 1px solid rgba(255, 255, 255, 0.1);
+            ">
+                <p style="
+                    font-size: 0.875rem;
+                    color: #d1d5db;
+                    line-height: 1.5;
+                ">
+                    If you believe this is an error, please close this page and try again.
+                </p>
+            </div>
+        </div>
+    `;
+
+    // Add fadeIn animation
+    const style = document.createElement('style');
+    style.textContent = `
+        @keyframes fadeIn {
+            from {
+                opacity: 0;
+                transform: scale(0.95);
+            }
+            to {
+                opacity: 1;
+                transform: scale(1);
+            }
+        }
+    `;
+    document.head.appendChild(style);
+
+    document.body.appendChild(overlay);
+    document.body.style.overflow = 'hidden';
+
+    // Disable back button (prevent circumvention)
+    history.pushState(null, null, location.href);
+    window.onpopstate = function() {
+        history.go(1);
+    };
+
+    // Disable all interactive elements behind the overlay
+    blockSiteAccess();
+}
+
+function blockSiteAccess() {
+    // Disable all interactive elements except the overlay
+    document.querySelectorAll('a, button, input, select, textarea').forEach(el => {
+        if (!el.closest('#age-restriction-overlay')) {
+            el.disabled = true;
+            el.style.pointerEvents = 'none';
+            el.style.opacity = '0.5';
+        }
+    });
+}
+
+// Check age verification on page load
+window.addEventListener('DOMContentLoaded', function() {
+    checkAgeVerification();
+});
+
+function checkAgeVerification() {
+    const ageVerified = sessionStorage.getItem('age_verified');
+    const isBlocked = sessionStorage.getItem('access_blocked');
+
+    // If blocked, show blocking screen immediately
+    if (isBlocked === 'true') {
+        showBlockedScreen();
+        return;
+    }
+
+    // If trying to access liquor store and not verified, show modal
+    const currentStore = getCurrentStore(); // Your existing function
+    if (currentStore === 'liquor' && ageVerified !== 'true') {
+        showAgeVerificationModal();
+    }
+}
+
+function showAgeVerificationModal() {
+    const modal = document.getElementById('ageVerificationModal');
+    modal.classList.remove('hidden');
+}
+
+// Helper function - adjust based on your store logic
+function getCurrentStore() {
+    // Check your current store state
+    // Example: return localStorage.getItem('currentStore') || 'general';
+    return 'liquor'; // Adjust this to your actual implementation
+}
+
+// Check age verification on page load if on liquor store
+// document.addEventListener('DOMContentLoaded', () => {
+//     if (storeType === 'liquor' && !isAgeVerified()) {
+//         document.getElementById('ageVerificationModal').classList.remove('hidden');
+//     }
+// });
+
+// ==================== PWA INSTALL PROMPT ====================
+
+let deferredPrompt;
+
+// Handle install prompt
+window.addEventListener('beforeinstallprompt', (e) => {
+    e.preventDefault();
+    deferredPrompt = e;
+
+    // Show install popup if user is authenticated
+    if (isAuthenticated) {
+        const installPopup = document.getElementById('pwaInstallPopup');
+        if (installPopup) {
+            installPopup.classList.remove('hidden');
+        }
+    }
+});
+
+// Handle install button click
+document.addEventListener('DOMContentLoaded', () => {
+    const installBtn = document.getElementById('installBtn');
+    const dismissBtn = document.getElementById('dismissBtn');
+
+    if (installBtn) {
+        installBtn.addEventListener('click', async () => {
+            const installPopup = document.getElementById('pwaInstallPopup');
+            if (installPopup) {
+                installPopup.classList.add('hidden');
+            }
+
+            if (deferredPrompt) {
+                deferredPrompt.prompt();
+                const { outcome } = await deferredPrompt.userChoice;
+                if (outcome === 'accepted') {
+                    console.log('User accepted the install prompt');
+                } else {
+                    console.log('User dismissed the install prompt');
+                }
+                deferredPrompt = null;
+            }
+        });
+    }
+
+    if (dismissBtn) {
+        dismissBtn.addEventListener('click', () => {
+            const installPopup = document.getElementById('pwaInstallPopup');
+            if (installPopup) {
+                installPopup.classList.add('hidden');
+            }
+            // Don't show again for 24 hours
+            localStorage.setItem('pwa_dismissed', Date.now().toString());
+        });
+    }
+});
+
+// Handle successful installation
+window.addEventListener('appinstalled', () => {
+    console.log('PWA was installed');
+    const installPopup = document.getElementById('pwaInstallPopup');
+    if (installPopup) {
+        installPopup.classList.add('hidden');
+    }
+});
+
+// Check if we should show the popup (not dismissed recently)
+userApplied.then(() => {
+    if (isAuthenticated) {
+        const dismissedTime = localStorage.getItem('pwa_dismissed');
+        if (dismissedTime) {
+            const hoursSinceDismissed = (Date.now() - parseInt(dismissedTime)) / (1000 * 60 * 60);
+            if (hoursSinceDismissed < 24) {
+                return; // Don't show if dismissed within 24 hours
+            }
+        }
+    }
+});
+
+// iOS install banner
+function isIOS() {
+    return /iphone|ipad|ipod/i.test(window.navigator.userAgent);
+}
+
+function isInStandaloneMode() {
+    return window.navigator.standalone === true;
+}
+
+// Close payment success modal
+function closeSuccessModal() {
+    document.getElementById('paymentSuccessModal').classList.add('hidden');
+    window.location.href = '/orders/';
+}
+
+// Retry payment
+function retryPayment() {
+    document.getElementById('paymentFailedModal').classList.add('hidden');
+    // Re-submit the checkout form
+    document.getElementById('checkoutForm').dispatchEvent(new Event('submit'));
+}
+
+// Close payment failed modal
+function closeFailedModal() {
+    document.getElementById('paymentFailedModal').classList.add('hidden');
+}
+
+// Register Service Worker
+if ('serviceWorker' in navigator) {
+    window.addEventListener('load', () => {
+        navigator.serviceWorker
+            .register('/service-worker.js')
+            .then((registration) => {
+                console.log('Service Worker registered successfully:', registration.scope);
+
+                // Check for updates every hour
+                setInterval(() => {
+                    registration.update();
+                }, 60 * 60 * 1000); // 1 hour
+
+                // Handle updates
+                registration.addEventListener('updatefound', () => {
+                    const newWorker = registration.installing;
+
+                    newWorker.addEventListener('statechange', () => {
+                        if (newWorker.state === 'installed' && navigator.serviceWorker.controller) {
+                            // New service worker available
+                            showUpdateNotification(registration);
+                        }
+                    });
+                });
+            })
+            .catch((error) => {
+                console.error('❌ Service Worker registration failed:', error);
+            });
+
+        // Listen for controller change (new SW activated)
+        navigator.serviceWorker.addEventListener('controllerchange', () => {
+            console.log('🔄 New Service Worker activated, reloading page');
+            window.location.reload();
+        });
+
+        // Keep this store's catalog fresh in the service worker cache so the
+        // offline page can still show the menu
+        navigator.serviceWorker.ready.then(() => {
+            localStorage.setItem('catalogStore', storeType);
+            fetch(`/api/catalog/${storeType}/`).catch(() => {});
+        });
+    });
+
+    // Check if we're online/offline
+    window.addEventListener('online', () => {
+        console.log('🌐 Back online!');
+        hideOfflineBanner();
+    });
+
+    window.addEventListener('offline', () => {
+        console.log('📡 You are offline');
+        showOfflineBanner();
+    });
+}
+
+// Show update notification
+function showUpdateNotification(registration) {
+    // Create notification element
+    const notification = document.createElement('div');
+    notification.id = 'sw-update-notification';
+    notification.style.cssText = `
+        position: fixed;
+        bottom: 20px;
+        left: 50%;
+        transform: translateX(-50%);
+        background: #417690;
+        color: white;
+        padding: 16px 24px;
+        border-radius: 8px;
+        box-shadow: 0 4px 12px rgba(0,0,0,0.3);
+        z-index: 10000;
+        display: flex;
+        align-items: center;
+        gap: 12px;
+        font-size: 14px;
+        max-width: 90%;
+    `;
+
+    notification.innerHTML = `
+        <span>🎉 New version available!</span>
+        <button id="sw-update-btn" style="
+        background: white;
+        color: #ff6600;
+        border: none;
+        padding: 8px 16px;
+        border-radius: 4px;
+        cursor: pointer;
+        font-weight: 600;
+        font-size: 13px;
+        ">Update Now</button>
+        <button id="sw-dismiss-btn" style="
+        background: transparent;
+        color: white;
+        border: 1px solid white;
+        padding: 8px 16px;
+        border-radius: 4px;
+        cursor: pointer;
+        font-size: 13px;
+        ">Later</button>
+    `;
+
+    document.body.appendChild(notification);
+
+    // Handle update button
+    document.getElementById('sw-update-btn').addEventListener('click', () => {
+        if (registration.waiting) {
+            // Tell the waiting service worker to activate
+            registration.waiting.postMessage({ type: 'SKIP_WAITING' });
+        }
+        notification.remove();
+    });
+
+    // Handle dismiss button
+    document.getElementById('sw-dismiss-btn').addEventListener('click', () => {
+        notification.remove();
+    });
+}
+
+// Show offline banner
+function showOfflineBanner() {
+// Check if banner already exists
+if (document.getElementById('offline-banner')) return;
+
+const banner = document.createElement('div');
+banner.id = 'offline-banner';
+banner.style.cssText = `
+    position: fixed;
+    top: 0;
+    left: 0;
+    right: 0;
+    background: #f8d7da;
+    color: #721c24;
+    padding: 12px 20px;
+    text-align: center;
+    z-index: 9999;
+    font-size: 14px;
+    font-weight: 500;
+    border-bottom: 2px solid #f5c6cb;
+`;
+banner.innerHTML = '📡 You are offline. Some features may be limited.';
+document.body.prepend(banner);
+}
+
+// Hide offline banner
+function hideOfflineBanner() {
+const banner = document.getElementById('offline-banner');
+if (banner) {
+    banner.style.background = '#d4edda';
+    banner.style.color = '#155724';
+    banner.style.borderBottom = '2px solid #c3e6cb';
+    banner.innerHTML = '🌐 Back online!';
+
+    setTimeout(() => {
+    banner.remove();
+    }, 3000);
+}
+}
+
+// Preload critical pages when user is idle
+if ('requestIdleCallback' in window) {
+requestIdleCallback(() => {
+    // Cache important pages in the background
+    if ('serviceWorker' in navigator && navigator.serviceWorker.controller) {
+    navigator.serviceWorker.controller.postMessage({
+        type: 'CACHE_URLS',
+        urls: [
+        '/',
+        '/login/',
+        '/signup/',
+        '/offline/'
+        ]
+    });
+    }
+});
+}
+
+// ==================== REVIEW MODAL FLOW ====================
+
+// Store for current review order
+let currentReviewOrder = null;
+let reviewRatings = {};
+
+// Initialize cart and review modal on page load from the bootstrap response
+document.addEventListener('DOMContentLoaded', async () => {
+    const me = await userApplied;
+    if (!isAuthenticated) return;
+
+    cartData = me.cart;
+    updateCartUI();
+
+    if (me.pending_review) {
+        currentReviewOrder = me.pending_review;
+        populateReviewModal(me.pending_review);
+        showReviewModal();
+    }
+});
+
+// Populate review modal with order items
+function populateReviewModal(order) {
+    const orderNumberEl = document.getElementById('reviewOrderNumber').querySelector('span');
+    orderNumberEl.textContent = order.order_number;
+
+    const itemsContainer = document.getElementById('reviewItemsContainer');
+    itemsContainer.innerHTML = '';
+    reviewRatings = {};
+
+    order.items.forEach(item => {
+        const itemEl = document.createElement('div');
+        itemEl.className = 'review-item';
+        itemEl.innerHTML = `
+            <img src="${item.image_url}" alt="${item.name}" class="review-item-image">
+            <div class="review-item-content">
+                <div>
+                    <h3 class="review-item-name">${item.name}</h3>
+                    <p class="review-item-quantity">Qty: ${item.quantity}</p>
+                </div>
+                <div class="star-rating">
+                    ${[1, 2, 3, 4, 5].map(star => `
+                        <button 
+                            type="button"
+                            class="star-btn" 
+                            data-item-id="${item.food_item_id}"
+                            data-rating="${star}"
+                            onclick="selectRating(${item.food_item_id}, ${star}, this)"
+                        >
+                            <i class="fas fa-star"></i>
+                        </button>
+                    `).join('')}
+                    <span class="rating-value-display" data-item-id="${item.food_item_id}"></span>
+                </div>
+            </div>
+        `;
+        itemsContainer.appendChild(itemEl);
+    });
+}
+
+// Handle star rating selection
+function selectRating(itemId, rating, element) {
+    const button = element;
+    const container = button.closest('.star-rating');
+    const buttons = container.querySelectorAll(`[data-item-id="${itemId}"]`);
+    const ratingDisplay = container.querySelector(`[data-item-id="${itemId}"][class="rating-value-display"]`);
+
+    // Update ratings object
+    reviewRatings[itemId] = rating;
+
+    // Visual feedback
+    buttons.forEach(btn => {
+        const btnRating = parseInt(btn.dataset.rating);
+        if (btnRating <= rating) {
+            btn.classList.add('active');
+        } else {
+            btn.classList.remove('active');
+        }
+    });
+
+    // Show rating value
+    ratingDisplay.textContent = `${rating}/5`;
+}
+
+// Show review modal
+function showReviewModal() {
+    document.getElementById('reviewModal').classList.remove('hidden');
+    document.body.style.overflow = 'hidden';
+}
+
+// Dismiss review modal (Maybe Later)
+async function dismissReviewModal() {
+    if (!currentReviewOrder) return;
+
+    try {
+        const response = await fetch(`/api/orders/${currentReviewOrder.order_number}/dismiss-review/`, {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': getCookie('csrftoken'),
+            }
+        });
+        const data = await response.json();
+
+        if (data.success) {
+            closeReviewModal();
+        }
+    } catch (error) {
+        console.error('Error dismissing review:', error);
+        closeReviewModal();
+    }
+}
+
+// Close review modal
+function closeReviewModal() {
+    document.getElementById('reviewModal').classList.add('hidden');
+    document.body.style.overflow = 'auto';
+    currentReviewOrder = null;
+    reviewRatings = {};
+}
+
+// Submit review
+async function submitReviewModal() {
+    if (!currentReviewOrder) return;
+
+    // Check if all items are rated
+    const allRated = currentReviewOrder.items.every(item => reviewRatings[item.food_item_id]);
+    if (!allRated) {
+        alert('Please rate all items before submitting');
+        return;
+    }
+
+    // Prepare review data
+    const reviewData = currentReviewOrder.items.map(item => ({
+        food_item_id: item.food_item_id,
+        rating: reviewRatings[item.food_item_id],
+        comment: ''
+    }));
+
+    try {
+        const response = await fetch(`/orders/${currentReviewOrder.order_number}/submit_review/`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCookie('csrftoken'),
+            },
+            body: JSON.stringify(reviewData)
+        });
+        const data = await response.json();
+
+        if (data.success) {
+            closeReviewModal();
+            showReviewSuccessModal();
+        } else {
+            alert('Error submitting review: ' + data.message);
+        }
+    } catch (error) {
+        console.error('Error submitting review:', error);
+        alert('Error submitting review');
+    }
+}
+
+// Show success modal
+function showReviewSuccessModal() {
+    document.getElementById('reviewSuccessModal').classList.remove('hidden');
+    document.body.style.overflow = 'hidden';
+}
+
+// Close success modal
+function closeReviewSuccessModal() {
+    document.getElementById('reviewSuccessModal').classList.add('hidden');
+    document.body.style.overflow = 'auto';
+}
+
+// Helper function to get CSRF token
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+// Open WhatsApp function
+function openWhatsApp() {
+    const phoneNumber = '254110345054'; // Replace with your actual WhatsApp business number
+    const message = 'Hello! I need assistance with my order.';
+    const whatsappUrl = `https://wa.me/${phoneNumber}?text=${encodeURIComponent(message)}`;
+    window.open(whatsappUrl, '_blank');
+}
@@ -0,0 +1,44 @@
+# urbanfoods/storage.py
+"""
+Static files storages that regenerate the service worker after collectstatic
+and never turn a reference to an uncollected file into a server error.
+"""
+import logging
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceWorkerMixin:
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        if kwargs.get('dry_run'):
+            return
+        # The hashed manifest is saved by now, so the precache list can use it
+        from .pwa import write_service_worker
+        version, changed = write_service_worker(self)
+        logger.info("Service worker %s (cache version %s)", 'rebuilt' if changed else 'unchanged', version)
+
+
+class LenientManifestMixin:
+    """Render a reference to a file that was never collected as its plain URL instead of failing the page."""
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            logger.warning("Static file %s is not in the manifest; serving it unhashed", name)
+            return name
+
+
+class ServiceWorkerManifestStorage(ServiceWorkerMixin, LenientManifestMixin, ManifestStaticFilesStorage):
+    pass
+
+
+class CompressedServiceWorkerManifestStorage(
+    ServiceWorkerMixin, LenientManifestMixin, CompressedManifestStaticFilesStorage
+):
+    pass
@@ -0,0 +1,52 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+# Rendered width of each variant in the storefront layouts
+SIZES = {
+    'thumbnail': '80px',
+    'card': '(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, 50vw',
+    'detail': '(min-width: 800px) 800px, 100vw',
+}
+# Modern formats offered ahead of the JPEG fallback, best first
+SOURCE_TYPES = [('avif', 'image/avif'), ('webp', 'image/webp')]
+
+
+@register.simple_tag
+def food_image(item, size='card', css_class='', sizes=None, loading='lazy'):
+    """
+    Responsive ``<picture>`` for a food item:
+
+        {% food_image item 'card' 'w-full h-48 object-cover' %}
+
+    Offers the AVIF/WebP variants with a JPEG fallback, and shows the blurred
+    LQIP placeholder as the image background until the real image loads.
+    Items whose variants are not generated yet get a plain ``<img>``.
+    """
+    if not item.image:
+        return ''
+
+    sizes = sizes or SIZES[size]
+    variants = item.image_variants or {}
+    style = ''
+    if variants.get('lqip'):
+        style = f"background-image:url('{variants['lqip']}');background-size:cover;background-position:center"
+    dimensions = format_html(
+        ' width="{}" height="{}"', variants['width'], variants['height']
+    ) if variants.get('width') else ''
+
+    img = format_html(
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" loading="{}" decoding="async"{}{}>',
+        item.image_variant_url(size), item.image_srcset(), sizes, item.name, css_class, loading,
+        dimensions, format_html(' style="{}"', style) if style else '',
+    ) if variants.get('jpeg') else format_html(
+        '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async">',
+        item.image.url, item.name, css_class, loading,
+    )
+
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((mime, item.image_srcset(fmt), sizes) for fmt, mime in SOURCE_TYPES if variants.get(fmt)),
+    )
+    return format_html('<picture>{}{}</picture>', sources, img)
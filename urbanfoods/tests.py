@@ -0,0 +1,258 @@
+import json
+import re
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .customers import refresh_customer_summary
+from .models import (
+    Cart, CartItem, DailySalesRollup, FoodCategory, FoodItem, HourlySalesRollup, Order, OrderItem, SiteSettings,
+    User,
+)
+from .mpesa_utils import mpesa
+from .notifications import send_admin_order_notification, send_customer_order_confirmation
+from .order_status import status_entry
+from .utils import notify_new_order
+
+# Rows every checkout would contend for; their counters are fed from
+# append-only events by the flush_popularity and flush_sales_rollups workers
+SHARED_TABLES = [model._meta.db_table for model in (FoodItem, DailySalesRollup, HourlySalesRollup)]
+SHARED_WRITE_RE = re.compile(
+    r'^\s*(UPDATE|INSERT INTO|DELETE FROM)\s+"?({})"?\b'.format('|'.join(SHARED_TABLES)), re.I
+)
+
+
+class ExplainOrderQueriesTests(TestCase):
+    """The hot Order lookups, as the views build them, are served by their indexes."""
+
+    def test_hot_queries_use_their_indexes(self):
+        out = StringIO()
+        call_command('explain_order_queries', stdout=out)
+        self.assertIn('All hot Order queries use an index', out.getvalue())
+
+
+@override_settings(PAGE_CACHE_SECONDS=300)
+class PageCacheTests(TestCase):
+    """Storefront pages are cached per store, path and the parameters the page reads."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = self.client_class(HTTP_HOST='localhost')
+        self.url = reverse('storefront', args=['liquor'])
+
+    def test_parameter_order_shares_a_page(self):
+        self.assertEqual(self.client.get(self.url, {'q': 'gin', 'sort': 'price'})['X-Page-Cache'], 'MISS')
+        self.assertEqual(self.client.get(f'{self.url}?sort=price&q=gin')['X-Page-Cache'], 'HIT')
+
+    def test_unknown_parameters_bypass_the_cache(self):
+        for _ in range(2):
+            response = self.client.get(self.url, {'q': 'gin', 'utm_source': 'ad'})
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertEqual(self.client.get(self.url, {'q': 'gin'})['X-Page-Cache'], 'MISS')
+
+
+@override_settings(TELEGRAM_BOTT_TOKEN=None)
+class QueryCountTestCase(TestCase):
+    """Fixtures for the query-count tests: a customer, a cart and a delivered order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        SiteSettings.get_instance()
+        cls.customer = User.objects.create_user('customer', email='customer@example.com', password='x')
+        cls.staff = User.objects.create_user('staff', email='staff@example.com', password='x', is_staff=True)
+        cls.category = FoodCategory.objects.create(name='Spirits', store_type='liquor')
+        cls.food_items = [
+            FoodItem.objects.create(
+                name=f'Item {n}', description='', category=cls.category, price=100, stock=10, store_type='liquor',
+            )
+            for n in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = self.client_class(HTTP_HOST='localhost')
+        self.client.force_login(self.customer)
+
+    def fill_cart(self, lines):
+        cart, _ = Cart.objects.get_or_create(user=self.customer)
+        for food_item in self.food_items[:lines]:
+            CartItem.objects.create(cart=cart, food_item=food_item, quantity=1)
+
+    def delivered_order(self, lines):
+        order = Order.objects.create(
+            user=self.customer, status='delivered', delivered_at=timezone.now(),
+            estimated_delivery=timezone.now() + timedelta(minutes=30),
+            hostel='-', room_number='-', phone_number='-', subtotal=100 * lines, total=100 * lines,
+        )
+        for food_item in self.food_items[:lines]:
+            OrderItem.objects.create(order=order, food_item=food_item, quantity=1, price_at_order=food_item.price)
+        return order
+
+    def login_admin(self):
+        self.client.force_login(self.staff)
+        self.client.cookies[settings.ADMIN_SESSION_COOKIE_NAME] = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+
+
+class ReadQueryCountTests(QueryCountTestCase):
+    """The order and cart endpoints run a fixed number of queries, however many items there are."""
+
+    def test_get_cart(self):
+        for lines in (1, 5):
+            with self.subTest(lines=lines):
+                CartItem.objects.all().delete()
+                self.fill_cart(lines)
+                # session, user, cart, cart lines with their food items, delivery fee, session save
+                with self.assertNumQueries(8):
+                    response = self.client.get(reverse('get_cart'))
+                self.assertEqual(len(response.json()['items']), lines)
+
+    def test_pending_review_order(self):
+        for lines in (1, 5):
+            with self.subTest(lines=lines):
+                Order.objects.all().delete()
+                cache.clear()
+                self.delivered_order(lines)
+                # session, user, the review pointer, the order's items, session save
+                with self.assertNumQueries(7):
+                    response = self.client.get(reverse('pending_review_order'))
+                self.assertEqual(len(response.json()['order']['items']), lines)
+
+    def test_admin_customer_orders(self):
+        self.login_admin()
+        for orders in (1, 5):
+            with self.subTest(orders=orders):
+                Order.objects.all().delete()
+                for _ in range(orders):
+                    self.delivered_order(5)
+                # session, staff user, customer, the orders, their items with food items, session save
+                with self.assertNumQueries(8):
+                    response = self.client.get(
+                        reverse('get_customer_orders', args=[self.customer.id])
+                    )
+                self.assertEqual(len(response.json()['orders']), orders)
+
+    def test_order_notifications(self):
+        for lines in (1, 5):
+            with self.subTest(lines=lines):
+                order = Order.objects.select_related('user').get(pk=self.delivered_order(lines).pk)
+                # One load of the items, shared by the Telegram message and both emails
+                with self.assertNumQueries(1):
+                    notify_new_order(order)
+                    send_admin_order_notification(order)
+                    send_customer_order_confirmation(order)
+
+
+class CheckoutQueryCountTests(QueryCountTestCase):
+    """A cash checkout, status fan-out and notifications included."""
+
+    def place_order(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                reverse('place_order'),
+                json.dumps({'payment_method': 'cash', 'hostel': '-', 'room_number': '-', 'phone_number': '-'}),
+                content_type='application/json',
+            )
+        self.assertTrue(response.json().get('success'), response.content)
+        return ctx.captured_queries
+
+    def test_query_count_does_not_grow_with_cart_lines(self):
+        # A returning customer, whose summary row already exists
+        self.delivered_order(1)
+        refresh_customer_summary(self.customer.id)
+        for lines in (1, 5):
+            with self.subTest(lines=lines):
+                self.fill_cart(lines)
+                # session, user; in a savepoint: the locked cart, delivery fee, order, items,
+                # sales event (3), customer summary (4), popularity events, cart lines, loyalty points,
+                # history, items for the notifications; session save (3)
+                self.assertEqual(len(self.place_order()), 23)
+
+    def test_no_writes_to_shared_rows(self):
+        self.fill_cart(5)
+        shared_writes = [query['sql'] for query in self.place_order() if SHARED_WRITE_RE.match(query['sql'])]
+        self.assertEqual(shared_writes, [])
+
+
+class OrderStatusPollTests(QueryCountTestCase):
+    """Unchanged status polls are answered from the cache."""
+
+    def test_unchanged_poll_runs_no_queries(self):
+        order = self.delivered_order(1)
+        for name in ('order_status_api', 'check_order_payment_status'):
+            with self.subTest(view=name):
+                url = reverse(name, args=[order.order_number])
+                # The entry is published once the first poll's transaction commits
+                with self.captureOnCommitCallbacks(execute=True):
+                    etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+
+    def test_version_is_bound_to_the_owner(self):
+        order = self.delivered_order(1)
+        other = User.objects.create_user('other', email='other@example.com', password='x')
+        theirs = Order(
+            order_number=order.order_number, user_id=other.id,
+            status=order.status, payment_status=order.payment_status,
+        )
+        self.assertNotEqual(status_entry(order)['version'], status_entry(theirs)['version'])
+
+
+class MpesaCheckoutTests(TransactionTestCase):
+    """The STK push runs after the order commits, with no cart lines locked."""
+
+    def setUp(self):
+        SiteSettings.get_instance()
+        self.customer = User.objects.create_user('customer', email='customer@example.com', password='x')
+        category = FoodCategory.objects.create(name='Spirits', store_type='liquor')
+        food_item = FoodItem.objects.create(
+            name='Item', description='', category=category, price=100, stock=10, store_type='liquor',
+        )
+        cart = Cart.objects.create(user=self.customer)
+        CartItem.objects.create(cart=cart, food_item=food_item, quantity=1)
+        self.client = self.client_class(HTTP_HOST='localhost')
+        self.client.force_login(self.customer)
+
+    def place_order(self, stk_response):
+        calls = []
+
+        def initiate_stk_push(**kwargs):
+            calls.append({
+                'in_atomic_block': connection.in_atomic_block,
+                'order_committed': Order.objects.filter(order_number=kwargs['account_reference']).exists(),
+            })
+            return stk_response
+
+        with patch.object(mpesa, 'initiate_stk_push', side_effect=initiate_stk_push):
+            response = self.client.post(
+                reverse('place_order'),
+                json.dumps({'payment_method': 'mpesa', 'hostel': '-', 'room_number': '-', 'phone_number': '0712345678'}),
+                content_type='application/json',
+            )
+        self.assertEqual(calls, [{'in_atomic_block': False, 'order_committed': True}])
+        return response.json()
+
+    def test_accepted_push_records_the_checkout_request(self):
+        data = self.place_order({'success': True, 'checkout_request_id': 'ws_CO_1'})
+        self.assertTrue(data['success'])
+        order = Order.objects.get(order_number=data['order_number'])
+        self.assertEqual((order.status, order.mpesa_checkout_request_id), ('payment_pending', 'ws_CO_1'))
+
+    def test_rejected_push_cancels_the_order(self):
+        data = self.place_order({'success': False, 'message': 'Invalid phone'})
+        self.assertFalse(data['success'])
+        order = Order.objects.get(user=self.customer)
+        self.assertEqual((order.status, order.payment_status), ('cancelled', 'failed'))
+        # Nothing was paid for, so the cart is untouched
+        self.assertEqual(CartItem.objects.filter(cart__user=self.customer).count(), 1)
@@ -28,6 +28,8 @@ from django.conf import settings
 from django.utils import timezone
 import logging
 
+from .serializers import prefetch_order_items
+
 logger = logging.getLogger(__name__)
 
 def format_phone(phone):
@@ -124,6 +126,7 @@ def send_telegram_message(message, buttons=None):
 
 def notify_new_order(order):
     try:
+        prefetch_order_items(order)
         items_list = []
         for item in order.items.all():
             line_total = item.price_at_order * item.quantity
@@ -1,4 +1,5 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
@@ -7,12 +8,28 @@ from django.db.models import Q, Sum, Count
 from django.utils import timezone
 from django.core.paginator import Paginator
 from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_exempt
+from django.middleware.csrf import get_token
 from .models import *
 import json
 import uuid
 from urbanfoods.notifications import send_admin_order_notification, send_customer_order_confirmation
 from urbanfoods.utils import notify_new_order
+from urbanfoods.order_events import order_status_changed
+from urbanfoods.catalog import DEFAULT_STORE_TYPE, STORE_TYPES, catalog_for
+from urbanfoods.checkout import (
+    CheckoutError, complete_checkout, complete_payment, create_order, get_delivery_fee_for_store, lock_cart,
+    totals, validate,
+)
+from urbanfoods.order_status import conditional_status, publish_status, status_entry, with_status_headers
+from urbanfoods.page_cache import cache_storefront
+from urbanfoods.review_prompts import forget_review_prompt, pending_review_for
+from urbanfoods.serializers import (
+    load_cart, serialize_cart_item, user_cart_items,
+)
 import logging
 from .mpesa_utils import mpesa
 from .models import MpesaTransaction, OrderStatusHistory
@@ -26,28 +43,34 @@ def offline(request):
     """Offline page for PWA"""
     return render(request, 'offline.html')
 
-def get_delivery_fee_for_store(store_type):
-    """Delivery fee applies only to liquor orders."""
-    if store_type == 'liquor':
-        return SiteSettings.get_delivery_fee()
-    return Decimal('0.00')
-
 from django.db.models import Avg, Count, Q
 
-from django.db.models import Avg, Count, Q
+from django.db.models import Avg, Count, F, Q
 
 def homepage(request):
-    store_type = request.session.get('store_type', 'liquor')
+    """Send visitors to the store they last used (the session is only a hint)"""
+    store_type = request.session.get('store_type')
+    if store_type not in STORE_TYPES:
+        store_type = DEFAULT_STORE_TYPE
+    url = reverse('storefront', args=[store_type])
+    if request.GET:
+        url = f'{url}?{request.GET.urlencode()}'
+    return redirect(url)
+
+@cache_storefront
+def storefront(request, store_type):
+    """Store catalog page; depends only on the URL, never on the session"""
     delivery_fee = float(get_delivery_fee_for_store(store_type))
 
     categories = FoodCategory.objects.filter(store_type=store_type)
 
     category_id = request.GET.get('category')
     search_query = request.GET.get('q')
+    sort = request.GET.get('sort')
 
     food_items = FoodItem.objects.filter(is_available=True, store_type=store_type).annotate(
-        avg_rating=Avg("reviews__rating"),
-        reviews_count=Count("reviews")
+        avg_rating=F("rating_average"),
+        reviews_count=F("rating_count")
     )
 
     if category_id:
@@ -59,23 +82,27 @@ def homepage(request):
             Q(description__icontains=search_query)
         )
 
+    if sort == 'trending':
+        # Recent sales, time-decayed (refreshed by flush_popularity)
+        food_items = food_items.order_by('-trending_score', '-times_ordered', 'name')
+
     meal_of_day = FoodItem.objects.filter(
         is_meal_of_day=True, is_available=True, store_type=store_type
     ).annotate(
-        avg_rating=Avg("reviews__rating"),
-        reviews_count=Count("reviews")
+        avg_rating=F("rating_average"),
+        reviews_count=F("rating_count")
     ).first()
 
     featured_items = list(
         FoodItem.objects.filter(is_featured=True, is_available=True, store_type=store_type)
-        .annotate(avg_rating=Avg("reviews__rating"), reviews_count=Count("reviews"))[:4]
+        .annotate(avg_rating=F("rating_average"), reviews_count=F("rating_count"))[:4]
     )
 
     popular_items = FoodItem.objects.filter(
         is_available=True, store_type=store_type
     ).annotate(
-        avg_rating=Avg("reviews__rating"),
-        reviews_count=Count("reviews")
+        avg_rating=F("rating_average"),
+        reviews_count=F("rating_count")
     ).order_by('-times_ordered')[:6]
 
     return render(request, 'homepage.html', {
@@ -86,6 +113,8 @@ def homepage(request):
         'popular_items': popular_items,
         'store_type': store_type,
         'delivery_fee': delivery_fee,
+        'sort': sort,
+        'search_query': search_query,
     })
 
 
@@ -93,7 +122,7 @@ def homepage(request):
 def switch_store(request):
     """Switch between food and liquor store"""
     data = json.loads(request.body)
-    store_type = data.get('store_type', 'food')
+    store_type = data.get('store_type', DEFAULT_STORE_TYPE)
     
     if store_type in ['food', 'liquor', 'grocery']:
         # Clear cart if user is authenticated and cart has items of different store type
@@ -113,11 +142,35 @@ def switch_store(request):
             except Cart.DoesNotExist:
                 pass
         
+        # Remembered only so "/" can redirect to the right storefront
         request.session['store_type'] = store_type
-        return JsonResponse({'success': True, 'store_type': store_type})
+        return JsonResponse({
+            'success': True,
+            'store_type': store_type,
+            'url': reverse('storefront', args=[store_type]),
+        })
     
     return JsonResponse({'success': False, 'message': 'Invalid store type'}, status=400)
 
+@require_http_methods(["GET"])
+def catalog_api(request, store_type):
+    """Compact store catalog for the PWA, revalidated with its content-hash ETag"""
+    if store_type not in STORE_TYPES:
+        return JsonResponse({'success': False, 'message': 'Invalid store type'}, status=404)
+
+    catalog = catalog_for(store_type)
+    etag = quote_etag(catalog['version'])
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(catalog['body'], content_type='application/json')
+    response['ETag'] = etag
+    response['X-Catalog-Version'] = catalog['version']
+    # Shared caches may keep it, but must check back (the service worker
+    # serves it stale-while-revalidate)
+    response['Cache-Control'] = 'public, no-cache'
+    return response
+
 # ==================== AUTHENTICATION ====================
 
 def signup_view(request):
@@ -289,52 +342,99 @@ def remove_from_cart(request):
         'cart_total': float(cart.total)
     })
 
-@login_required
-def get_cart(request):
-    """Get cart contents"""
-    cart, _ = Cart.objects.get_or_create(user=request.user)
-
+def cart_summary(cart_items):
+    """Cart API payload for already-loaded cart lines"""
     items = []
     store_type = 'liquor'  # default
-    
-    for item in cart.items.all():
+    subtotal = Decimal('0.00')
+    count = 0
+
+    for item in cart_items:
         store_type = item.food_item.store_type
-        items.append({
-            'id': item.id,
-            'food_item_id': item.food_item.id,
-            'name': item.food_item.name,
-            'price': float(item.food_item.price),
-            'quantity': item.quantity,
-            'subtotal': float(item.subtotal),
-            'image': item.food_item.image.url if item.food_item.image else None
-        })
+        items.append(serialize_cart_item(item))
+        subtotal += item.subtotal
+        count += item.quantity
 
     delivery_fee = float(get_delivery_fee_for_store(store_type))
 
-    subtotal = float(cart.total)
-    total = subtotal + delivery_fee
+    return {
+        'items': items,
+        'cart_count': count,
+        'subtotal': float(subtotal),
+        'delivery_fee': delivery_fee,
+        'total': float(subtotal) + delivery_fee
+    }
+
+@login_required
+def get_cart(request):
+    """Get cart contents"""
+    cart = load_cart(request.user)
+    return JsonResponse({'success': True, **cart_summary(cart.items.all())})
+
+# ==================== USER BOOTSTRAP ====================
+
+@never_cache
+@require_http_methods(["GET"])
+def me_bootstrap(request):
+    """Everything a page needs about the signed-in user, in one response
+
+    Replaces the separate page-load calls to /api/cart/ and
+    /api/orders/pending-review/.
+    """
+    # Cached pages carry no {% csrf_token %}; this sets the cookie the JS reads
+    get_token(request)
+    user = request.user
+    if not user.is_authenticated:
+        return JsonResponse({'success': True, 'authenticated': False})
+
+    cart = cart_summary(user_cart_items(user))
+    active_order = (
+        Order.objects.filter(user=user)
+        .exclude(status__in=['delivered', 'cancelled'])
+        .only('order_number', 'status', 'updated_at')
+        .order_by('-created_at')
+        .first()
+    )
 
     return JsonResponse({
         'success': True,
-        'items': items,
-        'cart_count': cart.item_count,
-        'subtotal': subtotal,
-        'delivery_fee': delivery_fee,
-        'total': total
+        'authenticated': True,
+        'username': user.username,
+        'user': {
+            'defaultHostel': user.default_hostel or '',
+            'defaultRoom': user.default_room or '',
+            'phoneNumber': user.phone_number or '',
+        },
+        'loyalty_points': user.loyalty_points,
+        'cart_count': cart['cart_count'],
+        'cart': cart,
+        'pending_review': pending_review_for(user),
+        'active_order': active_order and {
+            'order_number': active_order.order_number,
+            'status': active_order.status,
+            'status_display': active_order.get_status_display().strip(),
+            'updated_at': active_order.updated_at.isoformat(),
+            'url': reverse('order_detail', args=[active_order.order_number]),
+        },
     })
 
 # ==================== ORDER PLACEMENT ====================
 
 # ==================== ORDER TRACKING ====================
 
+def _customer_orders(user):
+    """``(active, finished)`` orders of a customer, as my_orders lists them"""
+    orders = Order.objects.filter(user=user).prefetch_related('items')
+    return (
+        orders.exclude(status__in=['delivered', 'cancelled']),
+        orders.filter(status__in=['delivered', 'cancelled']),
+    )
+
 @login_required
 def my_orders(request):
     """User's order history"""
-    orders = Order.objects.filter(user=request.user).prefetch_related('items')
-
     # Separate active and completed orders
-    active_orders = orders.exclude(status__in=['delivered', 'cancelled'])
-    order_history = orders.filter(status__in=['delivered', 'cancelled'])
+    active_orders, order_history = _customer_orders(request.user)
 
     context = {
         'active_orders': active_orders,
@@ -356,17 +456,18 @@ def order_detail(request, order_number):
     }
     return render(request, 'order_detail.html', context)
 
+@conditional_status
 @login_required
 def order_status_api(request, order_number):
     """API endpoint for order status polling"""
     order = get_object_or_404(Order, order_number=order_number, user=request.user)
 
-    return JsonResponse({
+    return with_status_headers(JsonResponse({
         'success': True,
         'status': order.status,
         'status_display': order.get_status_display(),
         'updated_at': order.updated_at.isoformat()
-    })
+    }), status_entry(order))
 
 # ==================== USER PROFILE ====================
 
@@ -436,36 +537,37 @@ def submit_food_review(request, order_number):
     if not isinstance(reviews, list) or len(reviews) == 0:
         return JsonResponse({'success': False, 'message': 'No reviews provided'}, status=400)
 
-    created_any = False
+    # Validate the whole payload against the order's items in memory
+    order_food_item_ids = set(order.items.values_list('food_item_id', flat=True))
+    new_reviews = {}
     for review_data in reviews:
-        food_item_id = review_data.get('food_item_id')
-        rating = review_data.get('rating')
-        comment = review_data.get('comment', '')
-
-        if not food_item_id or not rating:
+        if not isinstance(review_data, dict):
             continue
-
-        # Ensure the food item belongs to this order
-        if not order.items.filter(food_item_id=food_item_id).exists():
+        try:
+            food_item_id = int(review_data.get('food_item_id'))
+            rating = int(review_data.get('rating'))
+        except (TypeError, ValueError):
             continue
 
-        try:
-            food_item = FoodItem.objects.get(id=food_item_id)
-        except FoodItem.DoesNotExist:
+        if food_item_id not in order_food_item_ids or not 1 <= rating <= 5 or food_item_id in new_reviews:
             continue
 
-        obj, created = FoodReview.objects.get_or_create(
+        new_reviews[food_item_id] = FoodReview(
             user=request.user,
-            food_item=food_item,
+            food_item_id=food_item_id,
             order=order,
-            defaults={"rating": int(rating), "comment": comment}
+            rating=rating,
+            comment=str(review_data.get('comment', '')),
         )
-        if created:
-            created_any = True
 
-    if created_any:
-        order.has_reviewed_items = True
-        order.save(update_fields=["has_reviewed_items"])
+    if new_reviews:
+        with transaction.atomic():
+            # Items reviewed earlier for this order are skipped by the unique constraint
+            FoodReview.objects.bulk_create(new_reviews.values(), ignore_conflicts=True)
+            FoodItem.refresh_rating_aggregates(new_reviews.keys())
+            order.has_reviewed_items = True
+            order.save(update_fields=["has_reviewed_items"])
+        forget_review_prompt(request.user.id)
 
     return JsonResponse({"success": True})
 
@@ -476,39 +578,10 @@ def submit_food_review(request, order_number):
 @require_http_methods(["GET"])
 def pending_review_order(request):
     """Get the oldest delivered order without reviews, if under review prompt limit"""
-    order = (
-        Order.objects
-        .filter(
-            user=request.user,
-            status='delivered',
-            has_reviewed_items=False,
-            review_prompted_count__lt=3
-        )
-        .order_by('delivered_at')
-        .first()
-    )
-    
+    order = pending_review_for(request.user)
     if not order:
         return JsonResponse({'success': False, 'order': None})
-    
-    # Serialize order and items
-    items_data = []
-    for item in order.items.all():
-        items_data.append({
-            'id': item.id,
-            'food_item_id': item.food_item.id,
-            'name': item.food_item.name,
-            'image_url': item.food_item.image.url if item.food_item.image else '',
-            'quantity': item.quantity,
-        })
-    
-    return JsonResponse({
-        'success': True,
-        'order': {
-            'order_number': order.order_number,
-            'items': items_data,
-        }
-    })
+    return JsonResponse({'success': True, 'order': order})
 
 
 @login_required
@@ -523,6 +596,7 @@ def dismiss_review_prompt(request, order_number):
     order.review_prompted_count += 1
     order.review_prompt_dismissed_at = timezone.now()
     order.save(update_fields=['review_prompted_count', 'review_prompt_dismissed_at'])
+    forget_review_prompt(request.user.id)
     
     return JsonResponse({'success': True})
 
@@ -545,9 +619,11 @@ def cancel_order(request, order_number):
         return JsonResponse({'success': False, 'message': 'Please provide a cancellation reason'})
 
     # Update order status
+    old_status = order.status
     order.status = 'cancelled'
     order.cancellation_reason = reason
     order.save()
+    order_status_changed(order, old_status)
 
     # Create status history
     OrderStatusHistory.objects.create(
@@ -612,6 +688,7 @@ def initiate_mpesa_payment(request):
             order.mpesa_checkout_request_id = stk_result['checkout_request_id']
             order.payment_status = 'processing'
             order.save()
+            publish_status(order)
 
             # Create status history
             OrderStatusHistory.objects.create(
@@ -712,6 +789,11 @@ def safaricom_ip_required(view_func):
     return wrapper
 
 
+def _orders_for_checkout_request(checkout_request_id):
+    """The order an STK push belongs to (callback and status query)"""
+    return Order.objects.select_related('user').filter(mpesa_checkout_request_id=checkout_request_id)
+
+
 # ─────────────────────────────────────────────────────────────
 #  SHARED PAYMENT CONFIRMATION  (single source of truth)
 # ─────────────────────────────────────────────────────────────
@@ -722,35 +804,17 @@ def _confirm_payment(order, receipt_number=None, notes='Payment confirmed'):
 
     Must be called inside a transaction.atomic() block.
     """
+    old_status = order.status
     order.payment_status = 'completed'
     order.status = 'pending'
     order.payment_completed_at = timezone.now()
     if receipt_number:
         order.mpesa_receipt_number = receipt_number
     order.save()
+    order_status_changed(order, old_status)
 
-    # ── Update sales stats atomically with F() + bulk_update ──
-    items = list(order.items.select_related('food_item'))
-    for item in items:
-        # F() defers the increment to the DB — race-condition safe
-        item.food_item.times_ordered = F('times_ordered') + item.quantity
-
-    from .models import FoodItem  # local import avoids circular at module level
-    FoodItem.objects.bulk_update(
-        [item.food_item for item in items],
-        ['times_ordered']
-    )
-
-    # ── Clear cart (items only — keep the Cart row for future orders) ──
-    Cart.objects.filter(user=order.user).first() and \
-        Cart.objects.filter(user=order.user).first().items.all().delete()
-    # Cleaner version:
-    from .models import CartItem
-    CartItem.objects.filter(cart__user=order.user).delete()
-
-    # ── Award loyalty points ──
-    order.user.loyalty_points = F('loyalty_points') + int(order.total)
-    order.user.save(update_fields=['loyalty_points'])
+    # ── Popularity, the ordered cart lines and loyalty points ──
+    complete_payment(order)
 
     # ── Status history ──
     OrderStatusHistory.objects.create(
@@ -767,10 +831,12 @@ def _confirm_payment(order, receipt_number=None, notes='Payment confirmed'):
 
 def _fail_payment(order, reason=''):
     """Mark an order payment as failed — no atomic block needed (simple update)."""
+    old_status = order.status
     order.payment_status = 'failed'
     order.status = 'cancelled'
     order.payment_failure_reason = reason
     order.save(update_fields=['payment_status', 'status', 'payment_failure_reason'])
+    order_status_changed(order, old_status)
 
     OrderStatusHistory.objects.create(
         order=order,
@@ -785,14 +851,9 @@ def _fail_payment(order, reason=''):
 @login_required
 @require_http_methods(["POST"])
 def place_order(request):
-    """Place a new order (M-Pesa or Cash on Delivery)."""
+    """Place a new order (M-Pesa or Cash on Delivery) from one locked cart snapshot."""
     data = json.loads(request.body)
 
-    cart = get_object_or_404(Cart, user=request.user)
-
-    if not cart.items.exists():
-        return JsonResponse({'success': False, 'message': 'Cart is empty'})
-
     hostel = data.get('hostel')
     room_number = data.get('room_number')
     phone_number = data.get('phone_number')
@@ -802,14 +863,6 @@ def place_order(request):
     if payment_method not in ['mpesa', 'cash']:
         return JsonResponse({'success': False, 'message': 'Invalid payment method'})
 
-    # ── Totals ──
-    subtotal = cart.total
-    first_item = cart.items.select_related('food_item').first()
-    store_type = first_item.food_item.store_type if first_item else 'liquor'
-    
-    delivery_fee = get_delivery_fee_for_store(store_type)
-    
-    total = subtotal + delivery_fee
     estimated_delivery = timezone.now() + timezone.timedelta(minutes=30)
 
     # ══════════════════════════════
@@ -823,8 +876,13 @@ def place_order(request):
 
         try:
             with transaction.atomic():
-                order = Order.objects.create(
-                    user=request.user,
+                lines = lock_cart(request.user)
+                validate(lines)
+                store_type, subtotal, delivery_fee, total = totals(lines)
+
+                # Stats, points and the cart wait for the payment (_confirm_payment)
+                order = create_order(
+                    request.user, lines,
                     hostel=hostel,
                     room_number=room_number,
                     phone_number=formatted_phone,
@@ -839,50 +897,43 @@ def place_order(request):
                     status='payment_pending',
                     estimated_delivery=estimated_delivery,
                 )
-
-                OrderItem.objects.bulk_create([
-                    OrderItem(
-                        order=order,
-                        food_item=item.food_item,
-                        quantity=item.quantity,
-                        price_at_order=item.food_item.price,
-                    )
-                    for item in cart.items.select_related('food_item')
-                ])
+                order_status_changed(order, None)
 
                 OrderStatusHistory.objects.create(
                     order=order,
                     status='payment_pending',
                     notes='Order created — awaiting M-Pesa STK payment',
                 )
+        except CheckoutError as e:
+            return JsonResponse({'success': False, 'message': str(e)})
 
-                # ── Initiate STK push ──
-                stk_response = mpesa.initiate_stk_push(
-                    phone_number=formatted_phone,
-                    amount=int(total),
-                    account_reference=order.order_number,
-                    transaction_desc="Tipsy Theoryy Order",
-                    store_type=store_type,
-                )
-
-                if not stk_response.get('success'):
-                    # Let atomic() roll back the order
-                    raise Exception(stk_response.get('message', 'STK push failed'))
-
-                checkout_request_id = stk_response.get('checkout_request_id')
-                if not checkout_request_id:
-                    raise Exception('No checkout_request_id returned by Safaricom')
-
-                order.mpesa_checkout_request_id = checkout_request_id
-                order.save(update_fields=['mpesa_checkout_request_id'])
+        # ── Initiate STK push, once the order is committed and the cart lines unlocked ──
+        try:
+            stk_response = mpesa.initiate_stk_push(
+                phone_number=formatted_phone,
+                amount=int(total),
+                account_reference=order.order_number,
+                transaction_desc="Tipsy Theoryy Order",
+                store_type=store_type,
+            )
+            if not stk_response.get('success'):
+                raise Exception(stk_response.get('message', 'STK push failed'))
 
+            checkout_request_id = stk_response.get('checkout_request_id')
+            if not checkout_request_id:
+                raise Exception('No checkout_request_id returned by Safaricom')
         except Exception as e:
             logger.exception("M-Pesa STK push failed for user %s", request.user.id)
+            with transaction.atomic():
+                _fail_payment(order, str(e))
             return JsonResponse({
                 'success': False,
                 'message': f'Payment initiation failed: {e}',
             })
 
+        order.mpesa_checkout_request_id = checkout_request_id
+        order.save(update_fields=['mpesa_checkout_request_id'])
+
         return JsonResponse({
             'success': True,
             'message': stk_response.get('customer_message', 'STK push sent — check your phone'),
@@ -896,60 +947,43 @@ def place_order(request):
     # ══════════════════════════════
     #  CASH ON DELIVERY
     # ══════════════════════════════
-    with transaction.atomic():
-        order = Order.objects.create(
-            user=request.user,
-            hostel=hostel,
-            room_number=room_number,
-            phone_number=phone_number,
-            delivery_notes=delivery_notes,
-            subtotal=subtotal,
-            delivery_fee=delivery_fee,
-            total=total,
-            payment_method='cash',
-            store_type=store_type,
-            payment_status='pending',
-            status='pending',
-            estimated_delivery=estimated_delivery,
-        )
-
-        OrderItem.objects.bulk_create([
-            OrderItem(
-                order=order,
-                food_item=item.food_item,
-                quantity=item.quantity,
-                price_at_order=item.food_item.price,
+    try:
+        with transaction.atomic():
+            lines = lock_cart(request.user)
+            validate(lines)
+            store_type, subtotal, delivery_fee, total = totals(lines)
+
+            order = create_order(
+                request.user, lines,
+                hostel=hostel,
+                room_number=room_number,
+                phone_number=phone_number,
+                delivery_notes=delivery_notes,
+                subtotal=subtotal,
+                delivery_fee=delivery_fee,
+                total=total,
+                payment_method='cash',
+                store_type=store_type,
+                payment_status='pending',
+                status='pending',
+                estimated_delivery=estimated_delivery,
             )
-            for item in cart.items.select_related('food_item')
-        ])
-
-        # ── Update stats atomically ──
-        cart_items = list(cart.items.select_related('food_item'))
-        for cart_item in cart_items:
-            cart_item.food_item.times_ordered = F('times_ordered') + cart_item.quantity
-
-        from .models import FoodItem
-        FoodItem.objects.bulk_update(
-            [ci.food_item for ci in cart_items],
-            ['times_ordered']
-        )
+            order_status_changed(order, None)
 
-        # ── Clear cart items (keep Cart row) ──
-        cart.items.all().delete()
+            # ── Stats, cart clearing and loyalty points from the same snapshot ──
+            complete_checkout(order, lines)
 
-        # ── Award loyalty points ──
-        order.user.loyalty_points = F('loyalty_points') + int(total)
-        order.user.save(update_fields=['loyalty_points'])
-
-        OrderStatusHistory.objects.create(
-            order=order,
-            status='pending',
-            notes='Order placed — Cash on delivery',
-        )
+            OrderStatusHistory.objects.create(
+                order=order,
+                status='pending',
+                notes='Order placed — Cash on delivery',
+            )
 
-        notify_new_order(order)
-        send_customer_order_confirmation(order)
-        send_admin_order_notification(order)
+            notify_new_order(order)
+            send_customer_order_confirmation(order)
+            send_admin_order_notification(order)
+    except CheckoutError as e:
+        return JsonResponse({'success': False, 'message': str(e)})
 
     return JsonResponse({
         'success': True,
@@ -978,9 +1012,7 @@ def mpesa_callback(request):
             return HttpResponse("OK")
 
         try:
-            order = Order.objects.select_related('user').get(
-                mpesa_checkout_request_id=checkout_request_id
-            )
+            order = _orders_for_checkout_request(checkout_request_id).get()
         except Order.DoesNotExist:
             logger.warning(
                 "Callback received for unknown CheckoutRequestID: %s",
@@ -1086,8 +1118,7 @@ def mpesa_stk_query(request):
 
     # ── Guard: only allow the order owner to query ──
     try:
-        order = Order.objects.select_related('user').get(
-            mpesa_checkout_request_id=checkout_request_id,
+        order = _orders_for_checkout_request(checkout_request_id).get(
             user=request.user,          # prevents other users querying someone else's order
         )
     except Order.DoesNotExist:
@@ -1146,8 +1177,9 @@ def mpesa_stk_query(request):
 # ─────────────────────────────────────────────────────────────
 #  PAYMENT STATUS POLL  (lightweight, cacheable)
 # ─────────────────────────────────────────────────────────────
-@login_required
 @require_http_methods(["GET"])
+@conditional_status
+@login_required
 def check_order_payment_status(request, order_number):
     """
     Lightweight endpoint for the frontend payment-waiting screen.
@@ -1155,17 +1187,17 @@ def check_order_payment_status(request, order_number):
     """
     try:
         order = Order.objects.only(
-            'payment_status', 'status', 'mpesa_receipt_number'
+            'order_number', 'user_id', 'payment_status', 'status', 'mpesa_receipt_number'
         ).get(order_number=order_number, user=request.user)
     except Order.DoesNotExist:
         return JsonResponse({'success': False, 'message': 'Order not found'}, status=404)
 
-    return JsonResponse({
+    return with_status_headers(JsonResponse({
         'success': True,
         'payment_status': order.payment_status,
         'order_status': order.status,
         'mpesa_receipt_number': order.mpesa_receipt_number,
-    })
+    }), status_entry(order))
 
 
 # ─────────────────────────────────────────────────────────────
@@ -1218,6 +1250,7 @@ def initiate_mpesa_payment(request):
     order.mpesa_checkout_request_id = stk_result['checkout_request_id']
     order.payment_status = 'pending'
     order.save(update_fields=['mpesa_checkout_request_id', 'payment_status'])
+    publish_status(order)
 
     OrderStatusHistory.objects.create(
         order=order,